@@ -0,0 +1,212 @@
+import os
+import re
+import currency
+
+# Set to 0 to send every travel question to the LLM
+FAST_ANSWERS_ENABLED = os.getenv("FAST_ANSWERS_ENABLED", "1") != "0"
+# Longer messages usually carry extra asks a template can't cover
+FAST_ANSWER_MAX_WORDS = int(os.getenv("FAST_ANSWER_MAX_WORDS", 14))
+
+# Intent patterns, checked against the lowercased message. A message is
+# answered from data only when exactly one intent matches.
+INTENT_PATTERNS = {
+    "budget": re.compile(r"\b(budget|how much|cost|costs|expensive|afford|spend|daily spend)\b"),
+    "best_time": re.compile(r"\b(best time|best season|best month|when (should|to|is it best to) (i |we )?(go|visit|travel)|which month|what month)\b"),
+    "currency": re.compile(r"\b(currency|what money|which money)\b"),
+    "language": re.compile(r"\b(language|languages|what do they speak|do they speak|spoken)\b")
+}
+
+# Query types from the keyword classifier that each intent must agree with
+# (None accepts any). "5-day trip" reads as itinerary to the classifier, so
+# budget questions with a duration still qualify.
+INTENT_QUERY_TYPES = {
+    "budget": {"budget", "itinerary"},
+    "best_time": {"time", "attraction"},
+    "currency": None,
+    "language": None
+}
+
+# The stored budget is per day for a whole trip, so a budget question must
+# be about the trip as a whole ("daily budget", "how much per day", "for 5 days")
+TRIP_LEVEL = re.compile(r"\b(budget|per day|a day|daily|total|\d+\s*-?\s*days?)\b")
+
+# Words that signal a question the stored fields can't answer precisely:
+# priced items and activities, rates, comparisons and compound asks
+DISQUALIFIERS = re.compile(
+    r"\b(plan|itinerary|schedule|hotel|hotels|hostel|hostels|flight|flights|ticket|tickets|entry|admission|"
+    r"pass|passes|museum|museums|metro|subway|bus|train|trains|transport|transit|taxi|uber|car|parking|"
+    r"restaurant|restaurants|meal|meals|food|eat|coffee|beer|drink|drinks|tip|tips|tipping|souvenir|souvenirs|"
+    r"shopping|sim|wifi|living|rent|salary|salaries|visa|exchange|rate|rates|convert|conversion|"
+    r"compare|versus|vs|than|cheapest|book|booking|tour|tours|guide|"
+    r"what to do|what should i do|things to do|and also|or)\b"
+)
+
+# A purpose ("for skiing", "to see the cherry blossoms") narrows a budget or
+# season question beyond what the stored fields say
+PURPOSE_CLAUSE = re.compile(r"\bfor \w+ing\b|\bto (see|watch|catch|do|hike|ski|surf|dive|swim|attend|experience)\b")
+
+# Durations the templates can't total: anything but a number of days
+OTHER_DURATION = re.compile(
+    r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|few|couple of)\s*-?\s*"
+    r"(weeks?|fortnights?|months?|nights?|hours?|weekends?)\b|\bfortnight\b|"
+    r"\b(one|two|three|four|five|six|seven|eight|nine|ten|few|couple of)\s*-?\s*days?\b"
+)
+
+# Capitalized words after the first one
+PROPER_NOUN = re.compile(r"(?<=\s)[A-Z][a-z]+")
+
+BUDGET_TIERS = [
+    ("Low", "daily_budget_low", "hostels, street food, free attractions"),
+    ("Mid", "daily_budget_mid", "mid-range hotels, local restaurants, paid attractions"),
+    ("High", "daily_budget_high", "luxury hotels, fine dining, premium experiences")
+]
+
+
+def format_amount(amount, currency_code):
+    """Format an amount like the prompts do: $120 for USD, otherwise 120 EUR"""
+    text = f"{amount:,.0f}" if isinstance(amount, (int, float)) else str(amount)
+    if not currency_code or currency_code.upper() == "USD":
+        return f"${text}"
+    return f"{text} {currency_code}"
+
+
+def local_currency_formatter(location_context, code):
+    """Return amount -> " (about 21,000 JPY)" for budgets quoted in another currency than the local one.
+
+    Only documents written by the scraper reference a stored rate table;
+    without one (e.g. locations.json) amounts are shown as stored.
+    """
+    real_time = location_context.get("real_time_data")
+    reference = real_time.get("currency_rates") if isinstance(real_time, dict) else None
+    if not isinstance(reference, dict):
+        return None
+    local_code = reference.get("currency_code")
+    if not local_code or local_code.upper() == code.upper():
+        return None
+    table = currency.get_rate_table(reference.get("rate_table") or currency.CURRENCY_BASE)
+    if currency.convert(1, code, local_code, table) is None:
+        return None
+    return lambda amount: f" (about {format_amount(currency.convert(amount, code, local_code, table), local_code)})"
+
+
+def render_budget(location_context, duration):
+    """Daily budget tiers, plus trip totals when a duration was given"""
+    budget = location_context.get("budget") or {}
+    if not all(isinstance(budget.get(key), (int, float)) for _, key, _ in BUDGET_TIERS):
+        return None
+    location = location_context["location"]
+    code = budget.get("currency", "USD")
+    in_local = local_currency_formatter(location_context, code) or (lambda amount: "")
+
+    lines = [f"Daily Budget for {location}:"]
+    for label, key, description in BUDGET_TIERS:
+        lines.append(f"- {label}: {format_amount(budget[key], code)}/day{in_local(budget[key])} ({description})")
+
+    if duration:
+        lines.append("")
+        lines.append(f"Total for {duration} Day{'s' if duration != 1 else ''}:")
+        for label, key, _ in BUDGET_TIERS:
+            total = budget[key] * duration
+            lines.append(f"- {label}: {format_amount(total, code)}{in_local(total)}")
+
+    if budget.get("notes"):
+        lines.append("")
+        lines.append("Notes:")
+        lines.append(f"- {budget['notes']}")
+    return "\n".join(lines)
+
+
+def render_best_time(location_context, duration):
+    best_time = location_context.get("best_time_to_visit")
+    if not best_time:
+        return None
+    location = location_context["location"]
+    return "\n".join([
+        f"Best Time to Visit {location}:",
+        f"- Recommended: {best_time}",
+        "- Tip: Book accommodations early for these months"
+    ])
+
+
+def render_currency(location_context, duration):
+    currency = location_context.get("currency")
+    if not currency:
+        return None
+    location = location_context["location"]
+    lines = [f"Currency in {location}:", f"- Local currency: {currency}"]
+    budget_code = (location_context.get("budget") or {}).get("currency")
+    if budget_code:
+        lines.append(f"- Budget figures quoted in: {budget_code}")
+    return "\n".join(lines)
+
+
+def render_language(location_context, duration):
+    language = location_context.get("language")
+    if not language:
+        return None
+    location = location_context["location"]
+    return "\n".join([
+        f"Language in {location}:",
+        f"- Spoken: {language}",
+        "- Tip: Learn a few basic phrases before you go"
+    ])
+
+
+RENDERERS = {
+    "budget": render_budget,
+    "best_time": render_best_time,
+    "currency": render_currency,
+    "language": render_language
+}
+
+
+def match_intent(user_message, query_type, location_context, other_locations=()):
+    """Return the single confident intent for a message, or None.
+
+    Declines when several intents match, when the classifier disagrees, when
+    the message names another destination or one of this destination's
+    attractions, a priced item, a purpose or a duration other than days, when
+    a budget question isn't about the whole trip, or when it contains words
+    the stored fields can't answer.
+    """
+    message_lower = user_message.lower()
+    if len(message_lower.split()) > FAST_ANSWER_MAX_WORDS:
+        return None
+    for pattern in (DISQUALIFIERS, PURPOSE_CLAUSE, OTHER_DURATION):
+        if pattern.search(message_lower):
+            return None
+
+    intents = [intent for intent, pattern in INTENT_PATTERNS.items() if pattern.search(message_lower)]
+    if len(intents) != 1:
+        return None
+    intent = intents[0]
+    allowed_types = INTENT_QUERY_TYPES[intent]
+    if allowed_types is not None and query_type not in allowed_types:
+        return None
+    if intent == "budget" and not TRIP_LEVEL.search(message_lower):
+        return None
+
+    location = location_context.get("location", "").lower()
+    if any(name.lower() in message_lower for name in other_locations if name.lower() != location):
+        return None
+    attractions = location_context.get("attractions", [])
+    if any(a.get("name", "").lower() in message_lower for a in attractions if a.get("name")):
+        return None
+    # Other capitalized names ("the Eiffel Tower") point at something specific
+    location_words = set(location.split())
+    if any(word.lower() not in location_words for word in PROPER_NOUN.findall(user_message) if word != "I"):
+        return None
+    return intent
+
+
+def answer_structured_query(user_message, location_context, query_type, duration, other_locations=()):
+    """Answer a budget/best-time/currency/language question from location data.
+
+    Returns the rendered reply, or None when the question should go to the LLM.
+    """
+    if not FAST_ANSWERS_ENABLED or not location_context:
+        return None
+    intent = match_intent(user_message, query_type, location_context, other_locations)
+    if intent is None:
+        return None
+    return RENDERERS[intent](location_context, duration)
@@ -1,56 +1,171 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Blueprint, render_template, request, jsonify, Response, stream_with_context, g, current_app, abort
 from helpers import (
     get_location_context,
     chat_with_groq,
+    stream_chat_with_groq,
     get_all_locations,
-    get_real_time_weather
+    get_catalog_payload,
+    get_cached_weather,
+    get_cached_weather_batch,
+    get_cache_stats,
+    start_session_turn
 )
+from sessions import is_valid_session_id
+from scheduler import client_key
+from http_client import get_upstream_stats
+from http_cache import EncodedPayload, StaticAssets, conditional_response, REVALIDATE_CACHE_CONTROL
+import metrics
 import os
+import json
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "dev-secret-key")
+bp = Blueprint("travel", __name__)
 
-@app.route("/")
+def send_payload(payload, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Send a pre-encoded payload with ETag revalidation and pre-compressed bodies"""
+    status, body, headers = conditional_response(payload, request.headers, cache_control)
+    return Response(body, status=status, headers=headers)
+
+@bp.route("/")
 def index():
     """Serve the chatbot page"""
-    return render_template("index.html")
+    # Rendered once per app; asset URLs inside are already fingerprinted
+    payload = current_app.extensions.get("index_payload")
+    if payload is None:
+        payload = EncodedPayload(render_template("index.html").encode("utf-8"), "text/html; charset=utf-8")
+        current_app.extensions["index_payload"] = payload
+    return send_payload(payload)
+
+@bp.route("/static/<path:filename>")
+def static_asset(filename):
+    """Serve a static file from memory; fingerprinted names are cached for a year"""
+    payload, cache_control = current_app.extensions["static_assets"].get(filename)
+    if payload is None:
+        abort(404)
+    return send_payload(payload, cache_control)
 
-@app.route("/api/chat", methods=["POST"])
+@bp.route("/api/chat", methods=["POST"])
 def api_chat():
     """Handle chat messages"""
     data = request.json
     user_message = data.get("message", "")
     location = data.get("location", "")
-    conversation_history = data.get("history", [])
+    session_id = data.get("session_id")
     
     if not user_message:
         return jsonify({"error": "Empty message"}), 400
+    if session_id is not None and not is_valid_session_id(session_id):
+        return jsonify({"error": "Invalid session_id"}), 400
     
     location_context = get_location_context(location) if location else None
-    bot_response = chat_with_groq(user_message, location_context, conversation_history)
+
+    if session_id:
+        # Earlier turns are kept server-side; the client sends only the new message
+        conversation_history = start_session_turn(session_id, location, user_message)
+    else:
+        conversation_history = data.get("history", [])
+
+    # Each client address gets its own fair-share queue for LLM calls
+    client_id = client_key(request.remote_addr, request.headers.get("X-Forwarded-For"))
+
+    if data.get("stream"):
+        return stream_chat_response(user_message, location_context, conversation_history, client_id)
+
+    bot_response = chat_with_groq(user_message, location_context, conversation_history, client_id)
     
     return jsonify({"response": bot_response})
 
-@app.route("/api/locations", methods=["GET"])
+def stream_chat_response(user_message, location_context, conversation_history, client_id=None):
+    """Stream a chat reply to the client as server-sent events"""
+    def generate():
+        for delta in stream_chat_with_groq(user_message, location_context, conversation_history, client_id):
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@bp.route("/api/locations", methods=["GET"])
 def api_locations():
     """Get all available locations"""
-    locations = get_all_locations()
-    return jsonify(locations)
+    return send_payload(get_catalog_payload("locations"))
 
-@app.route("/api/weather/<location>", methods=["GET"])
+@bp.route("/api/catalog", methods=["GET"])
+def api_catalog():
+    """Get every destination with coordinates, currency, season and budget tiers"""
+    return send_payload(get_catalog_payload("catalog"))
+
+@bp.route("/api/weather/<location>", methods=["GET"])
 def api_weather(location):
     """Get real-time weather for a specific location"""
-    weather_data = get_real_time_weather(location)
+    weather_data = get_cached_weather(location)
     if weather_data:
         return jsonify(weather_data)
     else:
         return jsonify({"error": f"Weather data not available for {location}"}), 404
 
+@bp.route("/api/weather", methods=["GET"])
+def api_weather_batch():
+    """Get real-time weather for several locations (?locations=Paris,Tokyo); all by default"""
+    names = [name.strip() for name in request.args.get("locations", "").split(",") if name.strip()]
+    weather, unknown = get_cached_weather_batch(names or get_all_locations())
+    return jsonify({"weather": weather, "unknown": unknown})
+
+@bp.route("/api/cache-stats", methods=["GET"])
+def api_cache_stats():
+    """Get cache hit/miss counters for tuning TTLs"""
+    return jsonify(get_cache_stats())
+
+@bp.route("/api/upstream-stats", methods=["GET"])
+def api_upstream_stats():
+    """Get per-upstream request, error and latency counters"""
+    return jsonify(get_upstream_stats())
+
+@bp.route("/metrics", methods=["GET"])
+def api_metrics():
+    """Expose latency, token and cache metrics in Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_request_time(response):
+    # Streamed responses are timed to their headers; stage metrics cover the body
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+def create_app():
+    """Create the Flask application.
+
+    Clients and location data are initialized on first use, so creating an
+    app does no network I/O; only the static files are read and compressed.
+    """
+    # Static files are served by static_asset() from pre-compressed copies
+    app = Flask(__name__, static_folder=None)
+    app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "dev-secret-key")
+    assets = StaticAssets(os.path.join(app.root_path, "static"))
+    app.extensions["static_assets"] = assets
+    app.jinja_env.globals["asset_url"] = assets.url
+    app.register_blueprint(bp)
+    return app
+
 if __name__ == "__main__":
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 5000))
     DEBUG = os.getenv("FLASK_ENV") == "development"
-    app.run(host=HOST, port=PORT, debug=DEBUG)
+    create_app().run(host=HOST, port=PORT, debug=DEBUG)
@@ -0,0 +1,178 @@
+from quart import Quart, render_template, request, jsonify, Response, g, abort
+from helpers import (
+    get_location_context,
+    get_all_locations,
+    get_catalog_payload,
+    get_cache_stats,
+    start_session_turn
+)
+from sessions import is_valid_session_id
+from scheduler import client_key
+from http_client import get_upstream_stats
+from http_cache import EncodedPayload, StaticAssets, conditional_response, REVALIDATE_CACHE_CONTROL
+import metrics
+from async_helpers import (
+    chat_with_groq_async,
+    stream_chat_with_groq_async,
+    get_cached_weather_async,
+    get_cached_weather_batch_async,
+    run_blocking,
+    warm_up,
+    close_clients
+)
+import os
+import json
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Async serving mode: run with `hypercorn asgi:app --bind 0.0.0.0:5000`
+# Static files are served by static_asset() from pre-compressed copies
+app = Quart(__name__, static_folder=None)
+app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "dev-secret-key")
+static_assets = StaticAssets(os.path.join(app.root_path, "static"))
+app.jinja_env.globals["asset_url"] = static_assets.url
+_index_payload = None
+
+@app.before_serving
+async def startup():
+    """Load the location snapshot before the first request needs it"""
+    await warm_up()
+
+@app.after_serving
+async def shutdown():
+    """Close the shared outbound HTTP client"""
+    await close_clients()
+
+@app.before_request
+async def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+async def record_request_time(response):
+    # Streamed responses are timed to their headers; stage metrics cover the body
+    started = g.pop("request_started", None)
+    if started is not None:
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+            method=request.method,
+            status=response.status_code
+        )
+    return response
+
+def send_payload(payload, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Send a pre-encoded payload with ETag revalidation and pre-compressed bodies"""
+    status, body, headers = conditional_response(payload, request.headers, cache_control)
+    return Response(body, status=status, headers=headers)
+
+@app.route("/")
+async def index():
+    """Serve the chatbot page"""
+    # Rendered once; asset URLs inside are already fingerprinted
+    global _index_payload
+    if _index_payload is None:
+        html = await render_template("index.html")
+        _index_payload = EncodedPayload(html.encode("utf-8"), "text/html; charset=utf-8")
+    return send_payload(_index_payload)
+
+@app.route("/static/<path:filename>")
+async def static_asset(filename):
+    """Serve a static file from memory; fingerprinted names are cached for a year"""
+    payload, cache_control = static_assets.get(filename)
+    if payload is None:
+        abort(404)
+    return send_payload(payload, cache_control)
+
+@app.route("/api/chat", methods=["POST"])
+async def api_chat():
+    """Handle chat messages"""
+    data = await request.get_json()
+    user_message = data.get("message", "")
+    location = data.get("location", "")
+    session_id = data.get("session_id")
+
+    if not user_message:
+        return jsonify({"error": "Empty message"}), 400
+    if session_id is not None and not is_valid_session_id(session_id):
+        return jsonify({"error": "Invalid session_id"}), 400
+
+    # Location lookups and session turns can hit MongoDB or SQLite, so they run off the event loop
+    location_context = await run_blocking(get_location_context, location) if location else None
+
+    if session_id:
+        # Earlier turns are kept server-side; the client sends only the new message
+        conversation_history = await run_blocking(start_session_turn, session_id, location, user_message)
+    else:
+        conversation_history = data.get("history", [])
+
+    # Each client address gets its own fair-share queue for LLM calls
+    client_id = client_key(request.remote_addr, request.headers.get("X-Forwarded-For"))
+
+    if data.get("stream"):
+        return stream_chat_response(user_message, location_context, conversation_history, client_id)
+
+    bot_response = await chat_with_groq_async(user_message, location_context, conversation_history, client_id)
+
+    return jsonify({"response": bot_response})
+
+def stream_chat_response(user_message, location_context, conversation_history, client_id=None):
+    """Stream a chat reply to the client as server-sent events"""
+    async def generate():
+        async for delta in stream_chat_with_groq_async(user_message, location_context, conversation_history, client_id):
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+        yield f"data: {json.dumps({'done': True})}\n\n"
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/api/locations", methods=["GET"])
+async def api_locations():
+    """Get all available locations"""
+    return send_payload(get_catalog_payload("locations"))
+
+@app.route("/api/catalog", methods=["GET"])
+async def api_catalog():
+    """Get every destination with coordinates, currency, season and budget tiers"""
+    return send_payload(get_catalog_payload("catalog"))
+
+@app.route("/api/weather/<location>", methods=["GET"])
+async def api_weather(location):
+    """Get real-time weather for a specific location"""
+    weather_data = await get_cached_weather_async(location)
+    if weather_data:
+        return jsonify(weather_data)
+    else:
+        return jsonify({"error": f"Weather data not available for {location}"}), 404
+
+@app.route("/api/weather", methods=["GET"])
+async def api_weather_batch():
+    """Get real-time weather for several locations (?locations=Paris,Tokyo); all by default"""
+    names = [name.strip() for name in request.args.get("locations", "").split(",") if name.strip()]
+    weather, unknown = await get_cached_weather_batch_async(names or get_all_locations())
+    return jsonify({"weather": weather, "unknown": unknown})
+
+@app.route("/api/cache-stats", methods=["GET"])
+async def api_cache_stats():
+    """Get cache hit/miss counters for tuning TTLs"""
+    return jsonify(get_cache_stats())
+
+@app.route("/api/upstream-stats", methods=["GET"])
+async def api_upstream_stats():
+    """Get per-upstream request, error and latency counters"""
+    return jsonify(get_upstream_stats())
+
+@app.route("/metrics", methods=["GET"])
+async def api_metrics():
+    """Expose latency, token and cache metrics in Prometheus text format"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+if __name__ == "__main__":
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", 5000))
+    DEBUG = os.getenv("FLASK_ENV") == "development"
+    app.run(host=HOST, port=PORT, debug=DEBUG)
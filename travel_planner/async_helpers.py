@@ -0,0 +1,213 @@
+import asyncio
+import functools
+import os
+import time
+import httpx
+import http_client
+import metrics
+from weather import fetch_weather_batch_async
+from helpers import (
+    MAX_TOKENS,
+    WEATHER_FIELDS,
+    weather_cache,
+    resolve_location,
+    resolve_locations,
+    get_location_coordinates,
+    build_weather_url,
+    parse_weather_response,
+    prepare_chat,
+    get_locations_data,
+    store_chat_response,
+    stream_chunk_usage,
+    record_llm_success,
+    record_llm_failure,
+    record_llm_rejected,
+    llm_scheduler,
+    llm_router,
+    BUSY_MESSAGE
+)
+from scheduler import SchedulerRejected
+
+# Connection limits for the shared async HTTP client
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", 200))
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.getenv("ASYNC_HTTP_MAX_KEEPALIVE", 50))
+
+_http_client = None
+_groq_client = None
+
+
+def get_http_client():
+    """Get the process-wide httpx.AsyncClient, creating it on first use"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE
+            )
+        )
+    return _http_client
+
+
+def get_async_groq_client():
+    """Get the AsyncGroq client, sharing the process-wide HTTP connection pool"""
+    global _groq_client
+    if _groq_client is None:
+        from groq import AsyncGroq
+        _groq_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=get_http_client())
+    return _groq_client
+
+# The router's Groq provider uses the shared pool on the async path
+if "groq" in llm_router.providers:
+    llm_router.providers["groq"].async_client_factory = get_async_groq_client
+
+
+async def run_blocking(func, *args):
+    """Run a blocking call (SQLite, a first location load) on the default thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+async def warm_up():
+    """Load the location snapshot and prompts before serving, so no request pays for it on the event loop"""
+    await run_blocking(get_locations_data)
+
+
+async def close_clients():
+    """Close the shared HTTP client (call on server shutdown)"""
+    global _http_client, _groq_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _groq_client = None
+
+
+async def get_real_time_weather_async(location_name):
+    """Fetch real-time weather for a specific location without blocking"""
+    resolved = get_location_coordinates(location_name)
+    if not resolved:
+        return None
+    location_key, lat, lon = resolved
+
+    try:
+        response = await http_client.get_async(
+            get_http_client(), "open-meteo", build_weather_url(lat, lon), deadline=http_client.request_deadline()
+        )
+        response.raise_for_status()
+        return parse_weather_response(location_key, response.json(), lat, lon)
+    except Exception as e:
+        print(f"[-] Weather API error for {location_key}: {str(e)}")
+        return None
+
+
+async def get_cached_weather_async(location_name):
+    """Get weather through the shared cache, coalescing concurrent misses"""
+    location_key = resolve_location(location_name)
+    if not location_key:
+        return None
+    return await weather_cache.get_or_load_async(location_key, get_real_time_weather_async)
+
+
+async def get_real_time_weather_batch_async(location_names):
+    """Fetch real-time weather for several locations with one Open-Meteo request per batch"""
+    resolved = [coords for coords in map(get_location_coordinates, location_names) if coords]
+    responses = await fetch_weather_batch_async(
+        get_http_client(), [(lat, lon) for _, lat, lon in resolved], WEATHER_FIELDS,
+        deadline=http_client.request_deadline()
+    )
+    return {
+        location_key: parse_weather_response(location_key, data, lat, lon)
+        for (location_key, lat, lon), data in zip(resolved, responses)
+        if data is not None
+    }
+
+
+async def get_cached_weather_batch_async(location_names):
+    """Get weather for several locations, fetching all cache misses in one batch"""
+    location_keys, unknown = resolve_locations(location_names)
+    return await weather_cache.get_or_load_many_async(location_keys, get_real_time_weather_batch_async), unknown
+
+
+async def chat_with_groq_async(user_message, location_context, conversation_history, client_id=None):
+    """Send message to Groq and get response without holding a thread"""
+    # The response cache and precomputed answers may read SQLite
+    reply, messages, cache_key, query_type = await run_blocking(
+        prepare_chat, user_message, location_context, conversation_history
+    )
+    if reply is not None:
+        return reply
+
+    started = None
+
+    async def request():
+        nonlocal started
+        started = time.perf_counter()
+        return await llm_router.create_async(
+            query_type,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=0.3
+        )
+
+    try:
+        async with llm_scheduler.admit_async(client_id, request) as (response, target):
+            content = response.choices[0].message.content
+    except SchedulerRejected:
+        record_llm_rejected()
+        return BUSY_MESSAGE
+    except Exception as e:
+        record_llm_failure()
+        return f"Error: {str(e)}"
+
+    record_llm_success(time.perf_counter() - started, getattr(response, "usage", None), target)
+    store_chat_response(cache_key, content)
+    return content
+
+
+async def stream_chat_with_groq_async(user_message, location_context, conversation_history, client_id=None):
+    """Send message to Groq and yield response text as tokens arrive"""
+    reply, messages, cache_key, query_type = await run_blocking(
+        prepare_chat, user_message, location_context, conversation_history
+    )
+    if reply is not None:
+        yield reply
+        return
+
+    parts = []
+    usage = None
+    started = None
+
+    async def request():
+        nonlocal started
+        started = time.perf_counter()
+        return await llm_router.create_async(
+            query_type,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=0.3,
+            stream=True
+        )
+
+    try:
+        async with llm_scheduler.admit_async(client_id, request) as (stream, target):
+            async for chunk in stream:
+                usage = stream_chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+                    parts.append(delta)
+                    yield delta
+    except SchedulerRejected:
+        record_llm_rejected()
+        yield BUSY_MESSAGE
+        return
+    except Exception as e:
+        record_llm_failure()
+        yield f"Error: {str(e)}"
+        return
+
+    record_llm_success(time.perf_counter() - started, usage, target)
+    store_chat_response(cache_key, "".join(parts))
@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import helpers
+from precomputed import PrecomputedStore, PRECOMPUTED_PATH, TIERS, make_key
+from prompts import PROMPT_TEMPLATE_VERSION
+from scheduler import LLMScheduler, LLM_REQUESTS_PER_MINUTE, LLM_BURST
+
+# Canonical request for each query type; these are what gets sent to the LLM.
+# Days and tiers only vary the itinerary matrix.
+MESSAGE_TEMPLATES = {
+    "itinerary": "Create a {tier}{days}-day itinerary for {location}",
+    "attraction": "What are the top attractions to visit in {location}"
+}
+TIER_PHRASES = {
+    "any": "",
+    "low": "cheap ",
+    "mid": "mid-range ",
+    "high": "luxury "
+}
+
+
+def parse_days(spec):
+    """Parse "1-7" or "1,3,5" into a sorted list of day counts"""
+    days = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if "-" in part:
+            low, high = part.split("-", 1)
+            days.update(range(int(low), int(high) + 1))
+        elif part:
+            days.add(int(part))
+    return sorted(days)
+
+
+def build_matrix(locations, days, tiers, query_types):
+    """List the (location, query type, days, tier) cells to generate, with their messages"""
+    cells = []
+    for location_name in locations:
+        location_context = helpers.get_location_context(location_name)
+        if not location_context:
+            print(f"[-] Unknown location '{location_name}', skipping")
+            continue
+        for query_type in query_types:
+            template = MESSAGE_TEMPLATES[query_type]
+            # Only itineraries vary by length and budget
+            cell_days = days if "{days}" in template else [0]
+            cell_tiers = tiers if "{tier}" in template else ["any"]
+            for day_count in cell_days:
+                for tier in cell_tiers:
+                    message = template.format(location=location_context["location"], days=day_count,
+                                              tier=TIER_PHRASES[tier])
+                    if helpers.analyze_query_type(message) != query_type:
+                        print(f"[-] '{message}' doesn't classify as {query_type}, skipping")
+                        continue
+                    cells.append({
+                        "location": location_context["location"],
+                        "query_type": query_type,
+                        "days": day_count,
+                        "tier": tier,
+                        "model": helpers.llm_router.model_for(query_type),
+                        "prompt_version": PROMPT_TEMPLATE_VERSION,
+                        "message": message,
+                        "context": location_context
+                    })
+    return cells
+
+
+def cell_key(cell):
+    return make_key(cell["location"], cell["query_type"], cell["days"], cell["tier"], cell["model"],
+                    helpers.build_system_prompt(cell["context"]))
+
+
+def run_batch(cells, store, workers, requests_per_minute, burst):
+    """Generate every cell on a bounded worker pool, storing each answer as it completes.
+
+    Stored answers double as the checkpoint: an interrupted run picks up
+    from the cells that are still missing.
+    """
+    # Same admission control as the server, sized for this batch alone
+    scheduler = LLMScheduler(max_concurrency=workers, requests_per_minute=requests_per_minute, burst=burst,
+                             queue_timeout=600, max_queue_per_client=workers, max_queue=workers)
+    # Hedges count against the batch's limits, not the idle server scheduler's
+    helpers.llm_router.hedge_limiter = scheduler
+    totals = {"done": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0, "llm_s": 0.0}
+    lock = threading.Lock()
+
+    def generate(cell):
+        messages = helpers.build_chat_messages(cell["message"], cell["context"], [])
+        started = None
+
+        def request():
+            nonlocal started
+            started = time.perf_counter()
+            return helpers.llm_router.create(
+                cell["query_type"],
+                messages=messages,
+                max_tokens=helpers.MAX_TOKENS,
+                temperature=0.3
+            )
+
+        with scheduler.admit("batch", request) as (response, target):
+            content = response.choices[0].message.content
+        elapsed = time.perf_counter() - started
+        if not content:
+            raise ValueError("empty response")
+        store.put(cell["key"], cell, cell["message"], content, getattr(response, "usage", None))
+        return getattr(response, "usage", None), elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(generate, cell): cell for cell in cells}
+        for future in as_completed(futures):
+            cell = futures[future]
+            try:
+                usage, elapsed = future.result()
+            except Exception as e:
+                with lock:
+                    totals["failed"] += 1
+                print(f"[-] {cell['message']}: {str(e)}")
+                continue
+            with lock:
+                totals["done"] += 1
+                totals["llm_s"] += elapsed
+                totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+                done = totals["done"] + totals["failed"]
+            if done % 10 == 0 or done == len(cells):
+                print(f"[+] {done}/{len(cells)} cells")
+    totals["elapsed_s"] = time.perf_counter() - started
+    return totals
+
+
+def print_report(totals, skipped):
+    """Print throughput and token totals for a batch run"""
+    elapsed = max(totals["elapsed_s"], 1e-9)
+    tokens = totals["prompt_tokens"] + totals["completion_tokens"]
+    print(f"[+] Generated {totals['done']} answers, {totals['failed']} failed, {skipped} already stored")
+    print(f"[+] Elapsed: {totals['elapsed_s']:.2f}s, {totals['done'] / elapsed:.2f} answers/s, "
+          f"{totals['llm_s'] / max(totals['done'], 1):.2f}s mean LLM latency")
+    print(f"[+] Tokens: {totals['prompt_tokens']} prompt, {totals['completion_tokens']} completion, "
+          f"{tokens / elapsed:.1f} tokens/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate common chat answers into the precomputed store")
+    parser.add_argument("--locations", default="", help="comma-separated locations (default: all)")
+    parser.add_argument("--days", default="1-7", help='itinerary lengths, e.g. "1-7" or "3,5"')
+    parser.add_argument("--tiers", default=",".join(TIERS), help="budget tiers: any, low, mid, high")
+    parser.add_argument("--query-types", default="itinerary", help="comma-separated: itinerary, attraction")
+    parser.add_argument("--workers", type=int, default=4, help="LLM calls in flight at once")
+    parser.add_argument("--rpm", type=float, default=LLM_REQUESTS_PER_MINUTE,
+                        help="requests per minute across workers (0 disables pacing)")
+    parser.add_argument("--store", default=PRECOMPUTED_PATH or "precomputed.sqlite3", help="SQLite file to write")
+    parser.add_argument("--force", action="store_true", help="regenerate cells that are already stored")
+    args = parser.parse_args()
+
+    locations = [name.strip() for name in args.locations.split(",") if name.strip()] or helpers.get_all_locations()
+    tiers = [tier.strip() for tier in args.tiers.split(",") if tier.strip()]
+    query_types = [query_type.strip() for query_type in args.query_types.split(",") if query_type.strip()]
+    for tier in tiers:
+        if tier not in TIERS:
+            parser.error(f"unknown tier '{tier}'")
+    for query_type in query_types:
+        if query_type not in MESSAGE_TEMPLATES:
+            parser.error(f"unsupported query type '{query_type}'")
+
+    store = PrecomputedStore(args.store)
+    cells = build_matrix(locations, parse_days(args.days), tiers, query_types)
+    for cell in cells:
+        cell["key"] = cell_key(cell)
+
+    stored = set() if args.force else store.keys()
+    pending = [cell for cell in cells if cell["key"] not in stored]
+    skipped = len(cells) - len(pending)
+    print(f"[+] {len(cells)} cells, {skipped} already stored, generating {len(pending)} with {args.workers} workers")
+
+    totals = run_batch(pending, store, max(args.workers, 1), args.rpm, max(LLM_BURST, args.workers))
+    print_report(totals, skipped)
@@ -0,0 +1,145 @@
+"""Micro-benchmark: compiled QueryClassifier vs the original keyword scans.
+
+Run from the travel_planner directory:
+
+    python benchmarks/bench_classifier.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from classifier import build_classifier
+
+SAMPLE_MESSAGES = [
+    "Create a 4-day itinerary for Bali",
+    "What's the budget for Tokyo?",
+    "Best time to visit Barcelona",
+    "Tell me about attractions in Rome",
+    "How much should I budget for New York?",
+    "thanks",
+    "hello there",
+    "where can we eat good street food near the beach with the kids",
+    "tell me something interesting about this city",
+    "what should i do on a rainy afternoon, we are a couple on a tight budget"
+]
+
+
+# Original helpers.py implementations, kept here as the baseline
+def legacy_analyze_query_type(user_message):
+    """Analyze user message to determine query type"""
+    message_lower = user_message.lower()
+    
+    # Itinerary patterns
+    itinerary_keywords = ['plan', 'itinerary', 'day trip', 'days', 'schedule', 'agenda', 'what should i do', 'what to do']
+    
+    # Budget patterns
+    budget_keywords = ['budget', 'cost', 'price', 'expensive', 'how much', 'afford', 'spend', 'money']
+    
+    # Attraction patterns
+    attraction_keywords = ['attraction', 'visit', 'see', 'place', 'spot', 'museum', 'temple', 'church', 'monument', 'must-see', 'best places']
+    
+    # Time patterns
+    time_keywords = ['when', 'best time', 'season', 'weather', 'climate', 'rain', 'hot', 'cold', 'month']
+    
+    # Practical patterns
+    practical_keywords = ['transport', 'getting around', 'taxi', 'train', 'bus', 'flight', 'food', 'eat', 'restaurant', 'language', 'culture', 'tip']
+    
+    # Activity patterns
+    activity_keywords = ['adventure', 'relax', 'family', 'couple', 'solo', 'nightlife', 'beach', 'hiking', 'shopping', 'dining']
+    
+    # Count matching keywords
+    query_scores = {
+        'itinerary': sum(1 for keyword in itinerary_keywords if keyword in message_lower),
+        'budget': sum(1 for keyword in budget_keywords if keyword in message_lower),
+        'attraction': sum(1 for keyword in attraction_keywords if keyword in message_lower),
+        'time': sum(1 for keyword in time_keywords if keyword in message_lower),
+        'practical': sum(1 for keyword in practical_keywords if keyword in message_lower),
+        'activity': sum(1 for keyword in activity_keywords if keyword in message_lower)
+    }
+    
+    # Return most likely query type
+    if max(query_scores.values()) == 0:
+        return 'general'
+    
+    return max(query_scores, key=query_scores.get)
+
+
+def legacy_is_travel_query(user_message):
+    """Check if message is travel-related or casual/greeting"""
+    message_lower = user_message.lower().strip()
+    
+    # If message is too short and casual, it's not a travel query
+    if len(message_lower) < 5:
+        return False
+    
+    # Casual/greeting phrases that should be redirected (exact matches or at start/end)
+    casual_phrases = [
+        'thank you', 'thanks', 'thx',
+        'hello', 'hi', 'hey', 
+        'bye', 'goodbye', 'see you', 
+        'ok', 'okay', 'sure', 'cool', 'nice', 'great', 'awesome',
+        'sorry', 'please',
+        'how are you', 'what\'s up',
+        'lol', 'haha'
+    ]
+    
+    # Travel-related keywords that MUST be present
+    travel_keywords = [
+        'trip', 'visit', 'travel', 'plan', 'itinerary', 'day', 'days', 'budget', 'cost',
+        'attraction', 'hotel', 'restaurant', 'food', 'eat', 'transport', 'train',
+        'flight', 'taxi', 'bus', 'weather', 'season', 'when', 'where',
+        'what to do', 'what to see', 'best', 'place', 'places', 'activity', 'adventure',
+        'accommodation', 'stay', 'tour', 'guide', 'explore', 'discover',
+        'temple', 'museum', 'beach', 'mountain', 'culture', 'language',
+        'itinerary', 'schedule', 'agenda', 'things to do', 'must see', 'must-see'
+    ]
+    
+    # Check if message matches casual phrases
+    is_casual = any(message_lower == phrase or 
+                   message_lower.startswith(phrase + ' ') or 
+                   message_lower.endswith(' ' + phrase)
+                   for phrase in casual_phrases)
+    
+    # Check if message contains travel keywords
+    has_travel_keyword = any(keyword in message_lower for keyword in travel_keywords)
+    
+    # If it's a casual phrase without travel keywords, reject it
+    if is_casual and not has_travel_keyword:
+        return False
+    
+    # If it has travel keywords, accept it
+    if has_travel_keyword:
+        return True
+    
+    # If message is very short (casual greeting length), reject
+    if len(message_lower) < 8 and not has_travel_keyword:
+        return False
+    
+    # Otherwise, let LLM handle it
+    return True
+
+
+def legacy_classify(message):
+    return legacy_analyze_query_type(message), legacy_is_travel_query(message)
+
+
+def main(number=2000):
+    classifier = build_classifier()
+
+    mismatches = [m for m in SAMPLE_MESSAGES if legacy_classify(m) != classifier.classify(m)]
+    for message in mismatches:
+        print(f"[-] Verdict differs for {message!r}: {legacy_classify(message)} vs {classifier.classify(message)}")
+
+    legacy = timeit.timeit(lambda: [legacy_classify(m) for m in SAMPLE_MESSAGES], number=number)
+    compiled = timeit.timeit(lambda: [classifier.classify(m) for m in SAMPLE_MESSAGES], number=number)
+    calls = number * len(SAMPLE_MESSAGES)
+
+    print(f"legacy:   {legacy / calls * 1e6:8.2f} us/message")
+    print(f"compiled: {compiled / calls * 1e6:8.2f} us/message")
+    print(f"speedup:  {legacy / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Micro-benchmarks for the per-request helpers on the /api/chat path.
+
+Run from the travel_planner directory:
+
+    python benchmarks/bench_helpers.py --number 2000 --output helpers.json
+
+None of these benchmarks make network calls; the Groq client is never
+created.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+import helpers
+
+MESSAGES = [
+    "Create a 4-day itinerary for Bali",
+    "What's the budget for Tokyo?",
+    "Best time to visit Barcelona",
+    "Tell me about attractions in Rome",
+    "thanks",
+    "what should i do on a rainy afternoon, we are a couple on a tight budget"
+]
+
+HISTORY = [f"Earlier question {i} about museums, food and day trips around the city" for i in range(40)]
+
+
+def build_cases():
+    """Return {name: zero-argument callable} for every benchmarked helper"""
+    paris = helpers.get_location_context("Paris")
+    cycle = {"index": 0}
+
+    def next_message():
+        cycle["index"] = (cycle["index"] + 1) % len(MESSAGES)
+        return MESSAGES[cycle["index"]]
+
+    return {
+        "classify_query": lambda: helpers.classify_query(next_message()),
+        "analyze_query_type": lambda: helpers.analyze_query_type(next_message()),
+        "extract_duration": lambda: helpers.extract_duration(next_message()),
+        "resolve_location_alias": lambda: helpers.resolve_location("nyc"),
+        "get_location_context": lambda: helpers.get_location_context("Paris"),
+        "build_system_prompt": lambda: helpers.build_system_prompt(paris),
+        "build_chat_messages_long_history": lambda: helpers.build_chat_messages(MESSAGES[0], paris, HISTORY),
+        "prepare_chat": lambda: helpers.prepare_chat(next_message(), paris, HISTORY[:4])
+    }
+
+
+def run_micro_benchmarks(number=1000, repeat=5):
+    """Time each helper; returns {name: {"median_us", "best_us"}} per call"""
+    # Warm the location snapshot and prompt cache so first-use costs are excluded
+    helpers.get_locations_data()
+    results = {}
+    for name, case in build_cases().items():
+        runs = [elapsed / number for elapsed in timeit.repeat(case, number=number, repeat=repeat)]
+        results[name] = {
+            "median_us": round(statistics.median(runs) * 1e6, 3),
+            "best_us": round(min(runs) * 1e6, 3)
+        }
+    return results
+
+
+def print_results(results):
+    print(f"{'benchmark':<36} {'median us':>10} {'best us':>10}")
+    for name, result in results.items():
+        print(f"{name:<36} {result['median_us']:>10} {result['best_us']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=1000, help="calls per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run_micro_benchmarks(args.number, args.repeat)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"number": args.number, "repeat": args.repeat, "results": results}, f, indent=2)
@@ -0,0 +1,97 @@
+"""Memory benchmark: location documents as nested dicts vs compact Location records.
+
+Run from the travel_planner directory:
+
+    python benchmarks/bench_locations.py --count 5000 --output locations.json
+
+locations.json is replicated to --count destinations, each with its own
+name, coordinates, descriptions and tips as real data would have. Memory is
+measured with tracemalloc after parsing the JSON, and after parsing and
+converting with models.build_locations once the documents are dropped, as
+the location repository does.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models import build_locations, deep_sizeof
+
+LOCATIONS_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "locations.json")
+
+
+def synthesize(count):
+    """Return locations.json replicated to count destinations, serialized as JSON text"""
+    with open(LOCATIONS_JSON, "r") as f:
+        base = list(json.load(f).values())
+    documents = {}
+    for i in range(count):
+        doc = json.loads(json.dumps(base[i % len(base)]))
+        name = f"{doc['location']} {i}"
+        doc["location"] = name
+        doc["coordinates"]["latitude"] = round(doc["coordinates"]["latitude"] + i * 1e-4, 6)
+        for attraction in doc["attractions"]:
+            attraction["description"] += f" ({name})"
+        doc["tips"] = [tip.replace(base[i % len(base)]["location"], name) for tip in doc["tips"]]
+        documents[name] = doc
+    return json.dumps(documents)
+
+
+def measure(build):
+    """Run build() under tracemalloc; returns (result, bytes still allocated, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def run_benchmark(count):
+    text = synthesize(count)
+    documents, documents_bytes, parse_s = measure(lambda: json.loads(text))
+    records, records_bytes, build_s = measure(lambda: build_locations(json.loads(text)))
+    return {
+        "count": count,
+        "documents_kib": round(documents_bytes / 1024, 1),
+        "records_kib": round(records_bytes / 1024, 1),
+        "documents_deep_kib": round(deep_sizeof(documents) / 1024, 1),
+        "records_deep_kib": round(deep_sizeof(records) / 1024, 1),
+        "parse_ms": round(parse_s * 1000, 1),
+        "parse_and_build_ms": round(build_s * 1000, 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000, help="destinations to synthesize")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    stdout = sys.stdout
+    try:
+        # build_locations reports validation problems; none are expected here
+        sys.stdout = devnull
+        result = run_benchmark(args.count)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+    print(f"{args.count} locations")
+    print(f"  documents: {result['documents_kib']} KiB allocated ({result['documents_deep_kib']} KiB deep size), "
+          f"parsed in {result['parse_ms']} ms")
+    print(f"  records:   {result['records_kib']} KiB allocated ({result['records_deep_kib']} KiB deep size), "
+          f"parsed and built in {result['parse_and_build_ms']} ms")
+    print(f"  saved:     {100 * (1 - result['records_kib'] / result['documents_kib']):.0f}%")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
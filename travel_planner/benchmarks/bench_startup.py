@@ -0,0 +1,91 @@
+"""Cold-start benchmark: import and first-request time in fresh interpreters.
+
+Run from the travel_planner directory:
+
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+
+Each scenario runs in a new Python process so module caches and lazily
+created clients start cold, as they do in a freshly scaled-up worker.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SCENARIOS = {
+    "import helpers": "import helpers",
+    "import scraper": "import scraper",
+    "create_app": "import app; app.create_app()",
+    "first request": "import app; app.create_app().test_client().get('/api/locations')",
+    "first chat prompt": (
+        "import helpers; helpers.build_system_prompt(helpers.get_location_context('Paris'))"
+    )
+}
+
+CHILD_TEMPLATE = """
+import time
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started)
+"""
+
+
+def run_scenario(statement):
+    """Time statement in a fresh interpreter; returns (in-process seconds, wall seconds)"""
+    env = dict(os.environ, GROQ_API_KEY=os.getenv("GROQ_API_KEY", "benchmark"))
+    wall_started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_TEMPLATE.format(statement=statement)],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    wall = time.perf_counter() - wall_started
+    return float(output.strip().splitlines()[-1]), wall
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "min_ms": round(samples[0] * 1000, 1),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(samples[-1] * 1000, 1)
+    }
+
+
+def main(args):
+    results = {}
+    for name, statement in SCENARIOS.items():
+        try:
+            timed = [run_scenario(statement) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            # Lets the script run against older revisions missing a scenario
+            print(f"[-] {name} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        results[name] = {
+            "in_process": summarize([sample for sample, _ in timed]),
+            "process_wall": summarize([wall for _, wall in timed])
+        }
+
+    print(f"{'scenario':<20} {'median ms':>10} {'min ms':>10} {'process ms':>11}")
+    for name, result in results.items():
+        print(f"{name:<20} {result['in_process']['median_ms']:>10} {result['in_process']['min_ms']:>10} "
+              f"{result['process_wall']['median_ms']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,106 @@
+"""Concurrent load test for the chat API, comparing serving modes.
+
+Start the sync and async servers, then point this script at both:
+
+    python app.py                                   # sync Flask on :5000
+    hypercorn asgi:app --bind 0.0.0.0:5001          # async Quart on :5001
+    python benchmarks/load_test.py --target sync=http://localhost:5000 \\
+        --target async=http://localhost:5001 --concurrency 200 --requests 2000
+
+Each target receives the same request mix; results are printed as a table
+and optionally written as JSON with --output.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import httpx
+
+DEFAULT_PAYLOAD = {"message": "Create a 3-day itinerary", "location": "Paris", "history": []}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+async def run_target(base_url, method, path, payload, concurrency, total):
+    """Send total requests with at most concurrency in flight"""
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    if method == "GET":
+                        response = await client.get(path)
+                    else:
+                        response = await client.post(path, json=payload)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except Exception:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2)
+        }
+    }
+
+
+async def main(args):
+    payload = json.loads(args.payload) if args.payload else DEFAULT_PAYLOAD
+    results = {}
+    for target in args.target:
+        label, _, base_url = target.partition("=")
+        results[label] = await run_target(base_url, args.method, args.path, payload, args.concurrency, args.requests)
+
+    print(f"{'target':<10} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for label, result in results.items():
+        latency = result["latency_ms"]
+        print(f"{label:<10} {result['throughput_rps']:>10} {latency['p50']:>10} "
+              f"{latency['p95']:>10} {latency['p99']:>10} {result['errors']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, help="label=base_url, repeatable")
+    parser.add_argument("--path", default="/api/chat")
+    parser.add_argument("--method", default="POST", choices=["GET", "POST"])
+    parser.add_argument("--payload", help="JSON request body for POST requests")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
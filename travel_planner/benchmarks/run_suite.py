@@ -0,0 +1,169 @@
+"""Benchmark suite: helper micro-benchmarks plus end-to-end load tests.
+
+Starts the upstream stubs (benchmarks/stubs.py), launches the app against
+them in a subprocess, and load-tests /api/chat, /api/locations and
+/api/weather (and optionally a full scraper run). Run from the travel_planner
+directory:
+
+    python benchmarks/run_suite.py --output results.json
+    python benchmarks/run_suite.py --server asgi --latency groq=800 --fail-rate open-meteo=0.1
+
+Results, the stub settings and the environment are written as JSON, so runs
+from different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+from stubs import start_stubs, add_stub_arguments, parse_overrides
+from load_test import run_target
+
+CHAT_PAYLOAD = {"message": "Create a 3-day itinerary", "location": "Paris", "history": []}
+
+# (name, method, path, payload) for each end-to-end scenario
+SCENARIOS = [
+    ("locations", "GET", "/api/locations", None),
+    ("weather_single", "GET", "/api/weather/Paris", None),
+    ("weather_batch", "GET", "/api/weather", None),
+    ("chat", "POST", "/api/chat", CHAT_PAYLOAD),
+    ("chat_stream", "POST", "/api/chat", dict(CHAT_PAYLOAD, stream=True)),
+    ("chat_redirect", "POST", "/api/chat", dict(CHAT_PAYLOAD, message="thanks")),
+    ("chat_rules", "POST", "/api/chat", dict(CHAT_PAYLOAD, message="What's the budget for Paris?"))
+]
+
+SERVER_COMMANDS = {
+    "flask": [sys.executable, "app.py"],
+    "asgi": [sys.executable, "-m", "hypercorn", "asgi:app", "--bind", "127.0.0.1:{port}"]
+}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def start_server(kind, port, stub_env):
+    """Launch the app under test pointed at the stubs and wait until it answers"""
+    env = dict(os.environ, **stub_env)
+    env.update({
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "FLASK_ENV": "production",
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "benchmark"),
+        "LOCATION_POLL_INTERVAL": "0"
+    })
+    # Measure the app, not the provider quota, unless a limit is set explicitly
+    env.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+    command = [part.format(port=port) for part in SERVER_COMMANDS[kind]]
+    process = subprocess.Popen(command, cwd=APP_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"[-] {kind} server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/locations", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"[-] {kind} server did not start within 30s")
+
+
+def run_load_tests(base_url, concurrency, total):
+    """Run every scenario in order against one server"""
+    results = {}
+    for name, method, path, payload in SCENARIOS:
+        results[name] = asyncio.run(run_target(base_url, method, path, payload, concurrency, total))
+        latency = results[name]["latency_ms"]
+        print(f"{name:<16} {results[name]['throughput_rps']:>10} {latency['p50']:>10} "
+              f"{latency['p95']:>10} {latency['p99']:>10} {results[name]['errors']:>8}")
+    return results
+
+
+def run_scrape(stub_env):
+    """Run one full scraper refresh against the stubs; MongoDB defaults to the in-memory stand-in"""
+    env = dict(os.environ, **stub_env)
+    env.setdefault("MONGO_URI", "mongomock://")
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "scraper.py", "--full"], cwd=APP_DIR, env=env,
+                               capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    print(f"[+] scraper --full: {elapsed:.2f}s (exit code {completed.returncode})")
+    return {"elapsed_s": round(elapsed, 3), "exit_code": completed.returncode,
+            "log": completed.stdout.strip().splitlines()[-12:]}
+
+
+def main(args):
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"server": args.server, "concurrency": args.concurrency, "requests": args.requests,
+                   "seed": args.seed, "micro_number": args.micro_number},
+        "stub_overrides": parse_overrides(args)
+    }
+
+    if not args.skip_micro:
+        # Imported lazily so --skip-micro runs don't pay for importing helpers
+        from bench_helpers import run_micro_benchmarks, print_results
+        report["micro"] = run_micro_benchmarks(args.micro_number)
+        print_results(report["micro"])
+        print()
+
+    if not args.skip_load or args.scrape:
+        stubs = start_stubs(parse_overrides(args), seed=args.seed)
+        try:
+            if not args.skip_load:
+                server = start_server(args.server, args.port, stubs.env())
+                try:
+                    print(f"{'scenario':<16} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+                    report["load"] = run_load_tests(f"http://127.0.0.1:{args.port}", args.concurrency, args.requests)
+                finally:
+                    server.terminate()
+                    server.wait(timeout=10)
+            if args.scrape:
+                report["scrape"] = run_scrape(stubs.env())
+            report["upstream_stubs"] = stubs.stats()
+        finally:
+            stubs.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[+] Results written to {args.output}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", default="flask", choices=sorted(SERVER_COMMANDS))
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--micro-number", type=int, default=1000, help="calls per micro-benchmark timing run")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--scrape", action="store_true", help="also time a full scraper run against the stubs")
+    parser.add_argument("--output", help="write the full report as JSON to this file")
+    add_stub_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,289 @@
+"""Local stub servers for Groq, Open-Meteo, ExchangeRate-API and Aladhan.
+
+Each upstream gets its own HTTP server with configurable latency, jitter and
+failure rate, so benchmarks never touch the real APIs. Run standalone and
+export the printed variables before starting the app:
+
+    python benchmarks/stubs.py --latency groq=300 --fail-rate open-meteo=0.05
+
+Responses and injected failures come from a seeded RNG, so a run with the
+same --seed and request order is reproducible.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Per-upstream defaults: base latency and jitter (ms), share of requests failed with 503
+STUB_DEFAULTS = {
+    "groq": {"latency_ms": 300, "jitter_ms": 50, "fail_rate": 0.0, "token_ms": 5},
+    "open-meteo": {"latency_ms": 80, "jitter_ms": 20, "fail_rate": 0.0},
+    "exchangerate": {"latency_ms": 120, "jitter_ms": 20, "fail_rate": 0.0},
+    "aladhan": {"latency_ms": 150, "jitter_ms": 30, "fail_rate": 0.0}
+}
+
+# Environment variables that point the app at each stub
+BASE_URL_ENV = {
+    "groq": "GROQ_BASE_URL",
+    "open-meteo": "OPEN_METEO_BASE_URL",
+    "exchangerate": "EXCHANGERATE_BASE_URL",
+    "aladhan": "ALADHAN_BASE_URL"
+}
+
+STUB_REPLY = (
+    "Day 1: Historic Center\n- Morning: Walking tour of the old town (9:00-12:00)\n"
+    "- Afternoon: Museum visit (13:00-16:00)\n- Evening: Dinner at a local bistro (19:00)\n"
+    "- Estimated cost: $80 - $120\n\nBudget Information:\n- Low: $80/day\n- Mid: $150/day\n- High: $250/day"
+)
+
+STUB_RATES = {"USD": 1.0, "EUR": 0.92, "GBP": 0.79, "JPY": 151.3, "AED": 3.67, "THB": 36.4,
+              "AUD": 1.52, "SGD": 1.35, "TRY": 32.1, "IDR": 15800.0}
+
+
+class StubState:
+    """Latency/failure settings and counters for one stub upstream"""
+
+    def __init__(self, name, settings, seed):
+        self.name = name
+        self.settings = settings
+        self._random = random.Random(f"{seed}:{name}")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def next_request(self):
+        """Return (delay seconds, fail) for the next request"""
+        with self._lock:
+            self.requests += 1
+            jitter = self._random.uniform(-1, 1) * self.settings.get("jitter_ms", 0)
+            fail = self._random.random() < self.settings.get("fail_rate", 0.0)
+            if fail:
+                self.failures += 1
+        return max(0.0, self.settings.get("latency_ms", 0) + jitter) / 1000, fail
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Dispatches requests to the upstream's responder after the injected delay"""
+
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._handle(json.loads(self.rfile.read(length) or b"{}"))
+
+    def _handle(self, body):
+        delay, fail = self.state.next_request()
+        time.sleep(delay)
+        if fail:
+            self._send_json(503, {"error": {"message": "injected failure"}})
+            return
+        url = urlparse(self.path)
+        RESPONDERS[self.state.name](self, url.path, parse_qs(url.query), body)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _usage(body, completion):
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(completion) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def respond_groq(handler, path, query, body):
+    """OpenAI-compatible chat completions, streamed or not"""
+    if not path.endswith("/chat/completions"):
+        handler._send_json(404, {"error": {"message": "not found"}})
+        return
+    body = body or {}
+    model = body.get("model", "stub")
+    created = int(time.time())
+    usage = _usage(body, STUB_REPLY)
+
+    if not body.get("stream"):
+        handler._send_json(200, {
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": STUB_REPLY}, "finish_reason": "stop"}],
+            "usage": usage
+        })
+        return
+
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.send_header("Connection", "close")
+    handler.end_headers()
+    token_delay = handler.state.settings.get("token_ms", 0) / 1000
+    words = STUB_REPLY.split(" ")
+    for index, word in enumerate(words):
+        last = index == len(words) - 1
+        chunk = {
+            "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {"content": word if last else word + " "},
+                         "finish_reason": "stop" if last else None}]
+        }
+        if last:
+            chunk["x_groq"] = {"usage": usage}
+        handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        handler.wfile.flush()
+        if token_delay and not last:
+            time.sleep(token_delay)
+    handler.wfile.write(b"data: [DONE]\n\n")
+    handler.close_connection = True
+
+
+def respond_open_meteo(handler, path, query, body):
+    """Current weather for one or many comma-separated coordinates"""
+    latitudes = query.get("latitude", ["0"])[0].split(",")
+    longitudes = query.get("longitude", ["0"])[0].split(",")
+    results = []
+    for lat, lon in zip(latitudes, longitudes):
+        lat, lon = float(lat), float(lon)
+        results.append({
+            "latitude": lat, "longitude": lon, "timezone": "GMT",
+            "current_units": {"temperature_2m": "°C", "wind_speed_10m": "km/h"},
+            "current": {
+                "temperature_2m": round(25 - abs(lat) / 3, 1),
+                "relative_humidity_2m": int(40 + abs(lon) % 50),
+                "weather_code": int(abs(lat + lon)) % 4,
+                "wind_speed_10m": round(5 + abs(lon) % 15, 1),
+                "is_day": 1
+            }
+        })
+    handler._send_json(200, results if len(results) > 1 else results[0])
+
+
+def respond_exchangerate(handler, path, query, body):
+    """Rate table for the base currency in the path"""
+    base = path.rstrip("/").rsplit("/", 1)[-1].upper()
+    base_rate = STUB_RATES.get(base, 1.0)
+    handler._send_json(200, {"base": base, "rates": {code: rate / base_rate for code, rate in STUB_RATES.items()}})
+
+
+def respond_aladhan(handler, path, query, body):
+    """Daily prayer timings for a coordinate"""
+    handler._send_json(200, {"code": 200, "status": "OK", "data": {
+        "timings": {"Fajr": "05:12", "Dhuhr": "12:30", "Asr": "15:45", "Maghrib": "18:20", "Isha": "19:40"},
+        "meta": {"latitude": float(query.get("latitude", ["0"])[0]), "longitude": float(query.get("longitude", ["0"])[0])}
+    }})
+
+
+RESPONDERS = {
+    "groq": respond_groq,
+    "open-meteo": respond_open_meteo,
+    "exchangerate": respond_exchangerate,
+    "aladhan": respond_aladhan
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream on purpose (cancelled hedges, disconnects)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubCluster:
+    """A running set of stub servers, one per upstream"""
+
+    def __init__(self, servers, states):
+        self.servers = servers
+        self.states = states
+
+    def base_urls(self):
+        return {name: f"http://{server.server_address[0]}:{server.server_address[1]}"
+                for name, server in self.servers.items()}
+
+    def env(self):
+        """Environment variables that route the app's outbound calls to these stubs"""
+        return {BASE_URL_ENV[name]: url for name, url in self.base_urls().items()}
+
+    def stats(self):
+        return {name: {"requests": state.requests, "failures": state.failures, "settings": dict(state.settings)}
+                for name, state in self.states.items()}
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+def start_stubs(overrides=None, host="127.0.0.1", base_port=0, seed=0):
+    """Start all stub servers in background threads.
+
+    overrides maps an upstream name to settings that replace STUB_DEFAULTS
+    entries; base_port 0 picks free ports.
+    """
+    servers = {}
+    states = {}
+    for index, (name, defaults) in enumerate(STUB_DEFAULTS.items()):
+        settings = dict(defaults, **(overrides or {}).get(name, {}))
+        state = StubState(name, settings, seed)
+        handler = type(f"{name.title().replace('-', '')}StubHandler", (StubHandler,), {"state": state})
+        server = StubServer((host, base_port + index if base_port else 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers[name] = server
+        states[name] = state
+    return StubCluster(servers, states)
+
+
+def parse_settings(pairs, key, cast):
+    """Parse repeated upstream=value options into {upstream: {key: value}}"""
+    overrides = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition("=")
+        if name not in STUB_DEFAULTS:
+            raise SystemExit(f"unknown upstream '{name}', expected one of {', '.join(STUB_DEFAULTS)}")
+        overrides.setdefault(name, {})[key] = cast(value)
+    return overrides
+
+
+def parse_overrides(args):
+    """Merge the --latency/--jitter/--fail-rate options into one overrides dict"""
+    overrides = {}
+    for pairs, key, cast in ((args.latency, "latency_ms", float), (args.jitter, "jitter_ms", float),
+                             (args.fail_rate, "fail_rate", float)):
+        for name, settings in parse_settings(pairs, key, cast).items():
+            overrides.setdefault(name, {}).update(settings)
+    return overrides
+
+
+def add_stub_arguments(parser):
+    parser.add_argument("--latency", action="append", help="upstream=milliseconds, repeatable")
+    parser.add_argument("--jitter", action="append", help="upstream=milliseconds, repeatable")
+    parser.add_argument("--fail-rate", action="append", help="upstream=fraction (0-1) answered with 503, repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_stub_arguments(parser)
+    parser.add_argument("--port", type=int, default=9100, help="first port; upstreams use consecutive ports")
+    args = parser.parse_args()
+
+    cluster = start_stubs(parse_overrides(args), base_port=args.port, seed=args.seed)
+    for variable, url in cluster.env().items():
+        print(f"export {variable}={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        cluster.stop()
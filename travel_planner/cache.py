@@ -0,0 +1,329 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """A single in-progress load that concurrent callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.waiters = []
+        self.value = None
+        self.error = None
+
+    def wake(self):
+        self.event.set()
+        for loop, future in self.waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+# The event loop only keeps weak references to tasks; background tasks are
+# held here until they finish so they can't be garbage-collected mid-run
+_background_tasks = set()
+
+
+def run_in_background(coro, description):
+    """Schedule coro as a task that is kept alive until done; a failure is logged with description"""
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(lambda done: _background_done(done, description))
+    return task
+
+
+def _background_done(task, description):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[-] {description} failed: {str(task.exception())}")
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL and single-flight loading.
+
+    When ``stale_ttl`` is greater than zero, entries older than ``ttl`` but
+    younger than ``ttl + stale_ttl`` are still served while a background
+    thread refreshes them (stale-while-revalidate).
+    """
+
+    def __init__(self, ttl=300, max_size=256, stale_ttl=0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "evictions": 0,
+            "errors": 0
+        }
+
+    def get(self, key):
+        """Return a fresh cached value or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[0]
+        return None
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader(key) on a miss.
+
+        Concurrent misses for the same key share one loader call. A loader
+        returning None is treated as a failed fetch and is not cached.
+        """
+        value, flight, leader, refresh = self._begin(key)
+        if refresh:
+            threading.Thread(target=self._refresh, args=(key, loader, flight), daemon=True).start()
+            return value
+        if flight is None:
+            return value
+
+        if not leader:
+            flight.event.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        return self._load(key, loader, flight)
+
+    async def get_or_load_async(self, key, loader):
+        """Async variant of get_or_load where loader is a coroutine function"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        value, flight, leader, refresh = self._begin(key, (loop, waiter))
+        if refresh:
+            run_in_background(self._refresh_async(key, loader, flight), f"Background refresh of {key}")
+            return value
+        if flight is None:
+            return value
+
+        if not leader:
+            await waiter
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        return await self._load_async(key, loader, flight)
+
+    def get_or_load_many(self, keys, loader):
+        """get_or_load for several keys, with one loader(keys) -> {key: value} call for all misses.
+
+        Each key still goes through the single-flight and stale-while-revalidate
+        tracking: keys another caller is loading are waited on, and stale
+        values are served while one background call refreshes them. Returns
+        {key: value} in key order; keys that failed to load are left out.
+        """
+        found, leading, waiting, refreshing = self._begin_many(keys)
+        if refreshing:
+            threading.Thread(target=self._refresh_many, args=(refreshing, loader), daemon=True).start()
+        if leading:
+            self._load_many(leading, loader)
+        for flight, _ in waiting.values():
+            flight.event.wait()
+        return self._collect(keys, found, leading, waiting)
+
+    async def get_or_load_many_async(self, keys, loader):
+        """Async variant of get_or_load_many where loader is a coroutine function"""
+        found, leading, waiting, refreshing = self._begin_many(keys, asyncio.get_running_loop())
+        if refreshing:
+            run_in_background(self._refresh_many_async(refreshing, loader), "Background batch refresh")
+        if leading:
+            await self._load_many_async(leading, loader)
+        for _, waiter in waiting.values():
+            await waiter
+        return self._collect(keys, found, leading, waiting)
+
+    def stats(self):
+        """Return a snapshot of the cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["stale"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _begin(self, key, waiter=None):
+        """Classify a lookup under the lock.
+
+        Returns (value, flight, leader, refresh): a fresh or stale value, the
+        flight to wait on or run, whether this caller runs the loader, and
+        whether that load is a background refresh of a stale entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                value, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    self._entries.move_to_end(key)
+                    return value, None, False, False
+                if age < self.ttl + self.stale_ttl:
+                    self._stats["stale"] += 1
+                    self._entries.move_to_end(key)
+                    if key in self._inflight:
+                        return value, None, False, False
+                    flight = _Flight()
+                    self._inflight[key] = flight
+                    self._stats["refreshes"] += 1
+                    return value, flight, True, True
+
+            flight = self._inflight.get(key)
+            if flight:
+                self._stats["coalesced"] += 1
+                if waiter:
+                    flight.waiters.append(waiter)
+                return None, flight, False, False
+
+            self._stats["misses"] += 1
+            flight = _Flight()
+            self._inflight[key] = flight
+            return None, flight, True, False
+
+    def _begin_many(self, keys, loop=None):
+        """Classify several lookups; returns (found, leading, waiting, refreshing).
+
+        found maps keys to fresh or stale values, leading and refreshing map
+        keys to the flights this caller loads, and waiting maps keys to
+        (flight, asyncio future or None) for loads run by other callers.
+        """
+        found, leading, waiting, refreshing = {}, {}, {}, {}
+        for key in keys:
+            waiter = (loop, loop.create_future()) if loop else None
+            value, flight, leader, refresh = self._begin(key, waiter)
+            if flight is None:
+                found[key] = value
+            elif refresh:
+                found[key] = value
+                refreshing[key] = flight
+            elif leader:
+                leading[key] = flight
+            else:
+                waiting[key] = (flight, waiter[1] if waiter else None)
+        return found, leading, waiting, refreshing
+
+    @staticmethod
+    def _collect(keys, found, leading, waiting):
+        flights = dict(leading, **{key: flight for key, (flight, _) in waiting.items()})
+        values = {}
+        for key in keys:
+            if key in found:
+                values[key] = found[key]
+            elif key in flights and flights[key].error is None and flights[key].value is not None:
+                values[key] = flights[key].value
+        return values
+
+    def _finish(self, key, flight):
+        with self._lock:
+            if flight.value is not None:
+                self._store(key, flight.value)
+            elif flight.error is None:
+                self._stats["errors"] += 1
+            self._inflight.pop(key, None)
+        flight.wake()
+
+    def _fail(self, flight, error):
+        flight.error = error
+        with self._lock:
+            self._stats["errors"] += 1
+
+    def _load(self, key, loader, flight):
+        try:
+            flight.value = loader(key)
+        except Exception as e:
+            self._fail(flight, e)
+            raise
+        finally:
+            self._finish(key, flight)
+        return flight.value
+
+    async def _load_async(self, key, loader, flight):
+        try:
+            flight.value = await loader(key)
+        except Exception as e:
+            self._fail(flight, e)
+            raise
+        finally:
+            self._finish(key, flight)
+        return flight.value
+
+    def _load_many(self, flights, loader):
+        try:
+            values = loader(list(flights))
+        except Exception as e:
+            for flight in flights.values():
+                self._fail(flight, e)
+            raise
+        else:
+            for key, flight in flights.items():
+                flight.value = values.get(key)
+        finally:
+            for key, flight in flights.items():
+                self._finish(key, flight)
+
+    async def _load_many_async(self, flights, loader):
+        try:
+            values = await loader(list(flights))
+        except Exception as e:
+            for flight in flights.values():
+                self._fail(flight, e)
+            raise
+        else:
+            for key, flight in flights.items():
+                flight.value = values.get(key)
+        finally:
+            for key, flight in flights.items():
+                self._finish(key, flight)
+
+    def _refresh_many(self, flights, loader):
+        try:
+            self._load_many(flights, loader)
+        except Exception as e:
+            print(f"[-] Background refresh failed for {', '.join(map(str, flights))}: {str(e)}")
+
+    async def _refresh_many_async(self, flights, loader):
+        try:
+            await self._load_many_async(flights, loader)
+        except Exception as e:
+            print(f"[-] Background refresh failed for {', '.join(map(str, flights))}: {str(e)}")
+
+    def _refresh(self, key, loader, flight):
+        try:
+            self._load(key, loader, flight)
+        except Exception as e:
+            print(f"[-] Background refresh failed for {key}: {str(e)}")
+
+    async def _refresh_async(self, key, loader, flight):
+        try:
+            await self._load_async(key, loader, flight)
+        except Exception as e:
+            print(f"[-] Background refresh failed for {key}: {str(e)}")
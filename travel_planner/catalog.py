@@ -0,0 +1,57 @@
+import threading
+from http_cache import EncodedPayload
+
+
+def build_location_list(locations_data):
+    """Destination names, as served by /api/locations"""
+    return list(locations_data.keys())
+
+
+def build_catalog(locations_data):
+    """Per-destination summary: coordinates, currency, season and budget tiers"""
+    catalog = []
+    for name, location in locations_data.items():
+        budget = location.get("budget", {})
+        catalog.append({
+            "name": name,
+            "coordinates": location.get("coordinates", {}),
+            "currency": location.get("currency"),
+            "language": location.get("language"),
+            "best_time_to_visit": location.get("best_time_to_visit"),
+            "budget": {
+                "low": budget.get("daily_budget_low"),
+                "mid": budget.get("daily_budget_mid"),
+                "high": budget.get("daily_budget_high"),
+                "currency": budget.get("currency")
+            }
+        })
+    return catalog
+
+
+CATALOG_BUILDERS = {
+    "locations": build_location_list,
+    "catalog": build_catalog
+}
+
+
+class CatalogCache:
+    """Catalog payloads serialized and compressed once per location snapshot"""
+
+    def __init__(self, builders=CATALOG_BUILDERS):
+        self.builders = builders
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self, snapshot, name):
+        """Return the EncodedPayload for name, rebuilding all payloads when the snapshot changed"""
+        entry = self._entry
+        if entry is None or entry[0] is not snapshot:
+            with self._lock:
+                entry = self._entry
+                if entry is None or entry[0] is not snapshot:
+                    payloads = {
+                        key: EncodedPayload.from_json(builder(snapshot.data))
+                        for key, builder in self.builders.items()
+                    }
+                    entry = self._entry = (snapshot, payloads)
+        return entry[1][name]
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+
+# Optional JSON file whose keyword lists extend the defaults below, e.g.
+# {"query_types": {"budget": ["fare"]}, "travel": ["cruise"], "casual": ["yo"]}
+QUERY_KEYWORDS_PATH = os.getenv("QUERY_KEYWORDS_PATH", "")
+
+# Keywords per query type, in tie-break order
+QUERY_TYPE_KEYWORDS = {
+    'itinerary': ['plan', 'itinerary', 'day trip', 'days', 'schedule', 'agenda', 'what should i do', 'what to do'],
+    'budget': ['budget', 'cost', 'price', 'expensive', 'how much', 'afford', 'spend', 'money'],
+    'attraction': ['attraction', 'visit', 'see', 'place', 'spot', 'museum', 'temple', 'church', 'monument', 'must-see', 'best places'],
+    'time': ['when', 'best time', 'season', 'weather', 'climate', 'rain', 'hot', 'cold', 'month'],
+    'practical': ['transport', 'getting around', 'taxi', 'train', 'bus', 'flight', 'food', 'eat', 'restaurant', 'language', 'culture', 'tip'],
+    'activity': ['adventure', 'relax', 'family', 'couple', 'solo', 'nightlife', 'beach', 'hiking', 'shopping', 'dining']
+}
+
+# Travel-related keywords; any match makes a message a travel query
+TRAVEL_KEYWORDS = [
+    'trip', 'visit', 'travel', 'plan', 'itinerary', 'day', 'days', 'budget', 'cost',
+    'attraction', 'hotel', 'restaurant', 'food', 'eat', 'transport', 'train',
+    'flight', 'taxi', 'bus', 'weather', 'season', 'when', 'where',
+    'what to do', 'what to see', 'best', 'place', 'places', 'activity', 'adventure',
+    'accommodation', 'stay', 'tour', 'guide', 'explore', 'discover',
+    'temple', 'museum', 'beach', 'mountain', 'culture', 'language',
+    'schedule', 'agenda', 'things to do', 'must see', 'must-see'
+]
+
+# Casual/greeting phrases, matched as the whole message or at its start/end
+CASUAL_PHRASES = [
+    'thank you', 'thanks', 'thx',
+    'hello', 'hi', 'hey',
+    'bye', 'goodbye', 'see you',
+    'ok', 'okay', 'sure', 'cool', 'nice', 'great', 'awesome',
+    'sorry', 'please',
+    'how are you', 'what\'s up',
+    'lol', 'haha'
+]
+
+
+class QueryClassifier:
+    """Classify a message's query type and travel/casual verdict in one scan.
+
+    All keywords are compiled into a single regex alternation anchored at
+    word starts. Each match reports the longest keyword at that position;
+    shorter keywords that are prefixes of it are derived from a table built
+    at construction, so overlapping keywords are counted as before.
+    """
+
+    def __init__(self, query_types, travel_keywords, casual_phrases):
+        self.query_types = {
+            query_type: list(dict.fromkeys(k.lower() for k in keywords))
+            for query_type, keywords in query_types.items()
+        }
+        self.travel_keywords = frozenset(k.lower() for k in travel_keywords)
+        self.casual_phrases = frozenset(k.lower() for k in casual_phrases)
+
+        self._types_by_keyword = {}
+        for query_type, keywords in self.query_types.items():
+            for keyword in keywords:
+                self._types_by_keyword.setdefault(keyword, []).append(query_type)
+
+        keywords = set(self._types_by_keyword) | self.travel_keywords | self.casual_phrases
+        ordered = sorted(keywords, key=len, reverse=True)
+        self._pattern = re.compile(r"(?=\b(" + "|".join(re.escape(k) for k in ordered) + "))")
+        self._prefixes = {k: [p for p in ordered if k.startswith(p)] for k in keywords}
+
+    def classify(self, user_message):
+        """Return (query_type, is_travel) for a message"""
+        text = user_message.lower().strip()
+        length = len(text)
+
+        scores = dict.fromkeys(self.query_types, 0)
+        seen = set()
+        has_travel_keyword = False
+        is_casual = False
+
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for keyword in self._prefixes[match.group(1)]:
+                if keyword in self.casual_phrases and not is_casual:
+                    end = start + len(keyword)
+                    if start == 0 and (end == length or text[end] == ' '):
+                        is_casual = True
+                    elif end == length and start > 0 and text[start - 1] == ' ':
+                        is_casual = True
+
+                if keyword in seen:
+                    continue
+                seen.add(keyword)
+
+                if keyword in self.travel_keywords:
+                    has_travel_keyword = True
+                for query_type in self._types_by_keyword.get(keyword, ()):
+                    scores[query_type] += 1
+
+        if not scores or max(scores.values()) == 0:
+            query_type = 'general'
+        else:
+            query_type = max(scores, key=scores.get)
+
+        return query_type, self._travel_verdict(length, is_casual, has_travel_keyword)
+
+    @staticmethod
+    def _travel_verdict(length, is_casual, has_travel_keyword):
+        # If message is too short and casual, it's not a travel query
+        if length < 5:
+            return False
+        # A casual phrase without travel keywords is redirected
+        if is_casual and not has_travel_keyword:
+            return False
+        if has_travel_keyword:
+            return True
+        # Very short messages (casual greeting length) are redirected
+        if length < 8:
+            return False
+        # Otherwise, let the LLM handle it
+        return True
+
+
+def load_keyword_config(path=QUERY_KEYWORDS_PATH):
+    """Return default keyword sets extended with any lists from a JSON file"""
+    query_types = {query_type: list(keywords) for query_type, keywords in QUERY_TYPE_KEYWORDS.items()}
+    travel = list(TRAVEL_KEYWORDS)
+    casual = list(CASUAL_PHRASES)
+
+    if path:
+        try:
+            with open(path, 'r') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[-] Could not load query keywords from {path}: {str(e)}")
+            config = {}
+
+        for query_type, keywords in config.get("query_types", {}).items():
+            query_types.setdefault(query_type, []).extend(keywords)
+        travel.extend(config.get("travel", []))
+        casual.extend(config.get("casual", []))
+
+    return query_types, travel, casual
+
+
+def build_classifier(path=QUERY_KEYWORDS_PATH):
+    """Compile a classifier from the default and configured keyword sets"""
+    return QueryClassifier(*load_keyword_config(path))
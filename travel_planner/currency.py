@@ -0,0 +1,79 @@
+import os
+import re
+from datetime import datetime
+import http_client
+from cache import TTLCache
+
+EXCHANGE_RATE_URL = os.getenv("EXCHANGE_RATE_URL", "https://api.exchangerate-api.com/v4/latest")
+# One rate table is downloaded per scrape for this base; other pairs are cross rates
+CURRENCY_BASE = os.getenv("CURRENCY_BASE", "USD")
+# Seconds the web app reuses the stored rate table before reading it again
+CURRENCY_RATES_TTL = int(os.getenv("CURRENCY_RATES_TTL", 3600))
+
+_rate_tables = TTLCache(ttl=CURRENCY_RATES_TTL, max_size=4)
+
+
+def currency_code(currency_text):
+    """Extract the ISO code from a field like "EUR (Euro)" """
+    match = re.match(r"\s*([A-Za-z]{3})\b", currency_text or "")
+    return match.group(1).upper() if match else None
+
+
+def rate_table_url(base=CURRENCY_BASE):
+    """URL of the exchange-rate table for one base currency"""
+    return f"{EXCHANGE_RATE_URL}/{base}"
+
+
+def fetch_rate_table(base=CURRENCY_BASE):
+    """Download the exchange-rate table for base, or return {} on failure"""
+    url = rate_table_url(base)
+    try:
+        response = http_client.get("exchangerate", url)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "base": data.get("base", base),
+            "rates": data.get("rates", {}),
+            "source_url": url,
+            "last_updated": datetime.now()
+        }
+    except Exception as e:
+        print(f"[-] Currency API error: {str(e)}")
+        return {}
+
+
+def load_stored_rate_table(base):
+    """Read the rate table the scraper stored for base, or {} if there is none"""
+    try:
+        from scraper import get_currency_rates_collection
+        return get_currency_rates_collection().find_one({"base": base}, {"_id": 0, "base": 1, "rates": 1}) or {}
+    except Exception as e:
+        print(f"[-] Could not read stored {base} exchange rates: {str(e)}")
+        return {}
+
+
+def get_rate_table(base=CURRENCY_BASE):
+    """Get the stored rate table for base, read at most every CURRENCY_RATES_TTL seconds.
+
+    A missing table is cached as {} too, so an unreachable store isn't
+    queried on every request.
+    """
+    return _rate_tables.get_or_load(base, load_stored_rate_table)
+
+
+def cross_rate(table, from_code, to_code):
+    """Units of to_code per one from_code, derived from a single-base table"""
+    rates = table.get("rates", {}) if table else {}
+    from_rate = rates.get(from_code.upper())
+    to_rate = rates.get(to_code.upper())
+    if not from_rate or to_rate is None:
+        return None
+    return to_rate / from_rate
+
+
+def convert(amount, from_code, to_code, table=None):
+    """Convert amount between currencies, or return None if a rate is unknown"""
+    if from_code.upper() == to_code.upper():
+        return amount
+    rate = cross_rate(table if table is not None else get_rate_table(), from_code, to_code)
+    return amount * rate if rate is not None else None
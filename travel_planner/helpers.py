@@ -1,30 +1,115 @@
-from groq import Groq
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import re
-import json
-import requests
 from datetime import datetime
 
+# Load .env before the local modules below read their settings
 load_dotenv()
 
-# Load locations from JSON file
+import http_client
+import metrics
+from cache import TTLCache
+from weather import fetch_weather_batch, OPEN_METEO_URL
+from prompts import PromptCache
+from repository import create_repository, JSONFileRepository
+from classifier import build_classifier
+from history import window_history, record_history_stats, has_prior_turns, get_history_stats
+from response_cache import create_response_cache, make_cache_key
+from sessions import create_session_store
+from scheduler import LLMScheduler, SchedulerRejected
+from llm import create_router, GroqProvider
+from catalog import CatalogCache
+from answers import answer_structured_query
+from precomputed import PrecomputedLookup, make_key, detect_tier, is_plain_request
+
+# Location data is served from an in-memory snapshot of the configured store
+# (LOCATION_STORE), swapped atomically when the store changes
+location_repository = create_repository()
+prompt_cache = PromptCache()
+# Serialized /api/locations and /api/catalog bodies, rebuilt per snapshot
+catalog_cache = CatalogCache()
+
+
+def _on_locations_changed(snapshot):
+    """Re-render the cached system prompts for a new location snapshot"""
+    prompt_cache.build(snapshot.data)
+
+# The first snapshot (and its prompts) is loaded on first use, not at import
+location_repository.subscribe(_on_locations_changed)
+
+
 def load_locations_from_json():
     """Load all locations from locations.json file"""
-    try:
-        with open('locations.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("[-] locations.json not found!")
-        return {}
+    return JSONFileRepository().load()
+
+
+def get_locations_data():
+    """Get all location documents from the current snapshot"""
+    return location_repository.snapshot().data
+
+
+def reload_locations():
+    """Reload location data now instead of waiting for the next change check"""
+    location_repository.refresh(force=True)
+    return get_locations_data()
+
+_groq_client = None
+_groq_client_lock = threading.Lock()
 
-locations_data = load_locations_from_json()
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+def get_groq_client():
+    """Get the Groq client, creating it on first use.
+
+    The groq SDK is imported here rather than at module level because it
+    dominates the import time of this module.
+    """
+    global _groq_client
+    if _groq_client is None:
+        with _groq_client_lock:
+            if _groq_client is None:
+                from groq import Groq
+                _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _groq_client
+
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.2-90b-text-preview")
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", 1024))
+
+# Picks the provider (LLM_PROVIDERS) and model (LLM_MODEL_ROUTES) for each chat request
+llm_router = create_router(GROQ_MODEL, {"groq": GroqProvider(get_groq_client)})
+
+# Every Groq call waits here for a concurrency slot and a rate-limit token
+llm_scheduler = LLMScheduler()
+# Hedged requests need a slot and token of their own, or are skipped
+llm_router.hedge_limiter = llm_scheduler
+# Sent instead of an error when a request isn't admitted in time
+BUSY_MESSAGE = "I'm getting a lot of questions right now. Please try again in a moment."
+
+# Keyword classifier compiled once at import (extend via QUERY_KEYWORDS_PATH)
+query_classifier = build_classifier()
 TEMPERATURE = float(os.getenv("TEMPERATURE", 0.5))
 
+# Opt-in cache of LLM answers for history-free questions (RESPONSE_CACHE_BACKEND)
+response_cache = create_response_cache()
+
+# Server-side chat history for clients that send a session_id (SESSION_BACKEND)
+session_store = create_session_store()
+
+# Answers generated offline by batch_generate.py (PRECOMPUTED_PATH)
+precomputed_answers = PrecomputedLookup()
+
+# Weather cache settings (seconds); a stale TTL of 0 disables stale-while-revalidate
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", 600))
+WEATHER_CACHE_MAX_SIZE = int(os.getenv("WEATHER_CACHE_MAX_SIZE", 256))
+WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", 0))
+
+weather_cache = TTLCache(
+    ttl=WEATHER_CACHE_TTL,
+    max_size=WEATHER_CACHE_MAX_SIZE,
+    stale_ttl=WEATHER_CACHE_STALE_TTL
+)
+
 # Weather code descriptions
 WEATHER_CODES = {
     0: "Clear sky",
@@ -53,101 +138,191 @@ WEATHER_CODES = {
     99: "Thunderstorm with heavy hail"
 }
 
-def get_real_time_weather(location_name):
-    """Fetch real-time weather for a specific location"""
-    location = locations_data.get(location_name)
-    if not location:
+def get_location_coordinates(location_name):
+    """Get (location_key, latitude, longitude) for a location, or None"""
+    snapshot = location_repository.snapshot()
+    location_key = snapshot.index.resolve(location_name)
+    if not location_key:
         return None
-    
-    # Get coordinates from location data
-    coords = location.get("coordinates", {})
-    if not coords.get("latitude") or not coords.get("longitude"):
+    location = snapshot.data[location_key]
+
+    # Read straight from the snapshot's coordinate columns
+    latitude, longitude = location.latitude, location.longitude
+    if not latitude or not longitude:
         return None
+
+    return location_key, latitude, longitude
+
+
+# Current-weather fields requested from Open-Meteo
+WEATHER_FIELDS = "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,weather_code,is_day"
+
+
+def build_weather_url(lat, lon):
+    """Build the Open-Meteo current-weather URL for a coordinate"""
+    # Open-Meteo API is free, no API key needed
+    return f"{OPEN_METEO_URL}?latitude={lat}&longitude={lon}&current={WEATHER_FIELDS}"
+
+
+def parse_weather_response(location_key, data, lat, lon):
+    """Convert an Open-Meteo response into the weather payload served to clients"""
+    current = data.get("current", {})
+    weather_code = current.get("weather_code", 0)
     
-    lat = coords["latitude"]
-    lon = coords["longitude"]
+    return {
+        "location": location_key,
+        "temperature": current.get("temperature_2m", "N/A"),
+        "temperature_unit": data.get("current_units", {}).get("temperature_2m", "°C"),
+        "humidity": current.get("relative_humidity_2m", "N/A"),
+        "weather_description": WEATHER_CODES.get(weather_code, "Unknown"),
+        "weather_code": weather_code,
+        "wind_speed": current.get("wind_speed_10m", "N/A"),
+        "wind_unit": data.get("current_units", {}).get("wind_speed_10m", "km/h"),
+        "is_day": current.get("is_day", True),
+        "timezone": data.get("timezone", ""),
+        "timestamp": datetime.now().isoformat(),
+        "coordinates": {
+            "latitude": lat,
+            "longitude": lon
+        }
+    }
+
+
+def get_real_time_weather(location_name):
+    """Fetch real-time weather for a specific location"""
+    resolved = get_location_coordinates(location_name)
+    if not resolved:
+        return None
+    location_key, lat, lon = resolved
     
     try:
-        # Fetch current weather from Open-Meteo API (free, no API key needed)
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,weather_code,is_day"
-        
-        response = requests.get(weather_url, timeout=5)
+        response = http_client.get("open-meteo", build_weather_url(lat, lon), deadline=http_client.request_deadline())
         response.raise_for_status()
-        data = response.json()
-        
-        current = data.get("current", {})
-        weather_code = current.get("weather_code", 0)
-        
-        weather_info = {
-            "location": location_name,
-            "temperature": current.get("temperature_2m", "N/A"),
-            "temperature_unit": data.get("current_units", {}).get("temperature_2m", "°C"),
-            "humidity": current.get("relative_humidity_2m", "N/A"),
-            "weather_description": WEATHER_CODES.get(weather_code, "Unknown"),
-            "weather_code": weather_code,
-            "wind_speed": current.get("wind_speed_10m", "N/A"),
-            "wind_unit": data.get("current_units", {}).get("wind_speed_10m", "km/h"),
-            "is_day": current.get("is_day", True),
-            "timezone": data.get("timezone", ""),
-            "timestamp": datetime.now().isoformat(),
-            "coordinates": {
-                "latitude": lat,
-                "longitude": lon
-            }
-        }
-        
-        return weather_info
+        return parse_weather_response(location_key, response.json(), lat, lon)
     except Exception as e:
-        print(f"[-] Weather API error for {location_name}: {str(e)}")
+        print(f"[-] Weather API error for {location_key}: {str(e)}")
+        return None
+
+
+def get_cached_weather(location_name):
+    """Get weather through the in-process cache, coalescing concurrent misses"""
+    location_key = resolve_location(location_name)
+    if not location_key:
         return None
+    return weather_cache.get_or_load(location_key, get_real_time_weather)
+
+
+def get_real_time_weather_batch(location_names):
+    """Fetch real-time weather for several locations with one Open-Meteo request per batch"""
+    resolved = [coords for coords in map(get_location_coordinates, location_names) if coords]
+    responses = fetch_weather_batch(
+        [(lat, lon) for _, lat, lon in resolved], WEATHER_FIELDS, deadline=http_client.request_deadline()
+    )
+    return {
+        location_key: parse_weather_response(location_key, data, lat, lon)
+        for (location_key, lat, lon), data in zip(resolved, responses)
+        if data is not None
+    }
+
+
+def resolve_locations(location_names):
+    """Resolve several names; returns (unique location keys, unresolved names)"""
+    location_keys = []
+    unknown = []
+    for name in location_names:
+        location_key = resolve_location(name)
+        if not location_key:
+            unknown.append(name)
+        elif location_key not in location_keys:
+            location_keys.append(location_key)
+    return location_keys, unknown
+
+
+def get_cached_weather_batch(location_names):
+    """Get weather for several locations, fetching all cache misses in one batch.
+
+    Misses are coalesced per location with concurrent single and batch
+    lookups, and stale readings are served while one batch refreshes them.
+    Returns ({location_key: weather}, [unresolved names]).
+    """
+    location_keys, unknown = resolve_locations(location_names)
+    return weather_cache.get_or_load_many(location_keys, get_real_time_weather_batch), unknown
+
+
+def get_cache_stats():
+    """Get hit/miss/stale counters for the server-side caches"""
+    stats = {"weather": weather_cache.stats()}
+    if response_cache:
+        stats["responses"] = response_cache.stats()
+    stats["sessions"] = session_store.stats()
+    if precomputed_answers.store() is not None:
+        stats["precomputed"] = precomputed_answers.store().stats()
+    return stats
+
+
+def collect_metrics():
+    """Export cache, history-window and upstream retry counters for /metrics"""
+    families = []
+    cache_events = []
+    cache_sizes = []
+    for cache_name, stats in get_cache_stats().items():
+        for event in ("hits", "misses", "stale", "coalesced", "bypassed", "stores", "evictions", "expired",
+                      "compactions", "errors"):
+            if event in stats:
+                cache_events.append(({"cache": cache_name, "event": event}, stats[event]))
+        if "size" in stats:
+            cache_sizes.append(({"cache": cache_name}, stats["size"]))
+    families.append(("travel_cache_events_total", "counter", "Cache lookups, stores and evictions", cache_events))
+    families.append(("travel_cache_entries", "gauge", "Entries currently cached", cache_sizes))
+
+    history = get_history_stats()
+    families.append(("travel_history_tokens_total", "counter", "Estimated history tokens before and after windowing", [
+        ({"kind": "original"}, history["original_tokens"]),
+        ({"kind": "sent"}, history["sent_tokens"])
+    ]))
+    families.append(("travel_history_dropped_turns_total", "counter", "History turns dropped or summarized",
+                     [({}, history["dropped_turns"])]))
+
+    scheduler = llm_scheduler.stats()
+    families.append(("travel_llm_queue_depth", "gauge", "Chat requests waiting for an LLM slot",
+                     [({}, scheduler["queued"])]))
+    families.append(("travel_llm_active_requests", "gauge", "LLM calls in flight",
+                     [({}, scheduler["active"])]))
+
+    families.append(("travel_llm_latency_seconds", "gauge", "Rolling LLM latency quantiles used for routing", [
+        ({"provider": provider, "model": model, "kind": kind, "quantile": name}, window[name])
+        for (provider, model, kind), window in sorted(llm_router.latencies.stats().items())
+        for name in ("p50", "p95")
+    ]))
+
+    upstream = http_client.get_upstream_stats()
+    families.append(("travel_upstream_retries_total", "counter", "Outbound calls retried after a failure",
+                     [({"provider": name}, stats["retries"]) for name, stats in upstream.items()]))
+    return families
+
+metrics.register_collector(collect_metrics)
+
+
+def resolve_location(location_name):
+    """Resolve a user-supplied name or alias to its location key"""
+    return location_repository.snapshot().index.resolve(location_name)
 
 
 def get_location_context(location_name):
     """Fetch location data from JSON file"""
-    # Search case-insensitively through locations
-    for location_key, location_doc in locations_data.items():
-        if location_key.lower() == location_name.lower():
-            return location_doc
-    return None
+    snapshot = location_repository.snapshot()
+    location_key = snapshot.index.resolve(location_name)
+    return snapshot.data.get(location_key) if location_key else None
+
+
+def classify_query(user_message):
+    """Return (query_type, is_travel) for a message from a single keyword scan"""
+    return query_classifier.classify(user_message)
 
 
 def analyze_query_type(user_message):
     """Analyze user message to determine query type"""
-    message_lower = user_message.lower()
-    
-    # Itinerary patterns
-    itinerary_keywords = ['plan', 'itinerary', 'day trip', 'days', 'schedule', 'agenda', 'what should i do', 'what to do']
-    
-    # Budget patterns
-    budget_keywords = ['budget', 'cost', 'price', 'expensive', 'how much', 'afford', 'spend', 'money']
-    
-    # Attraction patterns
-    attraction_keywords = ['attraction', 'visit', 'see', 'place', 'spot', 'museum', 'temple', 'church', 'monument', 'must-see', 'best places']
-    
-    # Time patterns
-    time_keywords = ['when', 'best time', 'season', 'weather', 'climate', 'rain', 'hot', 'cold', 'month']
-    
-    # Practical patterns
-    practical_keywords = ['transport', 'getting around', 'taxi', 'train', 'bus', 'flight', 'food', 'eat', 'restaurant', 'language', 'culture', 'tip']
-    
-    # Activity patterns
-    activity_keywords = ['adventure', 'relax', 'family', 'couple', 'solo', 'nightlife', 'beach', 'hiking', 'shopping', 'dining']
-    
-    # Count matching keywords
-    query_scores = {
-        'itinerary': sum(1 for keyword in itinerary_keywords if keyword in message_lower),
-        'budget': sum(1 for keyword in budget_keywords if keyword in message_lower),
-        'attraction': sum(1 for keyword in attraction_keywords if keyword in message_lower),
-        'time': sum(1 for keyword in time_keywords if keyword in message_lower),
-        'practical': sum(1 for keyword in practical_keywords if keyword in message_lower),
-        'activity': sum(1 for keyword in activity_keywords if keyword in message_lower)
-    }
-    
-    # Return most likely query type
-    if max(query_scores.values()) == 0:
-        return 'general'
-    
-    return max(query_scores, key=query_scores.get)
+    return classify_query(user_message)[0]
 
 
 def extract_duration(user_message):
@@ -161,57 +336,7 @@ def extract_duration(user_message):
 
 def is_travel_query(user_message):
     """Check if message is travel-related or casual/greeting"""
-    message_lower = user_message.lower().strip()
-    
-    # If message is too short and casual, it's not a travel query
-    if len(message_lower) < 5:
-        return False
-    
-    # Casual/greeting phrases that should be redirected (exact matches or at start/end)
-    casual_phrases = [
-        'thank you', 'thanks', 'thx',
-        'hello', 'hi', 'hey', 
-        'bye', 'goodbye', 'see you', 
-        'ok', 'okay', 'sure', 'cool', 'nice', 'great', 'awesome',
-        'sorry', 'please',
-        'how are you', 'what\'s up',
-        'lol', 'haha'
-    ]
-    
-    # Travel-related keywords that MUST be present
-    travel_keywords = [
-        'trip', 'visit', 'travel', 'plan', 'itinerary', 'day', 'days', 'budget', 'cost',
-        'attraction', 'hotel', 'restaurant', 'food', 'eat', 'transport', 'train',
-        'flight', 'taxi', 'bus', 'weather', 'season', 'when', 'where',
-        'what to do', 'what to see', 'best', 'place', 'places', 'activity', 'adventure',
-        'accommodation', 'stay', 'tour', 'guide', 'explore', 'discover',
-        'temple', 'museum', 'beach', 'mountain', 'culture', 'language',
-        'itinerary', 'schedule', 'agenda', 'things to do', 'must see', 'must-see'
-    ]
-    
-    # Check if message matches casual phrases
-    is_casual = any(message_lower == phrase or 
-                   message_lower.startswith(phrase + ' ') or 
-                   message_lower.endswith(' ' + phrase)
-                   for phrase in casual_phrases)
-    
-    # Check if message contains travel keywords
-    has_travel_keyword = any(keyword in message_lower for keyword in travel_keywords)
-    
-    # If it's a casual phrase without travel keywords, reject it
-    if is_casual and not has_travel_keyword:
-        return False
-    
-    # If it has travel keywords, accept it
-    if has_travel_keyword:
-        return True
-    
-    # If message is very short (casual greeting length), reject
-    if len(message_lower) < 8 and not has_travel_keyword:
-        return False
-    
-    # Otherwise, let LLM handle it
-    return True
+    return classify_query(user_message)[1]
 
 
 def get_redirect_message(location, user_message):
@@ -235,217 +360,235 @@ def get_redirect_message(location, user_message):
 
 def build_system_prompt(location_context):
     """Build system prompt with location data and structured output format"""
-    if location_context:
-        attractions = "\n".join([f"- {a['name']}: {a['description']} (Rating: {a.get('rating', 'N/A')})" 
-                                for a in location_context.get("attractions", [])])
-        tips = "\n".join([f"- {tip}" for tip in location_context.get("tips", [])])
-        budget_info = location_context.get("budget", {})
-        
-        budget_text = f"""
-BUDGET REFERENCE FOR {location_context.get('location', '').upper()}:
-- Budget Low: ${budget_info.get('daily_budget_low', 'N/A')}/day (hostels, street food, free attractions)
-- Budget Mid: ${budget_info.get('daily_budget_mid', 'N/A')}/day (mid-range hotels, local restaurants, paid attractions)
-- Budget High: ${budget_info.get('daily_budget_high', 'N/A')}/day (luxury hotels, fine dining, premium experiences)
-- Notes: {budget_info.get('notes', 'N/A')}
-"""
-        
-        return f"""You are a professional TRAVEL PLANNING ASSISTANT SPECIALIZED IN {location_context.get('location', '').upper()}.
-
-IMPORTANT BEHAVIOR RULES:
-1. NEVER respond to casual greetings like "thanks", "hi", "hello", "ok", "cool"
-2. NEVER say things like "You're welcome!" or "Can I help with anything else?"
-3. NEVER engage in chitchat or small talk
-4. ALWAYS redirect non-travel messages back to travel planning
-5. FOCUS EXCLUSIVELY on travel-related assistance for {location_context.get('location', '')}
-
-IF USER SENDS CASUAL MESSAGE (thanks, hello, hi, ok, great, cool, etc.):
-RESPOND WITH: "I'm here to help you plan your {location_context.get('location', '')} trip! What would you like to know? I can help with itineraries, budgets, attractions, and travel tips."
-
-IF USER SENDS OFF-TOPIC MESSAGE:
-RESPOND WITH: "Let's focus on your {location_context.get('location', '')} trip! What aspect would you like help with? Itinerary planning, budget, attractions, or practical travel tips?"
-
-ONLY provide detailed responses to ACTUAL TRAVEL QUERIES.
-
-{location_context.get('location', '').upper()} EXPERTISE:
-
-Location: {location_context.get('location', '')}
-
-ATTRACTIONS IN {location_context.get('location', '').upper()}:
-{attractions}
-
-TRAVEL TIPS FOR {location_context.get('location', '').upper()}:
-{tips}
-
-LOCATION FACTS:
-- Best Time to Visit: {location_context.get('best_time_to_visit', 'N/A')}
-- Currency: {location_context.get('currency', 'N/A')}
-- Language: {location_context.get('language', 'N/A')}
-
-{budget_text}
-
-YOUR RESPONSIBILITIES:
-1. ANALYZE the user's query carefully
-2. IF NOT TRAVEL-RELATED: Redirect politely to travel planning
-3. IF TRAVEL-RELATED: Provide detailed, structured information
-4. PROVIDE specific details from the location database
-5. FORMAT all responses using structured lists
-
-QUERY TYPE HANDLING:
-
-TYPE 1: ITINERARY REQUEST (keywords: plan, itinerary, days, schedule, what to do)
-ACTION: Create day-by-day itinerary
-FORMAT:
-Day 1: [Title describing main theme/focus]
-- Morning (8:00 AM): [Specific attraction/activity with brief description]
-- Afternoon (1:00 PM): [Specific attraction/activity with brief description]
-- Evening (6:00 PM): [Specific attraction/activity with brief description]
-- Meals: [Suggested cuisine type or restaurant style]
-- Day total cost: $XX-YY
-
-TYPE 2: BUDGET QUESTION (keywords: budget, cost, price, how much, expensive)
-ACTION: Provide detailed cost breakdown
-FORMAT:
-Budget Analysis for [number] Days in {location_context.get('location', '')}:
-- Accommodation: $XX/night × [days] = $XXX total
-- Food: $XX/day × [days] = $XXX total
-- Transportation: $XX/day × [days] = $XXX total
-- Activities: $XX/day × [days] = $XXX total
-- TOTAL ESTIMATED COST: $XXX-XXX
-
-Budget Tips:
-- [Money-saving tip 1]
-- [Money-saving tip 2]
-
-TYPE 3: ATTRACTION QUESTION (keywords: attraction, visit, place, spot, must-see, best places)
-ACTION: Describe attractions with practical details
-FORMAT:
-[Attraction Name]:
-- What: Brief description of what it is
-- Why Visit: Why it's worth going
-- Best Time: When to visit (time of day/season)
-- Duration: How long to spend (XX minutes/hours)
-- Cost: Entry fee or price range ($XX)
-- Accessibility: How to get there
-- Insider Tip: One practical advice for visiting
-
-TYPE 4: TIME/SEASON QUESTION (keywords: when, best time, season, weather, climate)
-ACTION: Explain seasonal information
-FORMAT:
-Best Time to Visit {location_context.get('location', '')}:
-- Ideal Season: [Season name and months]
-  Weather: [Description]
-  Crowds: [Crowd level]
-  Price: [Relative cost]
-  Why Visit: [Reasons]
-
-- Alternative Season: [Season name and months]
-  Weather: [Description]
-  Avoid: [Why to avoid if applicable]
-
-TYPE 5: PRACTICAL QUESTION (keywords: transport, food, language, culture, tips)
-ACTION: Provide practical travel information
-FORMAT:
-[Topic - e.g., Transportation/Food/Language]:
-- [Specific advice 1]: [Details]
-- [Specific advice 2]: [Details]
-- [Specific advice 3]: [Details]
-
-Important Notes:
-- [Key practical tip]
-- [Safety or cultural consideration]
-
-TYPE 6: ACTIVITY/INTEREST QUESTION (keywords: adventure, relax, family, couple, beach, hiking)
-ACTION: Recommend activities matching interests
-FORMAT:
-[Interest Type] Activities in {location_context.get('location', '')}:
-- [Activity 1]: [Description, duration, cost, location]
-- [Activity 2]: [Description, duration, cost, location]
-- [Activity 3]: [Description, duration, cost, location]
-
-CRITICAL FORMATTING RULES:
-1. ALWAYS use headers with colons (Day 1:, Accommodation:, Attraction Name:)
-2. ALWAYS use bullet points with hyphens (-) for lists
-3. ALWAYS include specific numbers (prices, times, ratings, distances)
-4. KEEP bullet points short (1-2 lines maximum)
-5. SEPARATE sections with blank lines
-6. NEVER write long paragraphs - use structured lists only
-7. REFERENCE attractions from the database provided above
-8. INCLUDE costs in the specified currency ({location_context.get('currency', 'USD')})
-9. PROVIDE estimated duration for each activity
-10. ASK clarifying questions if details are missing (number of days, budget level, travel style)
-
-WHEN TO ASK CLARIFYING QUESTIONS:
-- If itinerary request doesn't specify number of days: "How many days will you be in {location_context.get('location', '')}?"
-- If budget question doesn't specify duration: "How many days are you planning to stay?"
-- If activity question doesn't specify interest type: "What type of activities interest you? (adventure, relaxation, culture, family-friendly, etc.)"
-- If query is vague: Ask for 1-2 clarifying details, then provide response
-
-RESPONSE QUALITY CHECKLIST:
-✓ Matches user's query type exactly
-✓ Uses only attractions from the database
-✓ Includes specific numbers and costs
-✓ Formatted with headers and bullet points
-✓ Practical and actionable information
-✓ Appropriate for {location_context.get('location', '')} specifically
-✓ No generic travel advice - only {location_context.get('location', '')}-specific
-
-Be professional, helpful, and SPECIFIC to {location_context.get('location', '')}. 
-Never provide generic travel advice. Always reference the location database."""
-    else:
-        return """You are a professional TRAVEL PLANNING ASSISTANT.
+    return prompt_cache.get(location_context)
+
+
+def build_chat_messages(user_message, location_context, conversation_history):
+    """Build the message list sent to Groq"""
+    system_prompt = build_system_prompt(location_context)
+
+    history, history_stats = window_history(conversation_history, user_message)
+    record_history_stats(history_stats)
+
+    messages = [{"role": "user", "content": msg} for msg in history]
+    messages.append({"role": "user", "content": user_message})
+    return [{"role": "system", "content": system_prompt}] + messages
 
-ANALYZE USER QUERIES and respond with appropriate travel information.
 
-QUERY TYPES:
-- Itinerary: Create day-by-day plans
-- Budget: Provide cost breakdowns
-- Attractions: Describe places to visit
-- Best Time: Explain seasonal info
-- Practical: Give travel logistics advice
-- Activities: Recommend based on interests
+def get_response_cache_key(user_message, location_context, conversation_history, query_type):
+    """Get the response cache key for a message, or None if it must not be cached"""
+    if not response_cache:
+        return None
+    if has_prior_turns(conversation_history, user_message):
+        response_cache.record_bypass()
+        return None
 
-RESPONSE FORMAT:
-[Header]:
-- Item 1: Details
-- Item 2: Details
+    location_name = location_context.get('location') if location_context else None
+    return make_cache_key(
+        location_name,
+        query_type,
+        extract_duration(user_message),
+        user_message,
+        llm_router.model_for(query_type),
+        build_system_prompt(location_context)
+    )
 
-RULES:
-1. Use headers with colons
-2. Use bullet points with hyphens
-3. Include specific numbers
-4. Keep items short (max 2 lines)
-5. Never write paragraphs
-6. Ask clarifying questions if needed
 
-Be professional and helpful."""
+def get_precomputed_answer(user_message, location_context, conversation_history, query_type):
+    """Look up a batch-generated answer for a plain, history-free request, or None"""
+    if not location_context or precomputed_answers.store() is None:
+        return None
+    location_name = location_context.get('location', "")
+    if has_prior_turns(conversation_history, user_message) or not is_plain_request(user_message, location_name):
+        return None
+    return precomputed_answers.get(make_key(
+        location_name,
+        query_type,
+        extract_duration(user_message),
+        detect_tier(user_message.lower()),
+        llm_router.model_for(query_type),
+        build_system_prompt(location_context)
+    ))
+
+
+def start_session_turn(session_id, location_name, user_message):
+    """Return a chat session's prior turns and record user_message as its newest turn"""
+    try:
+        return session_store.append_turn(session_id, location_name or "", user_message)
+    except Exception as e:
+        print(f"[-] Session store error: {str(e)}")
+        return []
+
 
+def prepare_chat(user_message, location_context, conversation_history):
+    """Answer a message locally where possible, otherwise build the LLM request.
 
-def chat_with_groq(user_message, location_context, conversation_history):
-    """Send message to Groq and get response"""
+    Returns (reply, messages, cache_key, query_type). reply is set for
+    redirects, rule-based and precomputed answers and response cache hits; otherwise messages
+    is the LLM request and cache_key, if not None, is where to store the answer.
+    """
+    with metrics.STAGE_SECONDS.time(stage="classify"):
+        query_type, is_travel = classify_query(user_message)
 
     # Check if it's a travel-related query
-    if not is_travel_query(user_message):
+    if not is_travel:
         # Return redirect message instead of calling LLM
+        metrics.CHAT_MESSAGES.inc(served_by="redirect")
         location_name = location_context.get('location') if location_context else None
-        return get_redirect_message(location_name, user_message)
+        return get_redirect_message(location_name, user_message), None, None, query_type
+
+    # Budget, best-time, currency and language questions answered from data
+    with metrics.STAGE_SECONDS.time(stage="rules"):
+        fast_answer = answer_structured_query(
+            user_message,
+            location_context,
+            query_type,
+            extract_duration(user_message),
+            get_locations_data().keys()
+        )
+    if fast_answer is not None:
+        metrics.CHAT_MESSAGES.inc(served_by="rules")
+        return fast_answer, None, None, query_type
 
-    system_prompt = build_system_prompt(location_context)
-    
-    messages = [{"role": "user", "content": msg} for msg in conversation_history]
-    messages.append({"role": "user", "content": user_message})
+    # Common itineraries generated ahead of time by batch_generate.py
+    with metrics.STAGE_SECONDS.time(stage="precomputed"):
+        precomputed = get_precomputed_answer(user_message, location_context, conversation_history, query_type)
+    if precomputed is not None:
+        metrics.CHAT_MESSAGES.inc(served_by="precomputed")
+        return precomputed, None, None, query_type
+
+    with metrics.STAGE_SECONDS.time(stage="response_cache"):
+        cache_key = get_response_cache_key(user_message, location_context, conversation_history, query_type)
+        cached = response_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        metrics.CHAT_MESSAGES.inc(served_by="cache")
+        return cached, None, None, query_type
+
+    with metrics.STAGE_SECONDS.time(stage="build_messages"):
+        messages = build_chat_messages(user_message, location_context, conversation_history)
+    return None, messages, cache_key, query_type
+
+
+def store_chat_response(cache_key, content):
+    """Store a completed LLM answer in the response cache"""
+    if cache_key and content:
+        response_cache.set(cache_key, content)
+
+
+def stream_chunk_usage(chunk):
+    """Token usage carried by a streamed chunk (Groq sends it on the last one)"""
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+def record_llm_success(elapsed, usage, target):
+    """Record a completed LLM call: latency, token usage and an LLM-served message.
+
+    Per-provider latency and errors are recorded by the router for every attempt.
+    """
+    metrics.STAGE_SECONDS.observe(elapsed, stage="llm")
+    metrics.CHAT_MESSAGES.inc(served_by="llm")
+    metrics.record_llm_usage(target.model, usage)
+
+
+def record_llm_failure():
+    """Record a failed LLM call"""
+    metrics.CHAT_MESSAGES.inc(served_by="error")
+    metrics.ERRORS.inc(source="llm")
+
+
+def record_llm_rejected():
+    """Record a chat request the scheduler turned away (queue full or wait timed out)"""
+    metrics.CHAT_MESSAGES.inc(served_by="rejected")
+
+
+def chat_with_groq(user_message, location_context, conversation_history, client_id=None):
+    """Send message to Groq and get response"""
+    reply, messages, cache_key, query_type = prepare_chat(user_message, location_context, conversation_history)
+    if reply is not None:
+        return reply
     
-    try:
-        response = groq_client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "system", "content": system_prompt}] + messages,
+    started = None
+
+    def request():
+        # Timed from admission, so queueing shows up in the scheduler metrics only
+        nonlocal started
+        started = time.perf_counter()
+        return llm_router.create(
+            query_type,
+            messages=messages,
             max_tokens=MAX_TOKENS,
             temperature=0.3
         )
-        return response.choices[0].message.content
+
+    try:
+        with llm_scheduler.admit(client_id, request) as (response, target):
+            content = response.choices[0].message.content
+    except SchedulerRejected:
+        record_llm_rejected()
+        return BUSY_MESSAGE
     except Exception as e:
+        record_llm_failure()
         return f"Error: {str(e)}"
 
+    record_llm_success(time.perf_counter() - started, getattr(response, "usage", None), target)
+    store_chat_response(cache_key, content)
+    return content
+
+
+def stream_chat_with_groq(user_message, location_context, conversation_history, client_id=None):
+    """Send message to Groq and yield response text as tokens arrive"""
+    # Redirects and cached answers come back on the same path as a single chunk
+    reply, messages, cache_key, query_type = prepare_chat(user_message, location_context, conversation_history)
+    if reply is not None:
+        yield reply
+        return
+
+    parts = []
+    usage = None
+    started = None
+
+    def request():
+        nonlocal started
+        started = time.perf_counter()
+        return llm_router.create(
+            query_type,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=0.3,
+            stream=True
+        )
+
+    try:
+        # The slot is held until the stream ends or the client disconnects
+        with llm_scheduler.admit(client_id, request) as (stream, target):
+            for chunk in stream:
+                usage = stream_chunk_usage(chunk) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        metrics.STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+                    parts.append(delta)
+                    yield delta
+    except SchedulerRejected:
+        record_llm_rejected()
+        yield BUSY_MESSAGE
+        return
+    except Exception as e:
+        record_llm_failure()
+        yield f"Error: {str(e)}"
+        return
+
+    record_llm_success(time.perf_counter() - started, usage, target)
+    store_chat_response(cache_key, "".join(parts))
+
 
 def get_all_locations():
     """Get all available locations from JSON file"""
-    return list(locations_data.keys())
+    return list(get_locations_data().keys())
+
+
+def get_catalog_payload(name):
+    """Get a pre-serialized catalog payload ("locations" or "catalog") for the current data"""
+    return catalog_cache.get(location_repository.snapshot(), name)
@@ -0,0 +1,110 @@
+import os
+import threading
+
+# Token budget for prior conversation turns sent with each chat request
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+# Tokens reserved for a one-line summary of dropped turns; 0 just drops them
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", 100))
+SUMMARY_WORDS_PER_TURN = 12
+
+_totals = {
+    "requests": 0,
+    "original_tokens": 0,
+    "sent_tokens": 0,
+    "tokens_saved": 0,
+    "dropped_turns": 0,
+    "duplicates_removed": 0
+}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    """Fast local token estimate: about four characters per token"""
+    return max((len(text) + 3) // 4, len(text.split()))
+
+
+def summarize_turns(turns, token_budget):
+    """Compress dropped turns into one line within token_budget, newest kept first"""
+    prefix = "Earlier in this conversation I asked about: "
+    max_chars = token_budget * 4 - len(prefix)
+    snippets = []
+    length = 0
+
+    for turn in reversed(turns):
+        words = turn.split()
+        snippet = " ".join(words[:SUMMARY_WORDS_PER_TURN])
+        if len(words) > SUMMARY_WORDS_PER_TURN:
+            snippet += "..."
+        if length + len(snippet) + 2 > max_chars:
+            break
+        snippets.append(snippet)
+        length += len(snippet) + 2
+
+    if not snippets:
+        return None
+    return prefix + "; ".join(reversed(snippets))
+
+
+def has_prior_turns(conversation_history, user_message):
+    """Check whether history holds anything besides a copy of user_message"""
+    return any(
+        isinstance(turn, str) and turn.strip() and turn.strip() != user_message.strip()
+        for turn in conversation_history
+    )
+
+
+def window_history(conversation_history, user_message, token_budget=HISTORY_TOKEN_BUDGET):
+    """Fit prior turns into token_budget, newest first.
+
+    Drops a trailing copy of user_message (older clients send the current
+    message in the history too) and replaces turns that no longer fit with a
+    short summary. Returns (history, stats).
+    """
+    history = [turn for turn in conversation_history if isinstance(turn, str) and turn.strip()]
+    original_tokens = sum(estimate_tokens(turn) for turn in history)
+
+    duplicate = bool(history) and history[-1].strip() == user_message.strip()
+    if duplicate:
+        history = history[:-1]
+
+    costs = [estimate_tokens(turn) for turn in history]
+    if sum(costs) <= token_budget:
+        kept, summary = history, None
+    else:
+        summary_budget = min(HISTORY_SUMMARY_TOKENS, token_budget // 5)
+        available = token_budget - summary_budget
+        used = 0
+        count = 0
+        for cost in reversed(costs):
+            if used + cost > available:
+                break
+            used += cost
+            count += 1
+        kept = history[len(history) - count:] if count else []
+        dropped = history[:len(history) - count]
+        summary = summarize_turns(dropped, summary_budget) if summary_budget else None
+
+    window = ([summary] if summary else []) + kept
+    sent_tokens = sum(estimate_tokens(turn) for turn in window)
+    stats = {
+        "original_tokens": original_tokens,
+        "sent_tokens": sent_tokens,
+        "tokens_saved": max(original_tokens - sent_tokens, 0),
+        "dropped_turns": len(history) - len(kept),
+        "duplicates_removed": int(duplicate)
+    }
+    return window, stats
+
+
+def record_history_stats(stats):
+    """Add one request's windowing stats to the running totals"""
+    with _totals_lock:
+        _totals["requests"] += 1
+        for key in ("original_tokens", "sent_tokens", "tokens_saved", "dropped_turns", "duplicates_removed"):
+            _totals[key] += stats[key]
+
+
+def get_history_stats():
+    """Return running totals for history windowing"""
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,135 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 512))
+# Cache-Control for fingerprinted static assets, whose URLs change with their content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Cache-Control for everything else served from here: always revalidate via ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class EncodedPayload:
+    """A response body serialized once, with its ETag and pre-compressed variants"""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        # Weak, so one tag covers the identity, gzip and brotli encodings
+        self.etag = f'W/"{self.digest}"'
+        self.encoded = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            self.encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(body)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(json.dumps(data, separators=(",", ":")).encode("utf-8"), "application/json")
+
+
+def select_encoding(accept_encoding, available):
+    """Pick the smallest acceptable encoding: br, then gzip, then identity"""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            quality = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    for coding in ("br", "gzip"):
+        if coding in available and (coding in accepted or "*" in accepted):
+            return coding
+    return "identity"
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == bare:
+            return True
+    return False
+
+
+def conditional_response(payload, request_headers, cache_control=REVALIDATE_CACHE_CONTROL):
+    """Return (status, body, headers) for payload, honouring If-None-Match and Accept-Encoding"""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request_headers.get("If-None-Match"), payload.etag):
+        return 304, b"", headers
+
+    encoding = select_encoding(request_headers.get("Accept-Encoding"), payload.encoded)
+    body = payload.encoded[encoding]
+    headers["Content-Type"] = payload.content_type
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return 200, body, headers
+
+
+class StaticAssets:
+    """Static files loaded and compressed once, addressable by fingerprinted names.
+
+    url("style.css") returns "/static/style.<digest>.css"; that name is
+    served with a year-long immutable Cache-Control, while the plain name
+    still works but must be revalidated.
+    """
+
+    def __init__(self, directory, url_prefix="/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self._assets = {}
+        self._fingerprinted = {}
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type == "application/javascript":
+                    content_type += "; charset=utf-8"
+                with open(path, "rb") as f:
+                    payload = EncodedPayload(f.read(), content_type)
+                self._assets[name] = payload
+                self._fingerprinted[self.fingerprinted_name(name, payload)] = payload
+
+    @staticmethod
+    def fingerprinted_name(name, payload):
+        stem, dot, extension = name.rpartition(".")
+        return f"{stem}.{payload.digest}.{extension}" if dot else f"{name}.{payload.digest}"
+
+    def url(self, name):
+        """URL of the fingerprinted copy of a static file"""
+        payload = self._assets.get(name)
+        if payload is None:
+            return f"{self.url_prefix}/{name}"
+        return f"{self.url_prefix}/{self.fingerprinted_name(name, payload)}"
+
+    def get(self, name):
+        """Return (payload, Cache-Control) for a requested file name, or (None, None)"""
+        payload = self._fingerprinted.get(name)
+        if payload is not None:
+            return payload, IMMUTABLE_CACHE_CONTROL
+        payload = self._assets.get(name)
+        if payload is not None:
+            return payload, REVALIDATE_CACHE_CONTROL
+        return None, None
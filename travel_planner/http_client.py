@@ -0,0 +1,205 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+# Connections kept open per upstream host; requests beyond this wait for a
+# free connection instead of opening new ones
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+# Base delay (seconds) for exponential backoff between retries
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", 0.3))
+# Overall seconds an upstream call made while serving a request may take,
+# retries and backoff included (see request_deadline()). The scraper isn't
+# bound by it and keeps the full retry budget.
+HTTP_REQUEST_DEADLINE = float(os.getenv("HTTP_REQUEST_DEADLINE", 5))
+
+# Per-upstream settings: public base URL, (connect, read) timeouts, retry
+# count, TLS verification. base_url_env names an optional override used to
+# point an upstream at a mirror or a local stub (see benchmarks/stubs.py).
+UPSTREAMS = {
+    "open-meteo": {
+        "base_url": "https://api.open-meteo.com", "base_url_env": "OPEN_METEO_BASE_URL",
+        "timeout": (3.05, 5), "retries": 2, "verify": True
+    },
+    "exchangerate": {
+        "base_url": "https://api.exchangerate-api.com", "base_url_env": "EXCHANGERATE_BASE_URL",
+        "timeout": (3.05, 10), "retries": 2, "verify": True
+    },
+    "aladhan": {
+        "base_url": "https://api.aladhan.com", "base_url_env": "ALADHAN_BASE_URL",
+        "timeout": (3.05, 10), "retries": 2, "verify": False
+    }
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_session():
+    """Get the shared keep-alive session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=len(UPSTREAMS),
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    pool_block=True
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def record(upstream, elapsed, error=False, retry=False):
+    """Record one upstream call's latency and outcome"""
+    metrics.UPSTREAM_SECONDS.observe(elapsed, provider=upstream, outcome="error" if error else "ok")
+    with _stats_lock:
+        stats = _stats.setdefault(upstream, {
+            "requests": 0,
+            "errors": 0,
+            "retries": 0,
+            "total_latency_s": 0.0,
+            "max_latency_s": 0.0
+        })
+        stats["requests"] += 1
+        stats["total_latency_s"] += elapsed
+        stats["max_latency_s"] = max(stats["max_latency_s"], elapsed)
+        if error:
+            stats["errors"] += 1
+        if retry:
+            stats["retries"] += 1
+
+
+def get_upstream_stats():
+    """Get per-upstream request counts, error counts and latencies"""
+    with _stats_lock:
+        snapshot = {upstream: dict(stats) for upstream, stats in _stats.items()}
+    for stats in snapshot.values():
+        stats["avg_latency_s"] = round(stats["total_latency_s"] / stats["requests"], 4) if stats["requests"] else 0.0
+        stats["total_latency_s"] = round(stats["total_latency_s"], 4)
+        stats["max_latency_s"] = round(stats["max_latency_s"], 4)
+    return snapshot
+
+
+def upstream_url(upstream, url):
+    """Rewrite url onto the upstream's overridden base URL, if one is configured"""
+    config = UPSTREAMS[upstream]
+    override = os.getenv(config["base_url_env"])
+    if override and url.startswith(config["base_url"]):
+        return override.rstrip("/") + url[len(config["base_url"]):]
+    return url
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, HTTP_RETRY_BACKOFF * (2 ** attempt))
+
+
+def request_deadline():
+    """Deadline for upstream calls made on the request path, as a time.monotonic() value"""
+    return time.monotonic() + HTTP_REQUEST_DEADLINE
+
+
+def _prepare(upstream, url):
+    """Resolve url and the per-upstream config for one call"""
+    return UPSTREAMS[upstream], upstream_url(upstream, url)
+
+
+def _attempt_timeout(upstream, timeout, deadline):
+    """(connect, read) timeout for the next attempt, shrunk to the time left before deadline"""
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError(f"{upstream} request deadline exceeded")
+    return tuple(min(part, remaining) for part in timeout)
+
+
+def _retry_delay(attempt, attempts, deadline):
+    """Backoff before the next attempt, or None if there are no attempts or no time left"""
+    if attempt >= attempts - 1:
+        return None
+    delay = backoff_delay(attempt)
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+
+def get(upstream, url, deadline=None, **kwargs):
+    """GET url through the shared session using the upstream's timeout and retry policy.
+
+    Connection errors, timeouts and retryable statuses (429/5xx) are retried
+    with jittered backoff. The last response is returned as-is, so callers
+    still use raise_for_status(); the last network error is re-raised.
+    With a deadline (see request_deadline()), timeouts shrink to fit and no
+    retry starts after it.
+    """
+    config, url = _prepare(upstream, url)
+    timeout = kwargs.pop("timeout", config["timeout"])
+    kwargs.setdefault("verify", config["verify"])
+    attempts = config["retries"] + 1
+    session = get_session()
+
+    for attempt in range(attempts):
+        kwargs["timeout"] = _attempt_timeout(upstream, timeout, deadline)
+        started = time.perf_counter()
+        try:
+            response = session.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            delay = _retry_delay(attempt, attempts, deadline)
+            record(upstream, time.perf_counter() - started, error=True, retry=delay is not None)
+            if delay is None:
+                raise
+        else:
+            failed = response.status_code >= 400
+            delay = _retry_delay(attempt, attempts, deadline) if response.status_code in RETRY_STATUSES else None
+            if delay is not None:
+                record(upstream, time.perf_counter() - started, error=True, retry=True)
+                response.close()
+            else:
+                record(upstream, time.perf_counter() - started, error=failed)
+                return response
+
+        time.sleep(delay)
+
+
+async def get_async(client, upstream, url, deadline=None):
+    """Async variant of get() over an httpx.AsyncClient, with the same timeout, retry and deadline policy"""
+    # httpx is only needed on the async serving path, so the scraper doesn't import it
+    import httpx
+
+    config, url = _prepare(upstream, url)
+    attempts = config["retries"] + 1
+
+    for attempt in range(attempts):
+        connect_timeout, read_timeout = _attempt_timeout(upstream, config["timeout"], deadline)
+        started = time.perf_counter()
+        try:
+            response = await client.get(url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+        except httpx.TransportError:
+            delay = _retry_delay(attempt, attempts, deadline)
+            record(upstream, time.perf_counter() - started, error=True, retry=delay is not None)
+            if delay is None:
+                raise
+        else:
+            failed = response.status_code >= 400
+            delay = _retry_delay(attempt, attempts, deadline) if response.status_code in RETRY_STATUSES else None
+            if delay is not None:
+                record(upstream, time.perf_counter() - started, error=True, retry=True)
+                await response.aclose()
+            else:
+                record(upstream, time.perf_counter() - started, error=failed)
+                return response
+
+        await asyncio.sleep(delay)
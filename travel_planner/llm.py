@@ -0,0 +1,590 @@
+import asyncio
+import inspect
+import json
+import os
+import random
+import threading
+import time
+import types
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import http_client
+import metrics
+from cache import run_in_background
+
+# Providers to route between, in order of preference while no latencies are known
+LLM_PROVIDERS = [name.strip() for name in os.getenv("LLM_PROVIDERS", "groq").split(",") if name.strip()]
+# Query type -> model, e.g. "general=llama-3.1-8b-instant,time=llama-3.1-8b-instant";
+# unlisted types use GROQ_MODEL
+LLM_MODEL_ROUTES = os.getenv("LLM_MODEL_ROUTES", "")
+# Latency samples kept per provider and model
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", 100))
+# Quantile that ranks providers: p50 or p95
+LLM_ROUTE_QUANTILE = os.getenv("LLM_ROUTE_QUANTILE", "p95")
+# Send a second request when the first hasn't answered after this many
+# milliseconds, or after the provider's rolling "p50"/"p95"; empty disables hedging
+LLM_HEDGE_AFTER = os.getenv("LLM_HEDGE_AFTER", "")
+# Share of requests sent to a provider other than the fastest, so its latencies stay current
+LLM_EXPLORE_RATE = float(os.getenv("LLM_EXPLORE_RATE", 0.05))
+# The canned "stub" provider is for offline benchmarks and tests only; it is
+# refused unless this is set, so real users never get its reply
+LLM_ALLOW_STUB = os.getenv("LLM_ALLOW_STUB", "0") == "1"
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", 200))
+# Second provider "openai": any OpenAI-compatible chat completions API
+# (OpenAI, Together, Fireworks, a vLLM server, ...). The base URL ends before
+# /chat/completions, e.g. https://api.openai.com/v1. LLM_OPENAI_MODEL
+# replaces the routed Groq model name; empty sends it unchanged.
+LLM_OPENAI_BASE_URL = os.getenv("LLM_OPENAI_BASE_URL", "")
+LLM_OPENAI_API_KEY = os.getenv("LLM_OPENAI_API_KEY", "")
+LLM_OPENAI_MODEL = os.getenv("LLM_OPENAI_MODEL", "")
+
+# Samples needed before a provider's quantiles are trusted
+MIN_SAMPLES = 5
+# Added to the latency recorded for a failed call, so failing providers rank last
+FAILURE_PENALTY_S = 30.0
+
+STUB_REPLY = (
+    "Day 1: Historic Center\n- Morning: Walking tour of the old town (9:00-12:00)\n"
+    "- Afternoon: Museum visit (13:00-16:00)\n- Evening: Dinner at a local bistro (19:00)\n"
+    "- Estimated cost: $80 - $120"
+)
+
+Target = namedtuple("Target", "provider model")
+QUANTILES = {"p50": 0.5, "p95": 0.95}
+
+
+def parse_hedge_after(value):
+    """Validate an LLM_HEDGE_AFTER value: "p50"/"p95", milliseconds, or empty (off).
+
+    Returns the quantile name, the delay in seconds, or None when hedging is off.
+    """
+    if value is None or isinstance(value, str) and not value.strip():
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value in QUANTILES:
+            return value
+    try:
+        delay = float(value) / 1000
+    except (TypeError, ValueError):
+        delay = -1.0
+    if not delay >= 0:
+        print(f"[-] Invalid LLM_HEDGE_AFTER '{value}' (use p50, p95 or milliseconds), hedging disabled")
+        return None
+    return delay
+
+
+def parse_model_routes(spec):
+    """Parse "query_type=model,..." into a dict"""
+    routes = {}
+    for pair in spec.split(","):
+        query_type, _, model = pair.partition("=")
+        if query_type.strip() and model.strip():
+            routes[query_type.strip()] = model.strip()
+    return routes
+
+
+class GroqProvider:
+    """Groq chat completions through the official SDK.
+
+    client_factory and async_client_factory return ready SDK clients; by
+    default the clients are created on first use from GROQ_API_KEY.
+    """
+
+    name = "groq"
+
+    def __init__(self, client_factory=None, async_client_factory=None):
+        self.client_factory = client_factory or self._default_client
+        self.async_client_factory = async_client_factory or self._default_async_client
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _default_client(self):
+        def build():
+            from groq import Groq
+            return Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._lazy("sync", build)
+
+    def _default_async_client(self):
+        def build():
+            from groq import AsyncGroq
+            return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._lazy("async", build)
+
+    def _lazy(self, kind, factory):
+        client = self._clients.get(kind)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(kind)
+                if client is None:
+                    client = self._clients[kind] = factory()
+        return client
+
+    def create(self, **kwargs):
+        return self.client_factory().chat.completions.create(**kwargs)
+
+    async def create_async(self, **kwargs):
+        return await self.async_client_factory().chat.completions.create(**kwargs)
+
+
+def _namespace(value):
+    """JSON -> attribute access, so responses read like the Groq SDK's objects"""
+    if isinstance(value, dict):
+        return types.SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+def _sse_data(line):
+    """Payload of one server-sent event line, or None for other lines and the [DONE] marker"""
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:"):].strip()
+    return None if data == "[DONE]" else json.loads(data)
+
+
+class ProviderHTTPError(Exception):
+    """Error status from an HTTP provider; status_code and response match the Groq SDK's
+    errors, so the scheduler treats a 429 the same way"""
+
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} from {response.request.url}")
+        self.status_code = response.status_code
+        self.response = response
+
+
+class OpenAICompatibleProvider:
+    """Chat completions from any OpenAI-compatible API over httpx.
+
+    client_factory and async_client_factory return httpx clients; by default
+    they are created on first use.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url=LLM_OPENAI_BASE_URL, api_key=LLM_OPENAI_API_KEY, model=LLM_OPENAI_MODEL,
+                 client_factory=None, async_client_factory=None):
+        if not base_url:
+            raise ValueError("LLM_OPENAI_BASE_URL is not set")
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.model = model
+        self.client_factory = client_factory or self._default_client
+        self.async_client_factory = async_client_factory or self._default_async_client
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _lazy(self, kind, factory):
+        client = self._clients.get(kind)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(kind)
+                if client is None:
+                    client = self._clients[kind] = factory()
+        return client
+
+    def _default_client(self):
+        import httpx
+        return self._lazy("sync", lambda: httpx.Client(timeout=httpx.Timeout(60.0, connect=5.0)))
+
+    def _default_async_client(self):
+        import httpx
+        return self._lazy("async", lambda: httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=5.0)))
+
+    def _request(self, model, messages, stream, kwargs):
+        return dict(kwargs, model=self.model or model, messages=messages, stream=stream)
+
+    def create(self, model, messages, stream=False, **kwargs):
+        client = self.client_factory()
+        request = client.build_request("POST", self.url, json=self._request(model, messages, stream, kwargs),
+                                       headers=self.headers)
+        response = client.send(request, stream=stream)
+        if response.status_code >= 400:
+            response.read()
+            response.close()
+            raise ProviderHTTPError(response)
+        if not stream:
+            return _namespace(response.json())
+        return self._chunks(response)
+
+    def _chunks(self, response):
+        try:
+            for line in response.iter_lines():
+                data = _sse_data(line)
+                if data is not None:
+                    yield _namespace(data)
+        finally:
+            response.close()
+
+    async def create_async(self, model, messages, stream=False, **kwargs):
+        client = self.async_client_factory()
+        request = client.build_request("POST", self.url, json=self._request(model, messages, stream, kwargs),
+                                       headers=self.headers)
+        response = await client.send(request, stream=stream)
+        if response.status_code >= 400:
+            await response.aread()
+            await response.aclose()
+            raise ProviderHTTPError(response)
+        if not stream:
+            return _namespace(response.json())
+        return self._chunks_async(response)
+
+    async def _chunks_async(self, response):
+        try:
+            async for line in response.aiter_lines():
+                data = _sse_data(line)
+                if data is not None:
+                    yield _namespace(data)
+        finally:
+            await response.aclose()
+
+
+class StubProvider:
+    """Canned local replies shaped like Groq responses, with configurable latency"""
+
+    name = "stub"
+
+    def __init__(self, latency_ms=LLM_STUB_LATENCY_MS, reply=STUB_REPLY):
+        self.latency_ms = latency_ms
+        self.reply = reply
+
+    def _delay(self):
+        return max(random.gauss(self.latency_ms, self.latency_ms / 5), 0.0) / 1000
+
+    def _usage(self, messages):
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(self.reply) // 4
+        return types.SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                     total_tokens=prompt_tokens + completion_tokens)
+
+    def _completion(self, model, messages):
+        message = types.SimpleNamespace(role="assistant", content=self.reply)
+        return types.SimpleNamespace(model=model, usage=self._usage(messages),
+                                     choices=[types.SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+    def _chunks(self, model, messages):
+        words = self.reply.split(" ")
+        for index, word in enumerate(words):
+            last = index == len(words) - 1
+            delta = types.SimpleNamespace(content=word if last else word + " ")
+            chunk = types.SimpleNamespace(model=model, usage=None, choices=[types.SimpleNamespace(index=0, delta=delta)])
+            if last:
+                chunk.x_groq = types.SimpleNamespace(usage=self._usage(messages))
+            yield chunk
+
+    async def _chunks_async(self, model, messages):
+        for chunk in self._chunks(model, messages):
+            yield chunk
+
+    def create(self, model, messages, stream=False, **kwargs):
+        time.sleep(self._delay())
+        return self._chunks(model, messages) if stream else self._completion(model, messages)
+
+    async def create_async(self, model, messages, stream=False, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._chunks_async(model, messages) if stream else self._completion(model, messages)
+
+
+PROVIDER_TYPES = {
+    "groq": GroqProvider,
+    "openai": OpenAICompatibleProvider,
+    "stub": StubProvider
+}
+
+
+def _pick(sorted_samples, fraction):
+    return sorted_samples[min(int(len(sorted_samples) * fraction), len(sorted_samples) - 1)]
+
+
+class LatencyTracker:
+    """Rolling latency windows per provider, model and call kind (complete or stream)"""
+
+    def __init__(self, window=LLM_LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, target, stream, seconds):
+        key = (target.provider, target.model, "stream" if stream else "complete")
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, target, stream, name):
+        """Rolling p50/p95 in seconds, or None with fewer than MIN_SAMPLES samples"""
+        key = (target.provider, target.model, "stream" if stream else "complete")
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return _pick(samples, QUANTILES[name])
+
+    def stats(self):
+        """Return {(provider, model, kind): {"samples", "p50", "p95"}}"""
+        with self._lock:
+            windows = {key: sorted(samples) for key, samples in self._samples.items()}
+        return {
+            key: dict({name: _pick(samples, fraction) for name, fraction in QUANTILES.items()}, samples=len(samples))
+            for key, samples in windows.items() if samples
+        }
+
+
+def _close(result):
+    """Close a losing streamed response so its connection is released"""
+    close = getattr(result, "close", None)
+    if close is not None and not inspect.iscoroutinefunction(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+async def _close_async(result):
+    close = getattr(result, "close", None) or getattr(result, "aclose", None)
+    if close is not None:
+        try:
+            closed = close()
+            if inspect.isawaitable(closed):
+                await closed
+        except Exception:
+            pass
+
+
+class LLMRouter:
+    """Chooses a provider and model per request and optionally hedges slow calls.
+
+    The model comes from the query type (LLM_MODEL_ROUTES). Providers are
+    ranked by their rolling p50/p95 for that model; ones with too few samples
+    are tried first. With hedging on, a second request goes to the next-best
+    provider (or the same one) once the first is slower than the threshold,
+    and the loser is cancelled. A hedge is a request of its own: it is only
+    sent when hedge_limiter (the LLMScheduler) has a free slot and rate token.
+    """
+
+    def __init__(self, providers, default_model, model_routes=LLM_MODEL_ROUTES, quantile=LLM_ROUTE_QUANTILE,
+                 hedge_after=LLM_HEDGE_AFTER, explore_rate=LLM_EXPLORE_RATE):
+        self.providers = providers
+        self.default_model = default_model
+        self.model_routes = parse_model_routes(model_routes) if isinstance(model_routes, str) else dict(model_routes)
+        self.quantile = quantile
+        self.hedge_after = parse_hedge_after(hedge_after)
+        self.explore_rate = explore_rate
+        # Object with try_acquire()/release() that hedges must get past; None lets every hedge through
+        self.hedge_limiter = None
+        self.latencies = LatencyTracker()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def model_for(self, query_type):
+        return self.model_routes.get(query_type, self.default_model)
+
+    def candidates(self, query_type, stream=False):
+        """Targets for a request, best first"""
+        model = self.model_for(query_type)
+        targets = [Target(name, model) for name in self.providers]
+
+        def score(target):
+            latency = self.latencies.quantile(target, stream, self.quantile)
+            return 0.0 if latency is None else latency
+
+        targets.sort(key=score)
+        if len(targets) > 1 and random.random() < self.explore_rate:
+            targets.insert(0, targets.pop(random.randrange(1, len(targets))))
+        return targets
+
+    def hedge_delay(self, target, stream):
+        """Seconds to wait before hedging a call to target, or None"""
+        if self.hedge_after is None:
+            return None
+        if self.hedge_after in QUANTILES:
+            return self.latencies.quantile(target, stream, self.hedge_after)
+        return self.hedge_after
+
+    def create(self, query_type, **kwargs):
+        """Run a chat completion on the best target; returns (response, target)"""
+        stream = bool(kwargs.get("stream"))
+        targets = self.candidates(query_type, stream)
+        primary = targets[0]
+        delay = self.hedge_delay(primary, stream)
+        if delay is None:
+            return self._attempt(primary, kwargs), primary
+        return self._hedged(primary, targets[1] if len(targets) > 1 else primary, delay, kwargs)
+
+    async def create_async(self, query_type, **kwargs):
+        """Async variant of create"""
+        stream = bool(kwargs.get("stream"))
+        targets = self.candidates(query_type, stream)
+        primary = targets[0]
+        delay = self.hedge_delay(primary, stream)
+        if delay is None:
+            return await self._attempt_async(primary, kwargs), primary
+        return await self._hedged_async(primary, targets[1] if len(targets) > 1 else primary, delay, kwargs)
+
+    def stats(self):
+        return {
+            "providers": list(self.providers),
+            "default_model": self.default_model,
+            "model_routes": dict(self.model_routes),
+            "hedge_after": self.hedge_after,
+            "latency": [
+                {"provider": provider, "model": model, "kind": kind, **window}
+                for (provider, model, kind), window in sorted(self.latencies.stats().items())
+            ]
+        }
+
+    def _record(self, target, stream, elapsed, error=False):
+        self.latencies.observe(target, stream, elapsed + (FAILURE_PENALTY_S if error else 0.0))
+        http_client.record(target.provider, elapsed, error=error)
+        metrics.LLM_REQUESTS.inc(provider=target.provider, model=target.model, outcome="error" if error else "ok")
+
+    def _attempt(self, target, kwargs):
+        stream = bool(kwargs.get("stream"))
+        started = time.perf_counter()
+        try:
+            result = self.providers[target.provider].create(model=target.model, **kwargs)
+        except Exception:
+            self._record(target, stream, time.perf_counter() - started, error=True)
+            raise
+        self._record(target, stream, time.perf_counter() - started)
+        return result
+
+    async def _attempt_async(self, target, kwargs):
+        stream = bool(kwargs.get("stream"))
+        started = time.perf_counter()
+        try:
+            result = await self.providers[target.provider].create_async(model=target.model, **kwargs)
+        except asyncio.CancelledError:
+            # A cancelled hedge loser took at least this long; without a sample a
+            # slow primary would keep ranking first and never be measured
+            self.latencies.observe(target, stream, time.perf_counter() - started)
+            metrics.LLM_REQUESTS.inc(provider=target.provider, model=target.model, outcome="cancelled")
+            raise
+        except Exception:
+            self._record(target, stream, time.perf_counter() - started, error=True)
+            raise
+        self._record(target, stream, time.perf_counter() - started)
+        return result
+
+    def _acquire_hedge(self):
+        """Take a scheduler slot and token for a hedge without waiting; False skips the hedge"""
+        if self.hedge_limiter is not None and not self.hedge_limiter.try_acquire():
+            metrics.LLM_HEDGES.inc(event="skipped")
+            return False
+        metrics.LLM_HEDGES.inc(event="sent")
+        return True
+
+    def _release_hedge_when_done(self, attempts):
+        """Free the hedge's slot once both attempts have finished, since both are in flight until then"""
+        if self.hedge_limiter is None:
+            return
+        remaining = [len(attempts)]
+        lock = threading.Lock()
+
+        def finished(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                self.hedge_limiter.release()
+
+        for attempt in attempts:
+            attempt.add_done_callback(finished)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def _hedged(self, primary, secondary, delay, kwargs):
+        """Run primary; if it hasn't answered within delay, race secondary against it"""
+        executor = self._get_executor()
+        first = executor.submit(self._attempt, primary, kwargs)
+        futures = {first: primary}
+        done, _ = wait(futures, timeout=delay)
+        if not done and self._acquire_hedge():
+            futures[executor.submit(self._attempt, secondary, kwargs)] = secondary
+            self._release_hedge_when_done(list(futures))
+
+        pending = set(futures)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                # A blocking call can't be interrupted; close the loser's stream when it arrives
+                for loser in pending:
+                    loser.add_done_callback(lambda f: f.exception() is None and _close(f.result()))
+                for other in done - {future}:
+                    if other.exception() is None:
+                        _close(other.result())
+                if len(futures) > 1:
+                    metrics.LLM_HEDGES.inc(event="won" if future is not first else "lost")
+                return future.result(), futures[future]
+        raise error
+
+    async def _hedged_async(self, primary, secondary, delay, kwargs):
+        """Async variant of _hedged; the loser is cancelled"""
+        # Held until done, so a cancelled loser can finish unwinding after we return
+        first = run_in_background(self._attempt_async(primary, kwargs), f"LLM call to {primary.provider}")
+        tasks = {first: primary}
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if not done and self._acquire_hedge():
+                hedge = run_in_background(self._attempt_async(secondary, kwargs),
+                                          f"Hedged LLM call to {secondary.provider}")
+                tasks[hedge] = secondary
+                self._release_hedge_when_done(list(tasks))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    for other in done - {task}:
+                        if other.exception() is None:
+                            await _close_async(other.result())
+                    if len(tasks) > 1:
+                        metrics.LLM_HEDGES.inc(event="won" if task is not first else "lost")
+                    return task.result(), tasks[task]
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+def create_router(default_model, providers=None, names=None, allow_stub=LLM_ALLOW_STUB):
+    """Create a router over names (default LLM_PROVIDERS).
+
+    providers maps a provider name to a ready instance, overriding the
+    default construction from PROVIDER_TYPES. "stub" is skipped unless
+    allow_stub is set.
+    """
+    available = dict(providers or {})
+    selected = {}
+    for name in LLM_PROVIDERS if names is None else names:
+        if name == "stub" and not allow_stub:
+            print("[-] LLM provider 'stub' serves canned replies; set LLM_ALLOW_STUB=1 for benchmarks, skipping")
+        elif name in available:
+            selected[name] = available[name]
+        elif name in PROVIDER_TYPES:
+            try:
+                selected[name] = PROVIDER_TYPES[name]()
+            except ValueError as e:
+                print(f"[-] LLM provider '{name}' is not configured ({str(e)}), skipping")
+        else:
+            print(f"[-] Unknown LLM provider '{name}', skipping")
+    if not selected:
+        print("[-] No usable LLM_PROVIDERS, falling back to groq")
+        selected["groq"] = available.get("groq") or GroqProvider()
+    return LLMRouter(selected, default_model)
@@ -0,0 +1,84 @@
+import difflib
+import functools
+import re
+import unicodedata
+
+# Alternate names that should resolve to a destination in locations.json.
+# Location documents may add their own via an optional "aliases" list.
+LOCATION_ALIASES = {
+    "NYC": "New York",
+    "New York City": "New York",
+    "NY": "New York",
+    "Big Apple": "New York",
+    "Barca": "Barcelona",
+    "Roma": "Rome",
+    "Wien": "Vienna",
+    "Vegas": "Las Vegas",
+    "LV": "Las Vegas",
+    "Krung Thep": "Bangkok",
+    "BKK": "Bangkok",
+    "Constantinople": "Istanbul",
+    "Denpasar": "Bali",
+    "Ubud": "Bali",
+    "Dam": "Amsterdam",
+    "Tokio": "Tokyo",
+    "Londres": "London",
+    "SG": "Singapore"
+}
+
+# Close-match ratio (0-1) needed for the fuzzy fallback; 0 disables it
+FUZZY_CUTOFF = 0.8
+FUZZY_MEMO_SIZE = 1024
+# Only names this short and made of letters, spaces, '.', '-' and "'" are fuzzy matched
+FUZZY_MAX_LENGTH = 64
+_FUZZY_INPUT = re.compile(r"[a-z][a-z .'-]*")
+
+
+def normalize_location_name(name):
+    """Casefold, strip accents and collapse whitespace in a location name"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class LocationIndex:
+    """Normalized name and alias lookup for the keys of locations_data"""
+
+    def __init__(self, locations_data, aliases=None, fuzzy_cutoff=FUZZY_CUTOFF):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        index = {}
+
+        for key, doc in locations_data.items():
+            index[normalize_location_name(key)] = key
+        for key, doc in locations_data.items():
+            for alias in doc.get("aliases", []):
+                index.setdefault(normalize_location_name(alias), key)
+        for alias, key in (LOCATION_ALIASES if aliases is None else aliases).items():
+            if key in locations_data:
+                index.setdefault(normalize_location_name(alias), key)
+
+        self._index = index
+        self._names = list(index)
+        self._closest = functools.lru_cache(maxsize=FUZZY_MEMO_SIZE)(self._closest_name)
+
+    def resolve(self, name):
+        """Return the canonical location key for name, or None"""
+        if not name:
+            return None
+
+        normalized = normalize_location_name(name)
+        key = self._index.get(normalized)
+        if key is not None or not self.fuzzy_cutoff:
+            return key
+
+        if len(normalized) > FUZZY_MAX_LENGTH or not _FUZZY_INPUT.fullmatch(normalized):
+            return None
+        return self._closest(normalized)
+
+    def _closest_name(self, normalized):
+        """Closest indexed name to normalized, memoized per index by an LRU"""
+        matches = difflib.get_close_matches(normalized, self._names, n=1, cutoff=self.fuzzy_cutoff)
+        return self._index[matches[0]] if matches else None
+
+    def __len__(self):
+        return len(self._index)
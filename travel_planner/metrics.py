@@ -0,0 +1,184 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets (seconds) for in-process stages and upstream calls
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts plus +Inf; made cumulative when rendered
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+_metrics = []
+_collectors = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector):
+    """Register collector() -> [(name, kind, help, [(labels dict, value)])], called on each scrape"""
+    _collectors.append(collector)
+
+
+def render():
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception as e:
+            print(f"[-] Metrics collector failed: {str(e)}")
+            continue
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                labelnames = tuple(labels)
+                lines.append(f"{name}{_format_labels(labelnames, [labels[n] for n in labelnames])} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = _register(Histogram(
+    "travel_http_request_duration_seconds", "Time to handle an HTTP request",
+    ("endpoint", "method", "status")
+))
+STAGE_SECONDS = _register(Histogram(
+    "travel_chat_stage_duration_seconds", "Time spent in each /api/chat stage",
+    ("stage",), buckets=STAGE_BUCKETS
+))
+UPSTREAM_SECONDS = _register(Histogram(
+    "travel_upstream_request_duration_seconds", "Latency of outbound API calls",
+    ("provider", "outcome")
+))
+CHAT_MESSAGES = _register(Counter(
+    "travel_chat_messages_total", "Chat messages by how they were answered",
+    ("served_by",)
+))
+LLM_TOKENS = _register(Counter(
+    "travel_llm_tokens_total", "Tokens reported by the LLM provider",
+    ("model", "kind")
+))
+LLM_QUEUE_WAIT_SECONDS = _register(Histogram(
+    "travel_llm_queue_wait_seconds", "Time chat requests waited for an LLM slot",
+    ("outcome",), buckets=STAGE_BUCKETS
+))
+LLM_SCHEDULER_EVENTS = _register(Counter(
+    "travel_llm_scheduler_events_total", "LLM admissions, rejections and provider rate limits",
+    ("event",)
+))
+LLM_REQUESTS = _register(Counter(
+    "travel_llm_requests_total", "LLM provider calls, including hedges, by outcome",
+    ("provider", "model", "outcome")
+))
+LLM_HEDGES = _register(Counter(
+    "travel_llm_hedges_total", "Hedged LLM requests sent or skipped for lack of a scheduler slot, and whether the hedge won or lost",
+    ("event",)
+))
+ERRORS = _register(Counter(
+    "travel_errors_total", "Errors caught and reported to the client or log",
+    ("source",)
+))
+
+
+def record_llm_usage(model, usage):
+    """Count prompt/completion tokens from a provider usage object, if present"""
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            LLM_TOKENS.inc(tokens, model=model, kind=kind.split("_")[0])
@@ -0,0 +1,260 @@
+import math
+import sys
+from array import array
+
+MISSING = float("nan")
+
+
+def _text(value, intern=True):
+    """A string field, or None. Repeated values (currencies, languages, notes)
+    are interned so they share one object across locations and reloads; free
+    text that is unique per location isn't worth an intern table entry."""
+    if not isinstance(value, str):
+        return None
+    return sys.intern(value) if intern else value
+
+
+def _items(value):
+    return value if isinstance(value, (list, tuple)) else ()
+
+
+def _number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return value
+    return None
+
+
+def _amount(value):
+    """A budget amount: a number, or text such as "varies" kept as written"""
+    return _number(value) if not isinstance(value, str) else _text(value)
+
+
+class Record:
+    """Read-only mapping interface over __slots__ fields, so code written for
+    the JSON documents (.get(), [], "in") keeps working"""
+
+    __slots__ = ()
+    FIELDS = ()
+
+    def _lookup(self, key):
+        return getattr(self, key) if key in self.FIELDS else None
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def keys(self):
+        return [key for key in self._keys() if key in self]
+
+    def _keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        """Plain dict copy, e.g. for JSON"""
+        result = {}
+        for key in self.keys():
+            value = self[key]
+            if isinstance(value, Record):
+                value = value.to_dict()
+            elif isinstance(value, tuple):
+                value = [item.to_dict() if isinstance(item, Record) else item for item in value]
+            result[key] = value
+        return result
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class LocationTable:
+    """Numeric columns shared by every record of one snapshot; NaN marks a missing value.
+    Rows whose source value was an int are remembered so it reads back as an int."""
+
+    __slots__ = ("latitudes", "longitudes", "ratings", "_int_rows")
+
+    def __init__(self):
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        self.ratings = array("d")
+        self._int_rows = {"latitudes": set(), "longitudes": set(), "ratings": set()}
+
+    def append(self, column, value):
+        """Append value (or None) to column and return its row"""
+        values = getattr(self, column)
+        row = len(values)
+        if isinstance(value, int):
+            self._int_rows[column].add(row)
+        values.append(MISSING if value is None else value)
+        return row
+
+    def value(self, column, row):
+        value = getattr(self, column)[row]
+        if value != value:
+            return None
+        return int(value) if row in self._int_rows[column] else value
+
+
+class Budget(Record):
+    __slots__ = ("daily_budget_low", "daily_budget_mid", "daily_budget_high", "currency", "notes")
+    FIELDS = __slots__
+
+    def __init__(self, doc):
+        self.daily_budget_low = _amount(doc.get("daily_budget_low"))
+        self.daily_budget_mid = _amount(doc.get("daily_budget_mid"))
+        self.daily_budget_high = _amount(doc.get("daily_budget_high"))
+        self.currency = _text(doc.get("currency"))
+        self.notes = _text(doc.get("notes"))
+
+
+class Attraction(Record):
+    __slots__ = ("name", "description", "_table", "_row")
+    FIELDS = ("name", "description", "rating")
+
+    def __init__(self, doc, table):
+        self.name = _text(doc.get("name"))
+        self.description = _text(doc.get("description"), intern=False)
+        self._table = table
+        self._row = table.append("ratings", _number(doc.get("rating")))
+
+    @property
+    def rating(self):
+        return self._table.value("ratings", self._row)
+
+
+class Location(Record):
+    """One destination. Documents from MongoDB carry extra fields (real_time_data,
+    content_hash, ...); those are kept as-is in extra."""
+
+    __slots__ = ("location", "attractions", "best_time_to_visit", "currency", "language", "budget", "tips",
+                 "aliases", "extra", "_table", "_row")
+    FIELDS = ("location", "coordinates", "attractions", "best_time_to_visit", "currency", "language", "budget",
+              "tips", "aliases")
+
+    def __init__(self, name, doc, table):
+        self.location = _text(doc.get("location")) or sys.intern(name)
+        self.best_time_to_visit = _text(doc.get("best_time_to_visit"))
+        self.currency = _text(doc.get("currency"))
+        self.language = _text(doc.get("language"))
+        budget = doc.get("budget")
+        self.budget = Budget(budget) if isinstance(budget, dict) else None
+        self.attractions = tuple(
+            Attraction(attraction, table) for attraction in _items(doc.get("attractions"))
+            if isinstance(attraction, dict) and isinstance(attraction.get("name"), str)
+        )
+        self.tips = tuple(_text(tip, intern=False) for tip in _items(doc.get("tips")) if isinstance(tip, str))
+        aliases = tuple(_text(alias) for alias in _items(doc.get("aliases")) if isinstance(alias, str))
+        self.aliases = aliases or None
+        extra = {sys.intern(key): value for key, value in doc.items() if key not in self.FIELDS}
+        self.extra = extra or None
+
+        self._table = table
+        coords = doc.get("coordinates")
+        latitude = _number(coords.get("latitude")) if isinstance(coords, dict) else None
+        longitude = _number(coords.get("longitude")) if isinstance(coords, dict) else None
+        self._row = table.append("latitudes", latitude)
+        table.append("longitudes", longitude)
+
+    @property
+    def latitude(self):
+        return self._table.value("latitudes", self._row)
+
+    @property
+    def longitude(self):
+        return self._table.value("longitudes", self._row)
+
+    @property
+    def coordinates(self):
+        latitude, longitude = self.latitude, self.longitude
+        if latitude is None and longitude is None:
+            return None
+        return {"latitude": latitude, "longitude": longitude}
+
+    def _lookup(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra.get(key) if self.extra else None
+
+    def _keys(self):
+        return self.FIELDS + tuple(self.extra or ())
+
+
+def validate_location(name, doc):
+    """Return a list of problems with a location document; empty if it is usable"""
+    if not isinstance(doc, dict):
+        return ["not a document"]
+    problems = []
+    coords = doc.get("coordinates")
+    if not isinstance(coords, dict) or _number(coords.get("latitude")) is None \
+            or _number(coords.get("longitude")) is None:
+        problems.append("missing coordinates")
+    elif not (-90 <= coords["latitude"] <= 90 and -180 <= coords["longitude"] <= 180):
+        problems.append("coordinates out of range")
+    attractions = doc.get("attractions") or []
+    if not isinstance(attractions, list):
+        problems.append("attractions is not a list")
+    else:
+        unnamed = sum(1 for a in attractions if not isinstance(a, dict) or not isinstance(a.get("name"), str))
+        if unnamed:
+            problems.append(f"{unnamed} attraction(s) without a name dropped")
+    budget = doc.get("budget")
+    if budget is not None and not isinstance(budget, dict):
+        problems.append("budget is not a document")
+    elif budget:
+        for key in ("daily_budget_low", "daily_budget_mid", "daily_budget_high"):
+            value = budget.get(key)
+            if isinstance(value, str):
+                problems.append(f"{key} is not a number ({value!r}), kept as text")
+            elif value is not None and _number(value) is None:
+                problems.append(f"{key} is not a number ({value!r}), dropped")
+    if not isinstance(doc.get("tips", []), list):
+        problems.append("tips is not a list")
+    return problems
+
+
+def build_locations(documents):
+    """Validate documents once and convert them to compact Location records.
+
+    Returns {name: Location}. Records share one LocationTable, so
+    coordinates and ratings live in flat float arrays rather than one
+    dict and float object per value.
+    """
+    table = LocationTable()
+    locations = {}
+    for name, doc in documents.items():
+        problems = validate_location(name, doc)
+        if problems:
+            print(f"[-] Location '{name}': {', '.join(problems)}")
+        if not isinstance(doc, dict):
+            continue
+        locations[sys.intern(name)] = Location(name, doc, table)
+    return locations
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by obj and everything it references, counting shared objects once"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif isinstance(obj, (str, bytes, int, float, array)) or obj is None:
+        pass
+    else:
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+    return size
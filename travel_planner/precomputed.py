@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# SQLite file written by batch_generate.py; chat answers are looked up here
+# before the LLM once the file exists. Set to an empty value to disable
+PRECOMPUTED_PATH = os.getenv("PRECOMPUTED_PATH", "precomputed.sqlite3")
+# Seconds between checks for a store that didn't exist yet
+PRECOMPUTED_RECHECK = 30
+
+# Budget tiers a request can ask for; "any" is a request that names none
+TIER_WORDS = {
+    "low": ("cheap", "tight", "backpacker", "backpacking", "low", "shoestring"),
+    "mid": ("mid", "mid-range", "midrange", "moderate"),
+    "high": ("luxury", "luxurious", "high-end", "splurge", "premium")
+}
+TIERS = ("any",) + tuple(TIER_WORDS)
+
+# Words a request may contain and still match a precomputed answer exactly;
+# anything else ("with kids", "museums") is a specific ask for the LLM
+PLAIN_WORDS = frozenset("""
+a an the for in to of on at with my our me us i we please can you could would
+what which are is
+create make plan give build suggest want need show write
+day days trip itinerary schedule visit stay holiday vacation
+budget range end
+must see top best main attractions attraction places sights things do
+""".split())
+
+TIER_BY_WORD = {word: tier for tier, words in TIER_WORDS.items() for word in words}
+
+
+def make_key(location, query_type, days, tier, model, system_prompt):
+    """Key for one matrix cell; a new model or any change to the system prompt invalidates old answers"""
+    parts = [location.lower(), query_type, str(days or 0), tier, model, system_prompt]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def detect_tier(message_lower):
+    """Budget tier named in a message, or "any" """
+    for word in re.findall(r"[a-z]+(?:-[a-z]+)?", message_lower):
+        if word in TIER_BY_WORD:
+            return TIER_BY_WORD[word]
+    return "any"
+
+
+def is_plain_request(user_message, location):
+    """Check that a message asks for nothing beyond location, duration, query type and tier"""
+    message_lower = user_message.lower()
+    for name_word in (location or "").lower().split():
+        message_lower = re.sub(rf"\b{re.escape(name_word)}\b", " ", message_lower)
+    message_lower = re.sub(r"\d+\s*-?\s*days?\b", " ", message_lower)
+    for word in re.findall(r"[a-z]+(?:-[a-z]+)?", message_lower):
+        if word not in PLAIN_WORDS and word not in TIER_BY_WORD:
+            return False
+    return True
+
+
+class PrecomputedStore:
+    """Pre-generated answers keyed by (location, query type, days, tier, model, prompt version)"""
+
+    def __init__(self, path=PRECOMPUTED_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, location TEXT NOT NULL, query_type TEXT NOT NULL, days INTEGER NOT NULL, "
+            "tier TEXT NOT NULL, model TEXT NOT NULL, prompt_version TEXT NOT NULL, message TEXT NOT NULL, "
+            "response TEXT NOT NULL, prompt_tokens INTEGER, completion_tokens INTEGER, created_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute("SELECT response FROM answers WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            self._stats["hits" if row else "misses"] += 1
+        return row[0] if row else None
+
+    def put(self, key, cell, message, response, usage=None):
+        """Store the answer for a matrix cell (a dict of location, query_type, days, tier, model, prompt_version)"""
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO answers (key, location, query_type, days, tier, model, prompt_version, "
+            "message, response, prompt_tokens, completion_tokens, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, cell["location"], cell["query_type"], cell["days"], cell["tier"], cell["model"],
+             cell["prompt_version"], message, response,
+             getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None), time.time())
+        )
+        conn.commit()
+
+    def keys(self):
+        """Keys already stored, for resuming a batch run"""
+        return {row[0] for row in self._connection().execute("SELECT key FROM answers")}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self._connection().execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return stats
+
+
+class PrecomputedLookup:
+    """Read side used while serving: opens the store once batch_generate.py has created it"""
+
+    def __init__(self, path=PRECOMPUTED_PATH):
+        self.path = path
+        self._store = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def store(self):
+        """Get the store, or None if the file doesn't exist (rechecked every PRECOMPUTED_RECHECK seconds)"""
+        if self._store is not None or not self.path:
+            return self._store
+        now = time.monotonic()
+        with self._lock:
+            if self._store is None and (self._checked_at is None or now - self._checked_at >= PRECOMPUTED_RECHECK):
+                self._checked_at = now
+                if os.path.exists(self.path):
+                    try:
+                        self._store = PrecomputedStore(self.path)
+                    except sqlite3.Error as e:
+                        print(f"[-] Could not open precomputed answers at {self.path}: {str(e)}")
+        return self._store
+
+    def get(self, key):
+        store = self.store()
+        if store is None:
+            return None
+        try:
+            return store.get(key)
+        except sqlite3.Error as e:
+            print(f"[-] Precomputed answer read error: {str(e)}")
+            return None
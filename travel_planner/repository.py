@@ -0,0 +1,241 @@
+import abc
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+import threading
+import time
+from location_index import LocationIndex
+from models import build_locations, deep_sizeof
+
+# Where the web app reads locations from: "json", "mongo" or "sqlite"
+LOCATION_STORE = os.getenv("LOCATION_STORE", "json").lower()
+LOCATIONS_JSON_PATH = os.getenv(
+    "LOCATIONS_JSON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "locations.json")
+)
+LOCATIONS_SQLITE_PATH = os.getenv("LOCATIONS_SQLITE_PATH", "locations.sqlite3")
+# Seconds between change checks; 0 disables hot reload
+LOCATION_POLL_INTERVAL = float(os.getenv("LOCATION_POLL_INTERVAL", 5))
+
+
+class LocationSnapshot:
+    """One immutable view of the location data ({name: Location}) and its lookup index"""
+
+    def __init__(self, data, version):
+        self.data = data
+        self.version = version
+        self.index = LocationIndex(data)
+        self.loaded_at = time.time()
+
+
+class LocationRepository(abc.ABC):
+    """Serves location reads from an in-memory snapshot.
+
+    Subclasses implement load() and change_token(). A background poller
+    compares change tokens and, when the source changed, loads a new
+    snapshot and swaps it in with a single reference assignment, so request
+    handlers never wait on the store.
+    """
+
+    def __init__(self, poll_interval=LOCATION_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._snapshot = None
+        self._token = None
+        self._version = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._poller = None
+
+    @abc.abstractmethod
+    def load(self):
+        """Return all locations as {name: document}; _refresh_locked converts them to Location records"""
+
+    @abc.abstractmethod
+    def change_token(self):
+        """Return a cheap value that changes whenever the stored data changes"""
+
+    def snapshot(self):
+        """Get the current snapshot, loading it on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._refresh_locked(force=True)
+                    self._start_polling()
+            snapshot = self._snapshot
+        return snapshot
+
+    def subscribe(self, listener):
+        """Call listener(snapshot) after every swap"""
+        self._listeners.append(listener)
+
+    def refresh(self, force=False):
+        """Reload the snapshot if the source changed; returns True if swapped"""
+        with self._lock:
+            return self._refresh_locked(force)
+
+    def _refresh_locked(self, force):
+        try:
+            token = self.change_token()
+        except Exception as e:
+            print(f"[-] Location store change check failed: {str(e)}")
+            if self._snapshot is not None:
+                return False
+            token = None
+
+        if not force and token == self._token:
+            return False
+
+        try:
+            documents = self.load()
+            data = build_locations(documents)
+        except Exception as e:
+            print(f"[-] Location store load failed: {str(e)}")
+            if self._snapshot is None:
+                self._snapshot = LocationSnapshot({}, 0)
+            return False
+        print(f"[+] Loaded {len(data)} locations: {deep_sizeof(documents) / 1024:.1f} KiB as documents, "
+              f"{deep_sizeof(data) / 1024:.1f} KiB as records")
+
+        self._version += 1
+        snapshot = LocationSnapshot(data, self._version)
+        self._snapshot = snapshot
+        self._token = token
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"[-] Location reload listener failed: {str(e)}")
+        return True
+
+    def _start_polling(self):
+        if self.poll_interval <= 0 or self._poller is not None:
+            return
+        self._poller = threading.Thread(target=self._poll, daemon=True)
+        self._poller.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            if self.refresh():
+                print(f"[+] Reloaded {len(self._snapshot.data)} locations (version {self._snapshot.version})")
+
+
+class JSONFileRepository(LocationRepository):
+    """Locations from locations.json, reloaded when the file's mtime changes"""
+
+    def __init__(self, path=LOCATIONS_JSON_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            print(f"[-] {self.path} not found!")
+            return {}
+
+    def change_token(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class MongoRepository(LocationRepository):
+    """Locations from the scraper's MongoDB collection, polled for changes.
+
+    Change streams need a replica set, so this polls the newest updated_at
+    and the document count instead.
+    """
+
+    def __init__(self, collection=None, **kwargs):
+        super().__init__(**kwargs)
+        self._collection = collection
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from scraper import get_locations_collection
+            self._collection = get_locations_collection()
+        return self._collection
+
+    def load(self):
+        return {doc["location"]: doc for doc in self.collection.find({}, {"_id": 0})}
+
+    def change_token(self):
+        newest = self.collection.find_one({}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        return self.collection.estimated_document_count(), newest.get("updated_at") if newest else None
+
+
+class SQLiteRepository(LocationRepository):
+    """Locations in a local SQLite file; a single-host stand-in for MongoDB.
+
+    Populate it with `python repository.py` (see the __main__ block).
+    """
+
+    def __init__(self, path=LOCATIONS_SQLITE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        # The file and table are created on first use, not at import
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._schema_ready:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS locations ("
+                    "location TEXT PRIMARY KEY, doc TEXT NOT NULL, updated_at REAL NOT NULL)"
+                )
+            self._schema_ready = True
+        return conn
+
+    def load(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT location, doc FROM locations").fetchall()
+        return {location: json.loads(doc) for location, doc in rows}
+
+    def change_token(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*), MAX(updated_at) FROM locations").fetchone()
+
+    def save(self, locations):
+        """Upsert {name: document} into the store"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO locations (location, doc, updated_at) VALUES (?, ?, ?)",
+                [(name, json.dumps(doc, default=str), now) for name, doc in locations.items()]
+            )
+
+
+def create_repository(store=LOCATION_STORE):
+    """Create the configured location repository"""
+    if store == "mongo":
+        return MongoRepository()
+    if store == "sqlite":
+        return SQLiteRepository()
+    if store != "json":
+        print(f"[-] Unknown LOCATION_STORE '{store}', using locations.json")
+    return JSONFileRepository()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy location documents into the SQLite location store")
+    parser.add_argument("--source", choices=("json", "mongo"), default="json",
+                        help="read from locations.json (LOCATIONS_JSON_PATH) or the scraper's MongoDB collection")
+    parser.add_argument("--path", default=LOCATIONS_SQLITE_PATH, help="SQLite file to write")
+    args = parser.parse_args()
+
+    source = MongoRepository(poll_interval=0) if args.source == "mongo" else JSONFileRepository(poll_interval=0)
+    documents = source.load()
+    if not documents:
+        raise SystemExit(f"[-] No locations found in {args.source}, nothing written")
+    SQLiteRepository(args.path, poll_interval=0).save(documents)
+    print(f"[+] Saved {len(documents)} locations to {args.path}")
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from cache import TTLCache
+
+# Response caching is opt-in: "memory" (per process) or "sqlite" (shared
+# between workers on one host); empty disables it
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "").lower()
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 86400))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 1024))
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+
+
+def normalize_message(user_message):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", user_message.lower()).split())
+
+
+def make_cache_key(location, query_type, duration, user_message, model="", system_prompt=""):
+    """Build a stable key from the fields that determine a deterministic answer.
+
+    The system prompt carries the template version and the destination's
+    data, so a reload with changed location data invalidates old answers.
+    """
+    parts = [
+        (location or "").lower(),
+        query_type or "",
+        str(duration or ""),
+        normalize_message(user_message),
+        model,
+        system_prompt
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU/TTL backend"""
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_MAX_SIZE):
+        self._cache = TTLCache(ttl=ttl, max_size=max_size)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def size(self):
+        return self._cache.stats()["size"]
+
+
+class SQLiteBackend:
+    """SQLite file backend that several worker processes can share"""
+
+    EVICT_EVERY = 64
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        # The file and table are created on first use, not at import
+        self._schema_ready = False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._writes_lock:
+            if self._schema_ready:
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            conn.commit()
+            self._schema_ready = True
+
+    def get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM responses WHERE key = ? AND stored_at >= ?",
+            (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        return row[0]
+
+    def set(self, key, value):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now)
+        )
+        conn.commit()
+
+        with self._writes_lock:
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self._evict(conn, now)
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.ttl,))
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+        conn.commit()
+
+
+class ResponseCache:
+    """Response cache in front of the LLM with hit/miss/bypass counters"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"[-] Response cache read error: {str(e)}")
+            self._count("errors")
+            return None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        try:
+            self.backend.set(key, value)
+            self._count("stores")
+        except Exception as e:
+            print(f"[-] Response cache write error: {str(e)}")
+            self._count("errors")
+
+    def record_bypass(self):
+        self._count("bypassed")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def create_response_cache(backend=RESPONSE_CACHE_BACKEND):
+    """Create the configured response cache, or None when caching is off"""
+    if backend == "memory":
+        return ResponseCache(MemoryBackend())
+    if backend == "sqlite":
+        return ResponseCache(SQLiteBackend())
+    if backend:
+        print(f"[-] Unknown RESPONSE_CACHE_BACKEND '{backend}', response caching disabled")
+    return None
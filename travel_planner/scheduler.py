@@ -0,0 +1,345 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+import metrics
+
+# LLM calls in flight at once, across all clients
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+# Token bucket matched to the provider quota; 0 disables rate limiting
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+LLM_BURST = int(os.getenv("LLM_BURST", 5))
+# Seconds a request may wait for admission before it is turned away
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", 20))
+# Waiting requests allowed per client and in total; beyond these requests are rejected at once
+LLM_MAX_QUEUE_PER_CLIENT = int(os.getenv("LLM_MAX_QUEUE_PER_CLIENT", 4))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 200))
+# Retries after a 429, and the base of the exponential pause (seconds) when no Retry-After is sent
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", 2))
+LLM_RATE_LIMIT_BACKOFF = float(os.getenv("LLM_RATE_LIMIT_BACKOFF", 2.0))
+LLM_RATE_LIMIT_MAX_BACKOFF = 60.0
+
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 uses
+# the socket address. Only set this when every request passes through them
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", 0))
+
+# Waiters recheck at least this often, so a lifted pause is never missed
+POLL_INTERVAL = 1.0
+
+
+class SchedulerRejected(Exception):
+    """A request was not admitted to the LLM"""
+
+
+class QueueFull(SchedulerRejected):
+    pass
+
+
+class QueueTimeout(SchedulerRejected):
+    pass
+
+
+class RateLimited(SchedulerRejected):
+    """The provider still answered 429 after every retry"""
+
+
+def is_rate_limit_error(error):
+    """Check for a provider 429 (the groq SDK raises RateLimitError with status_code 429)"""
+    return getattr(error, "status_code", None) == 429
+
+
+def retry_after_seconds(error):
+    """Seconds from a 429's Retry-After header, or None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(float(headers.get("retry-after")), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def client_key(remote_addr, forwarded_for=None, trusted_proxies=TRUSTED_PROXIES):
+    """Fair-share queue key for a chat request: the client address.
+
+    The address is the entry trusted_proxies hops from the end of
+    X-Forwarded-For, the way Werkzeug's ProxyFix reads it, or the socket
+    address. Session ids are minted by the browser, so they are never used
+    here: a new id per request would get a fresh queue every time.
+    """
+    address = remote_addr
+    if trusted_proxies > 0 and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            address = hops[-trusted_proxies]
+    return f"addr:{address}"
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    """One request waiting for admission, woken by an Event or an asyncio future"""
+
+    __slots__ = ("client", "event", "loop", "future", "admitted")
+
+    def __init__(self, client, loop=None):
+        self.client = client
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.admitted = False
+
+    def wake(self):
+        if self.loop:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        else:
+            self.event.set()
+
+
+class LLMScheduler:
+    """Admission control for LLM calls.
+
+    A request is admitted when a concurrency slot is free and the token
+    bucket has a token. Waiting requests sit in per-client queues served
+    round-robin, so one busy client can't starve the others. A 429 from the
+    provider empties the bucket and pauses admissions, honouring Retry-After
+    or backing off exponentially.
+    """
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 burst=LLM_BURST, queue_timeout=LLM_QUEUE_TIMEOUT, max_queue_per_client=LLM_MAX_QUEUE_PER_CLIENT,
+                 max_queue=LLM_MAX_QUEUE, rate_limit_retries=LLM_RATE_LIMIT_RETRIES,
+                 rate_limit_backoff=LLM_RATE_LIMIT_BACKOFF):
+        self.max_concurrency = max_concurrency
+        self.rate = requests_per_minute / 60
+        self.burst = max(burst, 1)
+        self.queue_timeout = queue_timeout
+        self.max_queue_per_client = max_queue_per_client
+        self.max_queue = max_queue
+        self.rate_limit_retries = rate_limit_retries
+        self.rate_limit_backoff = rate_limit_backoff
+
+        self._lock = threading.Lock()
+        # client -> waiters; the first key is next in the round-robin
+        self._queues = OrderedDict()
+        self._queued = 0
+        self._active = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._rate_limit_streak = 0
+
+    @contextmanager
+    def admit(self, client, request):
+        """Wait for admission, call request() and yield its result while holding the slot.
+
+        A 429 from request() pauses admissions and the request queues again,
+        up to rate_limit_retries times. Raises QueueFull or QueueTimeout when
+        the request is not admitted, and RateLimited when the retries run out.
+        """
+        for attempt in range(self.rate_limit_retries + 1):
+            self.acquire(client)
+            try:
+                result = request()
+            except Exception as e:
+                self.release()
+                if not is_rate_limit_error(e):
+                    raise
+                self.rate_limited(retry_after_seconds(e))
+                if attempt == self.rate_limit_retries:
+                    raise RateLimited(str(e)) from e
+                continue
+            self._succeeded()
+            try:
+                yield result
+            finally:
+                self.release()
+            return
+
+    @asynccontextmanager
+    async def admit_async(self, client, request):
+        """Async variant of admit where request is a coroutine function"""
+        for attempt in range(self.rate_limit_retries + 1):
+            await self.acquire_async(client)
+            try:
+                result = await request()
+            except Exception as e:
+                self.release()
+                if not is_rate_limit_error(e):
+                    raise
+                self.rate_limited(retry_after_seconds(e))
+                if attempt == self.rate_limit_retries:
+                    raise RateLimited(str(e)) from e
+                continue
+            self._succeeded()
+            try:
+                yield result
+            finally:
+                self.release()
+            return
+
+    def acquire(self, client):
+        """Block until client's request is admitted; pair with release()"""
+        started = time.monotonic()
+        waiter = self._enqueue(client)
+        deadline = started + self.queue_timeout
+        while not waiter.admitted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._expire(waiter, started)
+                break
+            waiter.event.wait(self._wait_time(remaining))
+            self._poll(waiter)
+        self._record_admission(started)
+
+    async def acquire_async(self, client):
+        """Wait without blocking the event loop until client's request is admitted"""
+        started = time.monotonic()
+        waiter = self._enqueue(client, asyncio.get_running_loop())
+        deadline = started + self.queue_timeout
+        try:
+            while not waiter.admitted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._expire(waiter, started)
+                    break
+                await asyncio.wait({waiter.future}, timeout=self._wait_time(remaining))
+                self._poll(waiter)
+        except asyncio.CancelledError:
+            # The client went away; give up the place in the queue or the slot
+            if not self._remove(waiter):
+                self.release()
+            raise
+        self._record_admission(started)
+
+    def try_acquire(self):
+        """Take a slot and token only if both are free now and nobody is waiting; pair with release().
+
+        Used for hedged LLM requests, which are extra upstream calls and must
+        count against the same limits without queueing ahead of real requests.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._queues or self._active >= self.max_concurrency or now < self._paused_until:
+                return False
+            if self.rate > 0:
+                if self._tokens < 1:
+                    return False
+                self._tokens -= 1
+            self._active += 1
+        return True
+
+    def release(self):
+        """Free an admitted request's slot and admit the next waiter"""
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    def rate_limited(self, retry_after=None):
+        """Pause admissions after a 429"""
+        with self._lock:
+            self._rate_limit_streak += 1
+            if retry_after is None:
+                retry_after = min(self.rate_limit_backoff * 2 ** (self._rate_limit_streak - 1),
+                                  LLM_RATE_LIMIT_MAX_BACKOFF)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._tokens = 0.0
+        metrics.LLM_SCHEDULER_EVENTS.inc(event="rate_limited")
+        print(f"[-] LLM rate limited, pausing admissions for {retry_after:.1f}s")
+
+    def stats(self):
+        """Return the current queue depth, active calls and rate-limit state"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "waiting_clients": len(self._queues),
+                "tokens": round(self._tokens, 2),
+                "paused_for_s": round(max(self._paused_until - now, 0.0), 2)
+            }
+
+    def _enqueue(self, client, loop=None):
+        waiter = _Waiter(client, loop)
+        with self._lock:
+            queue = self._queues.get(client)
+            if self._queued >= self.max_queue or (queue is not None and len(queue) >= self.max_queue_per_client):
+                metrics.LLM_SCHEDULER_EVENTS.inc(event="queue_full")
+                raise QueueFull("LLM queue is full")
+            if queue is None:
+                queue = self._queues[client] = deque()
+            queue.append(waiter)
+            self._queued += 1
+            self._dispatch()
+        return waiter
+
+    def _dispatch(self):
+        """Admit waiters round-robin while slots and tokens allow; caller holds the lock"""
+        now = time.monotonic()
+        self._refill(now)
+        while self._queues and self._active < self.max_concurrency and now >= self._paused_until:
+            if self.rate > 0 and self._tokens < 1:
+                break
+            client, queue = self._queues.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                # The client goes to the back of the rotation
+                self._queues[client] = queue
+            self._queued -= 1
+            self._active += 1
+            if self.rate > 0:
+                self._tokens -= 1
+            waiter.admitted = True
+            waiter.wake()
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _wait_time(self, remaining):
+        """How long a waiter sleeps before rechecking: until the next token or the pause ends"""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(self._paused_until - now, 0.0)
+            if self.rate > 0 and self._tokens < 1:
+                delay = max(delay, (1 - self._tokens) / self.rate)
+        return max(min(remaining, delay or POLL_INTERVAL, POLL_INTERVAL), 0.001)
+
+    def _poll(self, waiter):
+        if not waiter.admitted:
+            with self._lock:
+                self._dispatch()
+
+    def _remove(self, waiter):
+        """Take a waiting request out of its queue; False if it was already admitted"""
+        with self._lock:
+            if waiter.admitted:
+                return False
+            queue = self._queues[waiter.client]
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.client]
+            return True
+
+    def _expire(self, waiter, started):
+        """Remove a waiter that ran out of time, unless it was admitted meanwhile"""
+        if not self._remove(waiter):
+            return
+        metrics.LLM_QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, outcome="timeout")
+        metrics.LLM_SCHEDULER_EVENTS.inc(event="timeout")
+        raise QueueTimeout(f"no LLM slot within {self.queue_timeout:g}s")
+
+    def _record_admission(self, started):
+        metrics.LLM_QUEUE_WAIT_SECONDS.observe(time.monotonic() - started, outcome="admitted")
+        metrics.LLM_SCHEDULER_EVENTS.inc(event="admitted")
+
+    def _succeeded(self):
+        with self._lock:
+            self._rate_limit_streak = 0
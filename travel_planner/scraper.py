@@ -1,119 +1,150 @@
-import requests
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from datetime import datetime
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+import http_client
+import currency
+from weather import fetch_weather_batch
+
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("MONGODB_DB_NAME", "travel_db")
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-locations_collection = db["locations"]
+
+def create_mongo_client(uri):
+    """Create a MongoDB client; "mongomock://" URIs use an in-memory stand-in"""
+    if uri.startswith("mongomock://"):
+        import mongomock
+        return mongomock.MongoClient()
+    return MongoClient(uri)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_db():
+    """Get the scraper database, connecting on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_mongo_client(MONGO_URI)
+    return _client[DB_NAME]
+
+def get_locations_collection():
+    """Get the collection of location documents"""
+    return get_db()["locations"]
+
+def get_currency_rates_collection():
+    """Get the collection of shared exchange-rate tables"""
+    return get_db()["currency_rates"]
+
+# Maximum number of API requests in flight during a scrape
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", 8))
+# Number of location upserts sent per bulk_write call
+SCRAPER_BATCH_SIZE = int(os.getenv("SCRAPER_BATCH_SIZE", 500))
+
+# Freshness policy: seconds before each class of fetched data is refetched.
+# Static guide content (attractions, budget, tips) comes from SOURCES and is
+# rewritten only when its content hash changes.
+REFRESH_TTLS = {
+    "weather": int(os.getenv("WEATHER_REFRESH_TTL", 1800)),
+    "currency": int(os.getenv("CURRENCY_REFRESH_TTL", 21600)),
+    "advisory": int(os.getenv("ADVISORY_REFRESH_TTL", 43200))
+}
 
 # Real-time API sources with URLs
 REAL_TIME_APIS = {
     "Paris": {
         "lat": 48.8566, "lon": 2.3522, "country": "FR",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=48.8566&longitude=2.3522&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=48.8566&longitude=2.3522"
     },
     "Tokyo": {
         "lat": 35.6762, "lon": 139.6503, "country": "JP",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=35.6762&longitude=139.6503&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/JPY",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=35.6762&longitude=139.6503"
     },
     "New York": {
         "lat": 40.7128, "lon": -74.0060, "country": "US",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=40.7128&longitude=-74.0060&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/USD",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=40.7128&longitude=-74.0060"
     },
     "Barcelona": {
         "lat": 41.3851, "lon": 2.1734, "country": "ES",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=41.3851&longitude=2.1734&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=41.3851&longitude=2.1734"
     },
     "Dubai": {
         "lat": 25.2048, "lon": 55.2708, "country": "AE",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=25.2048&longitude=55.2708&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/AED",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=25.2048&longitude=55.2708"
     },
     "London": {
         "lat": 51.5074, "lon": -0.1278, "country": "GB",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=51.5074&longitude=-0.1278&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/GBP",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=51.5074&longitude=-0.1278"
     },
     "Rome": {
         "lat": 41.9028, "lon": 12.4964, "country": "IT",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=41.9028&longitude=12.4964&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=41.9028&longitude=12.4964"
     },
     "Bangkok": {
         "lat": 13.7563, "lon": 100.5018, "country": "TH",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=13.7563&longitude=100.5018&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/THB",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=13.7563&longitude=100.5018"
     },
     "Sydney": {
         "lat": -33.8688, "lon": 151.2093, "country": "AU",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=-33.8688&longitude=151.2093&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/AUD",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=-33.8688&longitude=151.2093"
     },
     "Amsterdam": {
         "lat": 52.3676, "lon": 4.9041, "country": "NL",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=52.3676&longitude=4.9041&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=52.3676&longitude=4.9041"
     },
     "Singapore": {
         "lat": 1.3521, "lon": 103.8198, "country": "SG",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=1.3521&longitude=103.8198&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/SGD",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=1.3521&longitude=103.8198"
     },
     "Istanbul": {
         "lat": 41.0082, "lon": 28.9784, "country": "TR",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=41.0082&longitude=28.9784&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/TRY",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=41.0082&longitude=28.9784"
     },
     "Las Vegas": {
         "lat": 36.1699, "lon": -115.1398, "country": "US",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=36.1699&longitude=-115.1398&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/USD",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=36.1699&longitude=-115.1398"
     },
     "Vienna": {
         "lat": 48.2082, "lon": 16.3738, "country": "AT",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=48.2082&longitude=16.3738&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=48.2082&longitude=16.3738"
     },
     "Bali": {
         "lat": -8.6705, "lon": 115.2126, "country": "ID",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=-8.6705&longitude=115.2126&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/IDR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=-8.6705&longitude=115.2126"
     },
     "Miami": {
         "lat": 25.7617, "lon": -80.1918, "country": "US",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=25.7617&longitude=-80.1918&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/USD",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=25.7617&longitude=-80.1918"
     },
     "Berlin": {
         "lat": 52.5200, "lon": 13.4050, "country": "DE",
         "weather_url": "https://api.open-meteo.com/v1/forecast?latitude=52.5200&longitude=13.4050&current=temperature_2m,weather_code,wind_speed_10m",
-        "currency_url": "https://api.exchangerate-api.com/v4/latest/EUR",
         "advisory_url": "https://api.aladhan.com/v1/timings/today?latitude=52.5200&longitude=13.4050"
     }
 }
@@ -445,43 +476,44 @@ SOURCES = {
     }
 }
 
-def get_weather_data(location, weather_url):
-    """Fetch real-time weather data from Open-Meteo API"""
-    try:
-        response = requests.get(weather_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        current = data.get("current", {})
-        
-        return {
-            "temperature": current.get("temperature_2m", "N/A"),
-            "weather": current.get("weather_code", "N/A"),
-            "wind_speed": current.get("wind_speed_10m", "N/A"),
-            "timezone": data.get("timezone", ""),
-            "source_url": weather_url
-        }
-    except Exception as e:
-        print(f"[-] Weather API error for {location}: {str(e)}")
-        return {}
+# Current-weather fields stored for each location
+WEATHER_FIELDS = "temperature_2m,weather_code,wind_speed_10m"
 
-def get_currency_data(currency_url):
-    """Fetch real-time currency exchange rates"""
-    try:
-        response = requests.get(currency_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        return {
-            "rates": data.get("rates", {}),
-            "source_url": currency_url
-        }
-    except Exception as e:
-        print(f"[-] Currency API error: {str(e)}")
-        return {}
+def parse_weather_data(data, weather_url):
+    """Convert one Open-Meteo result into the stored weather document"""
+    current = data.get("current", {})
+    
+    return {
+        "temperature": current.get("temperature_2m", "N/A"),
+        "weather": current.get("weather_code", "N/A"),
+        "wind_speed": current.get("wind_speed_10m", "N/A"),
+        "timezone": data.get("timezone", ""),
+        "source_url": weather_url
+    }
+
+def get_weather_batch(locations):
+    """Fetch real-time weather for several locations with Open-Meteo's multi-coordinate query"""
+    api_data = {location: REAL_TIME_APIS.get(location, {}) for location in locations}
+    located = [location for location in locations if "lat" in api_data[location] and "lon" in api_data[location]]
+    responses = fetch_weather_batch([(api_data[loc]["lat"], api_data[loc]["lon"]) for loc in located], WEATHER_FIELDS)
+
+    weather = {location: {} for location in locations}
+    for location, data in zip(located, responses):
+        if data is not None:
+            weather[location] = parse_weather_data(data, api_data[location].get("weather_url", ""))
+    return weather
+
+# Status stored in travel_info when the advisory API couldn't be reached
+FETCH_FAILED_STATUS = "Unable to fetch"
+
+def fetch_succeeded(result):
+    """Check that a stored or fetched stage result holds data rather than an empty or failed placeholder"""
+    return bool(result) and not (isinstance(result, dict) and result.get("status") == FETCH_FAILED_STATUS)
 
 def get_travel_advisories(advisory_url):
     """Fetch travel information using Aladhan API (reliable alternative)"""
     try:
-        response = requests.get(advisory_url, timeout=10, verify=False)
+        response = http_client.get("aladhan", advisory_url)
         response.raise_for_status()
         data = response.json()
         
@@ -492,54 +524,254 @@ def get_travel_advisories(advisory_url):
         }
     except Exception as e:
         print(f"[-] Advisory API error: {str(e)}")
-        return {"status": "Unable to fetch", "source_url": advisory_url}
+        return {"status": FETCH_FAILED_STATUS, "source_url": advisory_url}
 
-def scrape_and_store_data():
-    """Scrape real-time travel data from APIs and store in MongoDB"""
-    for location, data in SOURCES.items():
-        api_data = REAL_TIME_APIS.get(location, {})
-        
-        # Get real-time data using URLs
-        weather = get_weather_data(location, api_data.get("weather_url", ""))
-        currency = get_currency_data(api_data.get("currency_url", ""))
-        advisory = get_travel_advisories(api_data.get("advisory_url", ""))
-        
-        location_doc = {
-            "location": location,
-            "attractions": data["attractions"],
-            "description": f"Complete travel guide for {location}",
-            "best_time_to_visit": data.get("best_time_to_visit", "Year-round"),
-            "currency": data.get("currency", "Local currency"),
-            "language": data.get("language", "Local language"),
-            "budget": data.get("budget", {}),
-            "real_time_data": {
-                "weather": weather,
-                "currency_rates": currency,
-                "travel_info": advisory,
-                "last_updated": datetime.now()
-            },
-            "coordinates": {
-                "latitude": api_data.get("lat"),
-                "longitude": api_data.get("lon")
-            },
-            "updated_at": datetime.now(),
-            "tips": [
-                f"Book accommodations in advance during peak season in {location}",
-                f"Use local public transportation to explore {location}",
-                f"Try authentic local cuisine and restaurants in {location}",
-                f"Learn basic phrases in the local language before visiting {location}",
-                f"Check visa requirements before traveling to {location}"
-            ]
+def build_currency_reference(data):
+    """Reference a location's currency in the shared rate table"""
+    return {
+        "currency_code": currency.currency_code(data.get("currency", "")),
+        "rate_table": currency.CURRENCY_BASE
+    }
+
+def build_location_doc(location, data, api_data, weather, currency_rates, advisory, fetched_at=None):
+    """Build the stored document for one location"""
+    location_doc = {
+        "location": location,
+        "attractions": data["attractions"],
+        "description": f"Complete travel guide for {location}",
+        "best_time_to_visit": data.get("best_time_to_visit", "Year-round"),
+        "currency": data.get("currency", "Local currency"),
+        "language": data.get("language", "Local language"),
+        "budget": data.get("budget", {}),
+        "real_time_data": {
+            "weather": weather,
+            "currency_rates": currency_rates,
+            "travel_info": advisory,
+            "fetched_at": fetched_at or {},
+            "last_updated": datetime.now()
+        },
+        "coordinates": {
+            "latitude": api_data.get("lat"),
+            "longitude": api_data.get("lon")
+        },
+        "updated_at": datetime.now(),
+        "tips": [
+            f"Book accommodations in advance during peak season in {location}",
+            f"Use local public transportation to explore {location}",
+            f"Try authentic local cuisine and restaurants in {location}",
+            f"Learn basic phrases in the local language before visiting {location}",
+            f"Check visa requirements before traveling to {location}"
+        ]
+    }
+    location_doc["content_hash"] = content_hash(location_doc)
+    return location_doc
+
+def content_hash(location_doc):
+    """Hash a location document, ignoring timestamps"""
+    content = {k: v for k, v in location_doc.items() if k not in ("_id", "updated_at", "content_hash")}
+    content["real_time_data"] = {
+        k: v for k, v in content.get("real_time_data", {}).items() if k not in ("fetched_at", "last_updated")
+    }
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+def is_fresh(fetched_at, data_class, now):
+    """Check whether data fetched at fetched_at is still inside its TTL"""
+    return bool(fetched_at) and (now - fetched_at).total_seconds() < REFRESH_TTLS[data_class]
+
+def plan_fetches(existing_docs, now, full_refresh=False):
+    """Decide which stages to fetch per location from stored fetch times"""
+    stored_keys = {"weather": "weather", "advisory": "travel_info"}
+    plan = {}
+    for location in SOURCES:
+        doc = existing_docs.get(location)
+        if full_refresh or not doc:
+            plan[location] = set(stored_keys)
+            continue
+
+        real_time = doc.get("real_time_data", {})
+        fetched_at = real_time.get("fetched_at") or {}
+        plan[location] = {
+            stage for stage, stored_key in stored_keys.items()
+            # Older documents only carry last_updated; empty and failed results are retried
+            if not fetch_succeeded(real_time.get(stored_key))
+            or not is_fresh(fetched_at.get(stage, real_time.get("last_updated")), stage, now)
         }
-        
-        locations_collection.update_one(
-            {"location": location},
-            {"$set": location_doc},
+    return plan
+
+def _timed(fetcher, *args):
+    """Run a fetcher and return (result, elapsed seconds)"""
+    started = time.perf_counter()
+    result = fetcher(*args)
+    return result, time.perf_counter() - started
+
+def fetch_real_time_data(plan, timings):
+    """Fetch the planned weather and advisory data for all locations concurrently.
+
+    Weather for every planned location is one batched Open-Meteo request;
+    advisories are fetched per location alongside it.
+    """
+    results = {location: {} for location in plan}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=SCRAPER_CONCURRENCY) as pool:
+        futures = {}
+        weather_locations = [location for location, stages in plan.items() if "weather" in stages]
+        if weather_locations:
+            futures[pool.submit(_timed, get_weather_batch, weather_locations)] = (weather_locations, "weather")
+        for location, stages in plan.items():
+            if "advisory" in stages:
+                advisory_url = REAL_TIME_APIS.get(location, {}).get("advisory_url", "")
+                futures[pool.submit(_timed, get_travel_advisories, advisory_url)] = (location, "advisory")
+
+        for future in as_completed(futures):
+            target, stage = futures[future]
+            stage_timing = timings.setdefault(stage, {"calls": 0, "failures": 0, "total_s": 0.0, "max_s": 0.0})
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                # Fetchers handle their own API errors; this only guards against bugs
+                print(f"[-] {stage} fetch failed for {target}: {str(e)}")
+                result, elapsed = {}, 0.0
+                stage_timing["failures"] += 1
+            if stage == "weather":
+                for location in target:
+                    results[location][stage] = result.get(location, {})
+            else:
+                results[target][stage] = result
+                if not fetch_succeeded(result):
+                    stage_timing["failures"] += 1
+            stage_timing["calls"] += 1
+            stage_timing["total_s"] += elapsed
+            stage_timing["max_s"] = max(stage_timing["max_s"], elapsed)
+
+    timings["fetch_wall_s"] = time.perf_counter() - started
+    return results
+
+def print_timings(timings):
+    """Print per-stage scraper timings"""
+    for stage, stage_timing in timings.items():
+        if isinstance(stage_timing, dict):
+            print(f"[+] {stage}: {stage_timing['calls']} calls, {stage_timing['failures']} failed, "
+                  f"{stage_timing['total_s']:.2f}s total, {stage_timing['max_s']:.2f}s max")
+        else:
+            print(f"[+] {stage}: {stage_timing:.2f}s")
+
+def fetch_and_store_rates(timings, now, full_refresh=False):
+    """Download the shared exchange-rate table once and store it, unless still fresh"""
+    stored = get_currency_rates_collection().find_one({"base": currency.CURRENCY_BASE}, {"last_updated": 1})
+    if not full_refresh and stored and is_fresh(stored.get("last_updated"), "currency", now):
+        timings["currency"] = {"calls": 0, "failures": 0, "total_s": 0.0, "max_s": 0.0}
+        return None
+
+    rate_table, elapsed = _timed(currency.fetch_rate_table)
+    timings["currency"] = {"calls": 1, "failures": 0 if rate_table else 1, "total_s": elapsed, "max_s": elapsed}
+
+    if rate_table:
+        get_currency_rates_collection().update_one(
+            {"base": rate_table["base"]},
+            {"$set": rate_table},
             upsert=True
         )
-        print(f"[+] Stored real-time data for {location}")
+        print(f"[+] Stored {rate_table['base']} exchange rates ({len(rate_table['rates'])} currencies)")
+    return rate_table
+
+def ensure_indexes():
+    """Create the unique lookup indexes used by the upserts"""
+    get_locations_collection().create_index("location", unique=True)
+    get_currency_rates_collection().create_index("base", unique=True)
+
+def bulk_write_locations(operations, timings, batch_size=SCRAPER_BATCH_SIZE):
+    """Apply location UpdateOne operations with unordered bulk writes"""
+    bulk_timing = timings.setdefault("bulk_write", {"calls": 0, "failures": 0, "total_s": 0.0, "max_s": 0.0})
+    stored = 0
+
+    for start in range(0, len(operations), batch_size):
+        batch = operations[start:start + batch_size]
+        started = time.perf_counter()
+        try:
+            result = get_locations_collection().bulk_write(batch, ordered=False)
+            stored += result.upserted_count + result.matched_count
+        except BulkWriteError as e:
+            details = e.details or {}
+            stored += details.get("nUpserted", 0) + details.get("nMatched", 0)
+            bulk_timing["failures"] += len(details.get("writeErrors", []))
+            print(f"[-] Bulk write errors: {details.get('writeErrors', [])}")
+        elapsed = time.perf_counter() - started
+
+        bulk_timing["calls"] += 1
+        bulk_timing["total_s"] += elapsed
+        bulk_timing["max_s"] = max(bulk_timing["max_s"], elapsed)
+
+    return stored
+
+def scrape_and_store_data(full_refresh=False):
+    """Scrape real-time travel data from APIs and store changed locations in MongoDB"""
+    timings = {}
+    now = datetime.now()
+    ensure_indexes()
+    fetch_and_store_rates(timings, now, full_refresh)
+
+    existing_docs = {
+        doc["location"]: doc
+        for doc in get_locations_collection().find({}, {"location": 1, "real_time_data": 1, "content_hash": 1})
+    }
+    plan = plan_fetches(existing_docs, now, full_refresh)
+    fetched = fetch_real_time_data(plan, timings)
+
+    operations = []
+    unchanged = 0
+    for location, data in SOURCES.items():
+        api_data = REAL_TIME_APIS.get(location, {})
+        existing = existing_docs.get(location, {})
+        stored_real_time = existing.get("real_time_data", {})
+        fetched_at = dict(stored_real_time.get("fetched_at") or {})
+
+        real_time = {}
+        refreshed = False
+        for stage, stored_key in (("weather", "weather"), ("advisory", "travel_info")):
+            stored_result = stored_real_time.get(stored_key, {})
+            result = fetched[location].get(stage)
+            if fetch_succeeded(result):
+                real_time[stage] = result
+                fetched_at[stage] = now
+                refreshed = True
+            elif stage in fetched[location] and not fetch_succeeded(stored_result):
+                # Nothing usable stored yet: record the failure, but leave fetched_at so the next run retries
+                real_time[stage] = result or {}
+            else:
+                # Keep the last good result after a failed fetch; its fetched_at still marks it stale
+                real_time[stage] = stored_result
+
+        location_doc = build_location_doc(
+            location, data, api_data,
+            real_time["weather"], build_currency_reference(data), real_time["advisory"],
+            fetched_at
+        )
+
+        if location_doc["content_hash"] != existing.get("content_hash"):
+            operations.append(UpdateOne({"location": location}, {"$set": location_doc}, upsert=True))
+        elif refreshed:
+            # Content unchanged: only record the fetch so the TTL restarts
+            operations.append(UpdateOne(
+                {"location": location},
+                {"$set": {"real_time_data.fetched_at": fetched_at}}
+            ))
+        else:
+            unchanged += 1
+
+    started = time.perf_counter()
+    stored = bulk_write_locations(operations, timings)
+    timings["store_wall_s"] = time.perf_counter() - started
+    print(f"[+] Stored real-time data for {stored} locations ({unchanged} unchanged)")
+
+    print_timings(timings)
+    return timings
 
 if __name__ == "__main__":
-    scrape_and_store_data()
+    parser = argparse.ArgumentParser(description="Scrape real-time travel data into MongoDB")
+    parser.add_argument("--full", action="store_true", help="refetch everything, ignoring freshness TTLs")
+    args = parser.parse_args()
+
+    scrape_and_store_data(full_refresh=args.full)
     print("[+] Real-time data scraping completed!")
-    print(f"[+] Total locations stored: {locations_collection.count_documents({})}")
+    print(f"[+] Total locations stored: {get_locations_collection().estimated_document_count()}")
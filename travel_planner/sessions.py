@@ -0,0 +1,256 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+
+# Conversation history is kept server-side per session: "memory" (per
+# process) or "sqlite" (shared between workers on one host)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+# Sessions untouched for this many seconds are dropped
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", 3600))
+# Least recently used sessions are evicted beyond this count
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", 10000))
+# Only the newest turns are kept; the history window trims further per request
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 40))
+# In-memory sessions idle this long are packed into one compressed blob
+SESSION_COMPACT_AFTER = int(os.getenv("SESSION_COMPACT_AFTER", 120))
+SESSION_SQLITE_PATH = os.getenv("SESSION_SQLITE_PATH", "sessions.sqlite3")
+
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def is_valid_session_id(session_id):
+    """Check a client-supplied session id: 8-64 URL-safe characters"""
+    return isinstance(session_id, str) and bool(SESSION_ID_PATTERN.match(session_id))
+
+
+def pack_turns(turns):
+    """Pack turns into one zlib blob: a turn count, an array of byte lengths, then the UTF-8 text"""
+    encoded = [turn.encode("utf-8") for turn in turns]
+    lengths = array("I", [len(data) for data in encoded])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    return zlib.compress(len(encoded).to_bytes(4, "little") + lengths.tobytes() + b"".join(encoded))
+
+
+def unpack_turns(blob):
+    """Inverse of pack_turns"""
+    data = zlib.decompress(blob)
+    count = int.from_bytes(data[:4], "little")
+    lengths = array("I")
+    lengths.frombytes(data[4:4 + count * lengths.itemsize])
+    if sys.byteorder == "big":
+        lengths.byteswap()
+    turns = []
+    offset = 4 + count * lengths.itemsize
+    for length in lengths:
+        turns.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    return turns
+
+
+def add_turn(turns, message, max_turns=SESSION_MAX_TURNS):
+    """Append message, keeping only the newest max_turns turns"""
+    turns.append(message)
+    if len(turns) > max_turns:
+        del turns[:len(turns) - max_turns]
+    return turns
+
+
+class Session:
+    """One conversation: its destination and user turns, either as a list or packed"""
+
+    __slots__ = ("location", "turns", "packed", "touched")
+
+    def __init__(self, location, now):
+        self.location = location
+        self.turns = []
+        self.packed = None
+        self.touched = now
+
+    def history(self):
+        """Return the turns as a list, unpacking a compacted session"""
+        if self.packed is not None:
+            self.turns = unpack_turns(self.packed)
+            self.packed = None
+        return self.turns
+
+    def compact(self):
+        if self.packed is None:
+            self.packed = pack_turns(self.turns)
+            self.turns = None
+
+
+class MemorySessionStore:
+    """In-process sessions with LRU eviction, idle TTL and compaction of idle sessions"""
+
+    SWEEP_EVERY = 64
+
+    def __init__(self, idle_ttl=SESSION_IDLE_TTL, max_count=SESSION_MAX_COUNT,
+                 compact_after=SESSION_COMPACT_AFTER, max_turns=SESSION_MAX_TURNS):
+        self.idle_ttl = idle_ttl
+        self.max_count = max_count
+        self.compact_after = compact_after
+        self.max_turns = max_turns
+        # Ordered least to most recently used, which is also idle-time order
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "compactions": 0}
+
+    def append_turn(self, session_id, location, message):
+        """Return the session's prior turns and record message as its newest turn.
+
+        A new, expired or evicted session, or one started for another
+        destination, starts with no prior turns.
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and (now - session.touched >= self.idle_ttl or session.location != location):
+                session = None
+            if session is None:
+                self._stats["misses"] += 1
+                session = Session(location, now)
+                self._sessions[session_id] = session
+            else:
+                self._stats["hits"] += 1
+            self._sessions.move_to_end(session_id)
+            session.touched = now
+
+            turns = session.history()
+            prior = list(turns)
+            add_turn(turns, message, self.max_turns)
+
+            while len(self._sessions) > self.max_count:
+                self._sessions.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+        return prior
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._sessions)
+            stats["compacted"] = sum(1 for session in self._sessions.values() if session.packed is not None)
+        stats["backend"] = type(self).__name__
+        return stats
+
+    def _sweep(self, now):
+        """Drop expired sessions and compact idle ones, oldest first"""
+        for session_id, session in list(self._sessions.items()):
+            idle = now - session.touched
+            if idle < self.compact_after:
+                break
+            if idle >= self.idle_ttl:
+                del self._sessions[session_id]
+                self._stats["expired"] += 1
+            elif session.packed is None:
+                session.compact()
+                self._stats["compactions"] += 1
+
+
+class SQLiteSessionStore:
+    """SQLite file sessions that several worker processes can share; turns are always stored packed"""
+
+    EVICT_EVERY = 64
+
+    def __init__(self, path=SESSION_SQLITE_PATH, idle_ttl=SESSION_IDLE_TTL, max_count=SESSION_MAX_COUNT,
+                 max_turns=SESSION_MAX_TURNS):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.max_count = max_count
+        self.max_turns = max_turns
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        # The file and table are created on first use, not at import
+        self._schema_ready = False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn):
+        with self._lock:
+            if self._schema_ready:
+                return
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, location TEXT NOT NULL, turns BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+            self._schema_ready = True
+
+    def append_turn(self, session_id, location, message):
+        """Return the session's prior turns and record message as its newest turn"""
+        conn = self._connection()
+        now = time.time()
+        # IMMEDIATE takes the write lock up front, so concurrent workers can't lose a turn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT location, turns FROM sessions WHERE id = ? AND updated_at >= ?",
+                (session_id, now - self.idle_ttl)
+            ).fetchone()
+            prior = unpack_turns(row[1]) if row and row[0] == location else []
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, location, turns, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, location, pack_turns(add_turn(list(prior), message, self.max_turns)), now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._stats["hits" if row and row[0] == location else "misses"] += 1
+            self._writes += 1
+            evict = self._writes % self.EVICT_EVERY == 0
+        if evict:
+            self._evict(conn, now)
+        return prior
+
+    def delete(self, session_id):
+        self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        stats["backend"] = type(self).__name__
+        return stats
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM sessions WHERE updated_at < ?", (now - self.idle_ttl,))
+        conn.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            "SELECT id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_count,)
+        )
+
+
+def create_session_store(backend=SESSION_BACKEND):
+    """Create the configured session store"""
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "memory":
+        print(f"[-] Unknown SESSION_BACKEND '{backend}', using in-memory sessions")
+    return MemorySessionStore()
@@ -4,7 +4,8 @@ const sendBtn = document.getElementById("sendBtn");
 const locationSelect = document.getElementById("location");
 const weatherBadge = document.getElementById("weatherBadge");
 
-let conversationHistory = [];
+// Earlier turns are kept server-side under this id; a new id starts a new conversation
+let sessionId = newSessionId();
 let currentWeather = null;
 
 // Load locations on page load
@@ -61,7 +62,6 @@ async function sendMessage() {
     // Add user message to UI
     addMessage(message, "user");
     userInput.value = "";
-    conversationHistory.push(message);
 
     // Show loading indicator
     showLoadingIndicator();
@@ -73,18 +73,18 @@ async function sendMessage() {
             body: JSON.stringify({
                 message: message,
                 location: location,
-                history: conversationHistory
+                session_id: sessionId,
+                stream: true
             })
         });
 
-        const data = await response.json();
-        removeLoadingIndicator();
-
-        if (data.response) {
-            addMessage(data.response, "bot");
-        } else {
+        if (!response.ok || !response.body) {
+            removeLoadingIndicator();
             addMessage("Error: Unable to get response", "bot");
+            return;
         }
+
+        await readChatStream(response);
     } catch (error) {
         removeLoadingIndicator();
         addMessage("Connection error. Please try again.", "bot");
@@ -97,9 +97,47 @@ async function sendMessage() {
     }
 }
 
+// Render server-sent chat events into a bot message as they arrive
+async function readChatStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let text = "";
+    let messageDiv = null;
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+
+        for (const event of events) {
+            if (!event.startsWith("data: ")) continue;
+            const payload = JSON.parse(event.substring(6));
+            if (!payload.delta) continue;
+
+            text += payload.delta;
+            if (!messageDiv) {
+                removeLoadingIndicator();
+                messageDiv = addMessage(text, "bot");
+            } else {
+                updateMessage(messageDiv, text);
+            }
+        }
+    }
+
+    if (!messageDiv) {
+        removeLoadingIndicator();
+        addMessage("Error: Unable to get response", "bot");
+    }
+}
+
 function addMessage(text, sender) {
     const messageDiv = document.createElement("div");
     messageDiv.className = `message ${sender}`;
+    messageDiv.dataset.text = text;
 
     const contentDiv = document.createElement("div");
     contentDiv.className = "message-content";
@@ -113,7 +151,7 @@ function addMessage(text, sender) {
         copyBtn.className = "copy-btn";
         copyBtn.innerHTML = "📋";
         copyBtn.title = "Copy to clipboard";
-        copyBtn.onclick = () => copyToClipboard(text, copyBtn);
+        copyBtn.onclick = () => copyToClipboard(messageDiv.dataset.text, copyBtn);
         messageDiv.appendChild(copyBtn);
     } else {
         contentDiv.textContent = text;
@@ -122,6 +160,14 @@ function addMessage(text, sender) {
     messageDiv.appendChild(contentDiv);
     chatMessages.appendChild(messageDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv;
+}
+
+// Re-render a bot message with more streamed text
+function updateMessage(messageDiv, text) {
+    messageDiv.dataset.text = text;
+    messageDiv.querySelector(".message-content").innerHTML = formatMarkdown(text);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
 }
 
 // Copy message to clipboard
@@ -312,8 +358,13 @@ function getTempColor(temp) {
     return '#9c27b0';                       // Cold - purple
 }
 
-// Clear chat messages and conversation history
+function newSessionId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + "-" + Math.random().toString(36).substring(2, 12);
+}
+
+// Clear chat messages and start a new server-side conversation
 function clearChat() {
     chatMessages.innerHTML = '';
-    conversationHistory = [];
+    sessionId = newSessionId();
 }
@@ -0,0 +1,12 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Tests never reach Groq, MongoDB or files left over from local runs
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("PRECOMPUTED_PATH", "")
+os.environ.setdefault("RESPONSE_CACHE_BACKEND", "")
+os.environ.setdefault("SESSION_BACKEND", "memory")
+os.environ.setdefault("LOCATION_POLL_INTERVAL", "0")
+os.environ.setdefault("MONGO_URI", "mongomock://")
@@ -0,0 +1,86 @@
+import pytest
+
+import answers
+import currency
+import helpers
+from models import build_locations
+
+# Questions the stored location fields can't answer precisely; each must go to the LLM
+MUST_GO_TO_LLM = [
+    "how much does the metro cost",
+    "what does a museum pass cost",
+    "how much should I tip",
+    "what is the cost of living",
+    "is it expensive to visit in winter",
+    "how expensive is it",
+    "best time to visit for skiing",
+    "best time to see cherry blossoms",
+    "is the exchange rate good right now",
+    "what currency do they use and what is the exchange rate",
+    "how much do I need for 2 weeks",
+    "what budget do I need for two weeks",
+    "budget for a weekend",
+    "how much per day for 3 nights",
+    "budget for three days",
+    "how much is a hotel per day",
+    "what's the daily budget for Paris or Rome",
+]
+
+# Confident matches that are still answered from data
+ANSWERED = [
+    ("What's the daily budget?", "Daily Budget for Paris:"),
+    ("how much do I need per day", "Daily Budget for Paris:"),
+    ("budget for a 5-day trip", "Total for 5 Days:"),
+    ("when is the best time to visit", "Best Time to Visit Paris:"),
+    ("what currency do they use", "Currency in Paris:"),
+    ("what language do they speak", "Language in Paris:"),
+]
+
+
+@pytest.fixture(scope="module")
+def paris():
+    return helpers.get_location_context("Paris")
+
+
+@pytest.mark.parametrize("message", MUST_GO_TO_LLM)
+def test_declined_questions_go_to_llm(paris, message):
+    reply, messages, _, _ = helpers.prepare_chat(message, paris, [])
+    assert reply is None
+    assert messages[-1]["content"] == message
+
+
+@pytest.mark.parametrize("message,heading", ANSWERED)
+def test_confident_matches_are_answered(paris, message, heading):
+    reply, messages, _, _ = helpers.prepare_chat(message, paris, [])
+    assert messages is None
+    assert heading in reply
+
+
+RATES = {"base": "USD", "rates": {"USD": 1.0, "EUR": 0.9, "JPY": 150.0}}
+
+
+def tokyo_from_scraper():
+    """Tokyo as the scraper stores it: budget in USD, with a reference to the stored rate table"""
+    doc = helpers.get_location_context("Tokyo").to_dict()
+    doc["real_time_data"] = {"currency_rates": {"currency_code": "JPY", "rate_table": "USD"}}
+    return build_locations({"Tokyo": doc})["Tokyo"]
+
+
+def test_convert_derives_cross_rates():
+    assert currency.convert(100, "USD", "JPY", RATES) == 15000
+    assert currency.convert(90, "EUR", "JPY", RATES) == pytest.approx(15000)
+    assert currency.convert(5, "eur", "EUR", RATES) == 5
+    assert currency.convert(5, "USD", "XYZ", RATES) is None
+
+
+def test_budget_shows_local_currency_from_stored_rates(monkeypatch):
+    monkeypatch.setattr(currency, "get_rate_table", lambda base=currency.CURRENCY_BASE: RATES)
+    reply = answers.render_budget(tokyo_from_scraper(), 2)
+    assert "- Mid: $140/day (about 21,000 JPY)" in reply
+    assert "- Mid: $280 (about 42,000 JPY)" in reply
+
+
+def test_budget_without_stored_rates_is_shown_as_stored(paris, monkeypatch):
+    monkeypatch.setattr(currency, "get_rate_table", lambda base=currency.CURRENCY_BASE: {})
+    assert "about" not in answers.render_budget(tokyo_from_scraper(), None)
+    assert "about" not in answers.render_budget(paris, None)
@@ -0,0 +1,220 @@
+import asyncio
+import threading
+import time
+
+from cache import TTLCache
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_concurrently(cache, key, loader, count):
+    """Call get_or_load from count threads; returns (results, errors)"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.get_or_load(key, loader))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        release.wait(5)
+        return {"location": key}
+
+    threads, results, errors = run_concurrently(cache, "paris", loader, 5)
+    wait_for(lambda: cache.stats()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["paris"]
+    assert errors == []
+    assert results == [{"location": "paris"}] * 5
+    assert cache.get("paris") == {"location": "paris"}
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_loader_error_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache(ttl=60)
+    release = threading.Event()
+
+    def loader(key):
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    threads, results, errors = run_concurrently(cache, "paris", loader, 3)
+    wait_for(lambda: cache.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert [str(e) for e in errors] == ["upstream down"] * 3
+    assert cache.get("paris") is None
+    assert cache.get_or_load("paris", lambda key: "ok") == "ok"
+
+
+def test_none_is_a_failed_load_and_not_cached():
+    cache = TTLCache(ttl=60)
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        return None
+
+    assert cache.get_or_load("paris", loader) is None
+    assert cache.get_or_load("paris", loader) is None
+    assert len(calls) == 2
+    assert cache.stats()["errors"] == 2
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    cache.set("paris", "old")
+    time.sleep(0.06)
+    release = threading.Event()
+    calls = []
+
+    def loader(key):
+        calls.append(key)
+        release.wait(5)
+        return "new"
+
+    assert cache.get_or_load("paris", loader) == "old"
+    assert cache.get_or_load("paris", loader) == "old"
+    release.set()
+    wait_for(lambda: cache.get("paris") == "new")
+    assert calls == ["paris"]
+
+
+def test_async_misses_share_one_load():
+    async def run():
+        cache = TTLCache(ttl=60)
+        release = asyncio.Event()
+        calls = []
+
+        async def loader(key):
+            calls.append(key)
+            await release.wait()
+            return key.upper()
+
+        tasks = [asyncio.ensure_future(cache.get_or_load_async("paris", loader)) for _ in range(5)]
+        while cache.stats()["coalesced"] < 4:
+            await asyncio.sleep(0)
+        release.set()
+        return calls, await asyncio.gather(*tasks)
+
+    calls, results = asyncio.run(run())
+    assert calls == ["paris"]
+    assert results == ["PARIS"] * 5
+
+
+def test_lru_eviction():
+    cache = TTLCache(ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_concurrent_batches_share_loads_per_key():
+    cache = TTLCache(ttl=60)
+    cache.set("rome", "ROME")
+    release = threading.Event()
+    batches = []
+
+    def loader(keys):
+        batches.append(sorted(keys))
+        release.wait(5)
+        return {key: key.upper() for key in keys if key != "nowhere"}
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_load_many(["paris", "tokyo"], loader)))
+    first.start()
+    wait_for(lambda: batches)
+    second = threading.Thread(
+        target=lambda: results.append(cache.get_or_load_many(["rome", "tokyo", "paris", "nowhere"], loader))
+    )
+    second.start()
+    wait_for(lambda: cache.stats()["coalesced"] == 2)
+    release.set()
+    first.join()
+    second.join()
+
+    # The second batch only loads the key nobody else was loading
+    assert batches == [["paris", "tokyo"], ["nowhere"]]
+    assert {"paris": "PARIS", "tokyo": "TOKYO"} in results
+    assert {"rome": "ROME", "tokyo": "TOKYO", "paris": "PARIS"} in results
+    assert cache.get("nowhere") is None
+
+
+def test_batch_serves_stale_values_while_one_refresh_runs():
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    cache.set("paris", "old paris")
+    cache.set("tokyo", "old tokyo")
+    time.sleep(0.06)
+    release = threading.Event()
+    batches = []
+
+    def loader(keys):
+        batches.append(sorted(keys))
+        release.wait(5)
+        return {key: f"new {key}" for key in keys}
+
+    expected = {"paris": "old paris", "tokyo": "old tokyo"}
+    assert cache.get_or_load_many(["paris", "tokyo"], loader) == expected
+    assert cache.get_or_load_many(["paris", "tokyo"], loader) == expected
+    release.set()
+    wait_for(lambda: cache.get("tokyo") == "new tokyo")
+    assert batches == [["paris", "tokyo"]]
+
+
+def test_async_batch_waits_on_a_single_load_in_flight():
+    async def run():
+        cache = TTLCache(ttl=60)
+        release = asyncio.Event()
+        calls = []
+
+        async def load_one(key):
+            calls.append(key)
+            await release.wait()
+            return key.upper()
+
+        async def load_many(keys):
+            calls.append(sorted(keys))
+            return {key: key.upper() for key in keys}
+
+        single = asyncio.ensure_future(cache.get_or_load_async("paris", load_one))
+        while not calls:
+            await asyncio.sleep(0)
+        batch = asyncio.ensure_future(cache.get_or_load_many_async(["paris", "rome"], load_many))
+        while cache.stats()["coalesced"] < 1:
+            await asyncio.sleep(0)
+        release.set()
+        return calls, await single, await batch
+
+    calls, single, batch = asyncio.run(run())
+    assert calls == ["paris", ["rome"]]
+    assert single == "PARIS"
+    assert batch == {"paris": "PARIS", "rome": "ROME"}
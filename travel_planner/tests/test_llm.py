@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from llm import OpenAICompatibleProvider, StubProvider, create_router
+from scheduler import is_rate_limit_error, retry_after_seconds
+
+REPLY = "Day 1: Louvre"
+
+
+def handler(request):
+    body = json.loads(request.content)
+    assert request.url.path == "/v1/chat/completions"
+    assert request.headers["Authorization"] == "Bearer key"
+    assert body["model"] == "gpt-test"
+    if body["messages"][0]["content"] == "busy":
+        return httpx.Response(429, headers={"retry-after": "3"}, json={"error": {"message": "slow down"}})
+    if not body["stream"]:
+        return httpx.Response(200, json={
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 4}
+        })
+    events = [{"choices": [{"index": 0, "delta": {"content": word}}]} for word in ("Day 1: ", "Louvre")]
+    text = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return httpx.Response(200, text=text, headers={"Content-Type": "text/event-stream"})
+
+
+def make_provider():
+    transport = httpx.MockTransport(handler)
+    return OpenAICompatibleProvider(
+        base_url="https://llm.example/v1/", api_key="key", model="gpt-test",
+        client_factory=lambda: httpx.Client(transport=transport),
+        async_client_factory=lambda: httpx.AsyncClient(transport=transport)
+    )
+
+
+def test_openai_compatible_completion():
+    response = make_provider().create(model="llama", messages=[{"role": "user", "content": "hi"}], max_tokens=5)
+    assert response.choices[0].message.content == REPLY
+    assert response.usage.completion_tokens == 4
+
+
+def test_openai_compatible_stream():
+    chunks = make_provider().create(model="llama", messages=[{"role": "user", "content": "hi"}], stream=True)
+    assert "".join(chunk.choices[0].delta.content for chunk in chunks) == REPLY
+
+
+def test_openai_compatible_async_stream():
+    async def run():
+        chunks = await make_provider().create_async(model="llama", messages=[{"role": "user", "content": "hi"}],
+                                                    stream=True)
+        return "".join([chunk.choices[0].delta.content async for chunk in chunks])
+
+    assert asyncio.run(run()) == REPLY
+
+
+def test_openai_compatible_rate_limit_reads_like_groq():
+    with pytest.raises(Exception) as caught:
+        make_provider().create(model="llama", messages=[{"role": "user", "content": "busy"}])
+    assert is_rate_limit_error(caught.value)
+    assert retry_after_seconds(caught.value) == 3
+
+
+def test_router_refuses_stub_unless_allowed():
+    groq = object()
+    router = create_router("llama", {"groq": groq}, names=["groq", "stub"])
+    assert list(router.providers) == ["groq"]
+    router = create_router("llama", {"groq": groq}, names=["groq", "stub"], allow_stub=True)
+    assert isinstance(router.providers["stub"], StubProvider)
+
+
+def test_router_skips_unconfigured_openai():
+    router = create_router("llama", {"groq": object()}, names=["groq", "openai"])
+    assert list(router.providers) == ["groq"]
@@ -0,0 +1,36 @@
+import pytest
+
+from location_index import FUZZY_MAX_LENGTH, LocationIndex
+
+
+def make_index():
+    return LocationIndex({"Tokyo": {}, "New York": {"aliases": ["Gotham"]}})
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("tokyo", "Tokyo"),
+    ("  NEW   york ", "New York"),
+    ("NYC", "New York"),
+    ("gotham", "New York"),
+    ("Tokyp", "Tokyo"),
+    ("Paris", None),
+])
+def test_resolve(name, expected):
+    assert make_index().resolve(name) == expected
+
+
+@pytest.mark.parametrize("name", ["Toky0", "Tokyo!", "tokyo;drop", "t" * (FUZZY_MAX_LENGTH + 1)])
+def test_fuzzy_fallback_skips_odd_input(name):
+    index = make_index()
+    assert index.resolve(name) is None
+    assert index._closest.cache_info().currsize == 0
+
+
+def test_fuzzy_memo_is_lru(monkeypatch):
+    monkeypatch.setattr("location_index.FUZZY_MEMO_SIZE", 2)
+    index = make_index()
+    for name in ["Tokyp", "Nwe York", "Tokyp", "Lisbon"]:
+        index.resolve(name)
+
+    info = index._closest.cache_info()
+    assert (info.hits, info.currsize) == (1, 2)
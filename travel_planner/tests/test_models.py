@@ -0,0 +1,34 @@
+import json
+import os
+
+from models import build_locations, validate_location
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_records_round_trip_locations_json():
+    with open(os.path.join(HERE, "locations.json"), encoding="utf-8") as f:
+        documents = json.load(f)
+    locations = build_locations(documents)
+    for name, doc in documents.items():
+        assert json.dumps(locations[name].to_dict()) == json.dumps(doc)
+
+
+def test_int_values_stay_ints():
+    doc = {"coordinates": {"latitude": 10, "longitude": 2.5},
+           "attractions": [{"name": "A", "rating": 5}, {"name": "B", "rating": 4.5}]}
+    location = build_locations({"X": doc})["X"]
+    assert location["coordinates"] == {"latitude": 10, "longitude": 2.5}
+    assert isinstance(location.latitude, int)
+    assert [type(a["rating"]) for a in location["attractions"]] == [int, float]
+
+
+def test_non_numeric_budget_is_reported():
+    doc = {"coordinates": {"latitude": 1, "longitude": 1},
+           "budget": {"daily_budget_low": "varies", "daily_budget_mid": 100, "daily_budget_high": [300]}}
+    assert validate_location("X", doc) == [
+        "daily_budget_low is not a number ('varies'), kept as text",
+        "daily_budget_high is not a number ([300]), dropped"
+    ]
+    budget = build_locations({"X": doc})["X"]["budget"]
+    assert budget.to_dict() == {"daily_budget_low": "varies", "daily_budget_mid": 100}
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+
+from scheduler import LLMScheduler, QueueFull, QueueTimeout, RateLimited, client_key
+
+
+class RateLimitError(Exception):
+    """Stand-in for the groq SDK's 429 error"""
+
+    status_code = 429
+
+    def __init__(self, retry_after="0"):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"headers": {"retry-after": retry_after}})()
+
+
+def make_scheduler(**kwargs):
+    kwargs.setdefault("max_concurrency", 1)
+    kwargs.setdefault("requests_per_minute", 0)
+    kwargs.setdefault("queue_timeout", 5)
+    return LLMScheduler(**kwargs)
+
+
+async def wait_queued(scheduler, count):
+    while scheduler.stats()["queued"] < count:
+        await asyncio.sleep(0)
+
+
+def test_waiting_clients_are_served_round_robin():
+    async def run():
+        scheduler = make_scheduler()
+        await scheduler.acquire_async("holder")
+        order = []
+
+        async def request(client):
+            await scheduler.acquire_async(client)
+            order.append(client)
+            scheduler.release()
+
+        tasks = []
+        for client in ["busy", "busy", "busy", "quiet"]:
+            tasks.append(asyncio.ensure_future(request(client)))
+            await wait_queued(scheduler, len(tasks))
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["busy", "quiet", "busy", "busy"]
+    assert (stats["active"], stats["queued"]) == (0, 0)
+
+
+def test_per_client_queue_limit():
+    async def run():
+        scheduler = make_scheduler(max_queue_per_client=2)
+        await scheduler.acquire_async("holder")
+        tasks = [asyncio.ensure_future(scheduler.acquire_async("busy")) for _ in range(2)]
+        await wait_queued(scheduler, 2)
+        with pytest.raises(QueueFull):
+            await scheduler.acquire_async("busy")
+        # Another client still gets a place in the queue
+        other = asyncio.ensure_future(scheduler.acquire_async("quiet"))
+        await wait_queued(scheduler, 3)
+        for task in tasks + [other]:
+            task.cancel()
+        await asyncio.gather(*tasks, other, return_exceptions=True)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["active"], stats["queued"], stats["waiting_clients"]) == (1, 0, 0)
+
+
+def test_queue_timeout():
+    scheduler = make_scheduler(queue_timeout=0.05)
+    scheduler.acquire("holder")
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("late")
+    assert scheduler.stats()["queued"] == 0
+
+
+def test_rate_limited_request_is_requeued():
+    scheduler = make_scheduler(rate_limit_retries=2)
+    calls = []
+
+    def request():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RateLimitError()
+        return "answer"
+
+    with scheduler.admit("client", request) as result:
+        assert result == "answer"
+        assert scheduler.stats()["active"] == 1
+    assert len(calls) == 2
+    assert scheduler.stats()["active"] == 0
+
+
+def test_rate_limit_retries_run_out():
+    scheduler = make_scheduler(rate_limit_retries=1)
+    calls = []
+
+    def request():
+        calls.append(len(calls))
+        raise RateLimitError()
+
+    with pytest.raises(RateLimited):
+        with scheduler.admit("client", request):
+            pass
+    assert len(calls) == 2
+    assert scheduler.stats()["active"] == 0
+
+
+def test_other_errors_are_not_retried():
+    scheduler = make_scheduler()
+    calls = []
+
+    def request():
+        calls.append(len(calls))
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        with scheduler.admit("client", request):
+            pass
+    assert len(calls) == 1
+    assert scheduler.stats()["active"] == 0
+
+
+def test_rate_limit_pauses_admissions():
+    scheduler = make_scheduler(max_concurrency=4, requests_per_minute=60, burst=4)
+    scheduler.rate_limited(retry_after=30)
+    stats = scheduler.stats()
+    assert stats["paused_for_s"] > 25
+    assert stats["tokens"] == 0
+    assert not scheduler.try_acquire()
+
+
+def test_try_acquire_takes_only_free_capacity():
+    scheduler = make_scheduler(max_concurrency=2)
+    scheduler.acquire("holder")
+    assert scheduler.try_acquire()
+    assert not scheduler.try_acquire()
+    scheduler.release()
+    scheduler.release()
+    assert scheduler.stats()["active"] == 0
+
+
+def test_try_acquire_never_jumps_the_queue():
+    async def run():
+        # A free slot but no token: the waiter queues and try_acquire must not overtake it
+        scheduler = make_scheduler(max_concurrency=2, requests_per_minute=1, burst=1)
+        await scheduler.acquire_async("holder")
+        waiter = asyncio.ensure_future(scheduler.acquire_async("queued"))
+        await wait_queued(scheduler, 1)
+        assert not scheduler.try_acquire()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return scheduler.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["active"], stats["queued"]) == (1, 0)
+
+
+@pytest.mark.parametrize("args,expected", [
+    (("10.0.0.1", None, 0), "addr:10.0.0.1"),
+    (("10.0.0.1", "1.2.3.4", 0), "addr:10.0.0.1"),
+    (("10.0.0.1", "6.6.6.6, 1.2.3.4", 1), "addr:1.2.3.4"),
+    (("10.0.0.1", "1.2.3.4, 10.0.0.2", 2), "addr:1.2.3.4"),
+    (("10.0.0.1", "1.2.3.4", 2), "addr:10.0.0.1"),
+])
+def test_client_key(args, expected):
+    assert client_key(*args) == expected
@@ -0,0 +1,137 @@
+import pytest
+import requests
+
+mongomock = pytest.importorskip("mongomock")
+
+import http_client
+import scraper
+from pymongo import UpdateOne
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeUpstreams:
+    """Answers http_client.get() for Open-Meteo, ExchangeRate-API and Aladhan; down lists failing upstreams"""
+
+    def __init__(self):
+        self.calls = []
+        self.down = set()
+
+    def get(self, upstream, url, deadline=None, **kwargs):
+        self.calls.append(upstream)
+        if upstream in self.down:
+            raise requests.ConnectionError(f"{upstream} is down")
+        if upstream == "open-meteo":
+            current = {"current": {"temperature_2m": 18, "weather_code": 1, "wind_speed_10m": 4}, "timezone": "UTC"}
+            count = url.split("latitude=")[1].split("&")[0].count(",") + 1
+            return FakeResponse([current] * count if count > 1 else current)
+        if upstream == "exchangerate":
+            return FakeResponse({"base": "USD", "rates": {"USD": 1.0, "EUR": 0.9}})
+        return FakeResponse({"data": {"timings": {"Fajr": "05:00"}}})
+
+    def count(self, upstream):
+        return self.calls.count(upstream)
+
+
+@pytest.fixture
+def upstreams(monkeypatch):
+    fake = FakeUpstreams()
+    monkeypatch.setattr(scraper, "_client", mongomock.MongoClient())
+    monkeypatch.setattr(http_client, "get", fake.get)
+    return fake
+
+
+def test_bulk_write_locations_upserts_in_batches(upstreams):
+    scraper.ensure_indexes()
+    operations = [
+        UpdateOne({"location": f"City {i}"}, {"$set": {"location": f"City {i}", "rank": i}}, upsert=True)
+        for i in range(5)
+    ]
+    timings = {}
+
+    assert scraper.bulk_write_locations(operations, timings, batch_size=2) == 5
+    assert timings["bulk_write"]["calls"] == 3
+    assert timings["bulk_write"]["failures"] == 0
+    collection = scraper.get_locations_collection()
+    assert collection.count_documents({}) == 5
+
+    # Re-applying the same upserts matches the stored documents instead of adding new ones
+    assert scraper.bulk_write_locations(operations, {}, batch_size=2) == 5
+    assert collection.count_documents({}) == 5
+
+
+def test_rerun_within_ttls_fetches_and_writes_nothing(upstreams):
+    scraper.scrape_and_store_data()
+    locations = len(scraper.SOURCES)
+    assert upstreams.count("open-meteo") == 1
+    assert upstreams.count("aladhan") == locations
+    assert upstreams.count("exchangerate") == 1
+    collection = scraper.get_locations_collection()
+    assert collection.count_documents({}) == locations
+    before = {doc["location"]: doc["updated_at"] for doc in collection.find()}
+
+    upstreams.calls.clear()
+    timings = scraper.scrape_and_store_data()
+
+    assert upstreams.calls == []
+    assert timings["bulk_write"]["calls"] == 0
+    assert {doc["location"]: doc["updated_at"] for doc in collection.find()} == before
+
+
+def test_expired_stage_is_refetched_alone(upstreams, monkeypatch):
+    scraper.scrape_and_store_data()
+    monkeypatch.setitem(scraper.REFRESH_TTLS, "weather", 0)
+    upstreams.calls.clear()
+
+    scraper.scrape_and_store_data()
+
+    assert upstreams.calls == ["open-meteo"]
+
+
+def test_full_refresh_refetches_everything(upstreams):
+    scraper.scrape_and_store_data()
+    upstreams.calls.clear()
+
+    scraper.scrape_and_store_data(full_refresh=True)
+
+    assert upstreams.count("open-meteo") == 1
+    assert upstreams.count("aladhan") == len(scraper.SOURCES)
+    assert upstreams.count("exchangerate") == 1
+
+
+def test_failed_advisories_are_retried_on_the_next_run(upstreams):
+    upstreams.down.add("aladhan")
+    scraper.scrape_and_store_data()
+    paris = scraper.get_locations_collection().find_one({"location": "Paris"})
+    assert paris["real_time_data"]["travel_info"]["status"] == scraper.FETCH_FAILED_STATUS
+    assert "advisory" not in paris["real_time_data"]["fetched_at"]
+
+    upstreams.down.clear()
+    upstreams.calls.clear()
+    scraper.scrape_and_store_data()
+
+    assert upstreams.calls == ["aladhan"] * len(scraper.SOURCES)
+    paris = scraper.get_locations_collection().find_one({"location": "Paris"})
+    assert paris["real_time_data"]["travel_info"]["status"] == "Information available"
+
+
+def test_failed_refresh_keeps_the_last_good_result(upstreams, monkeypatch):
+    scraper.scrape_and_store_data()
+    monkeypatch.setitem(scraper.REFRESH_TTLS, "advisory", 0)
+    upstreams.down.add("aladhan")
+
+    scraper.scrape_and_store_data()
+
+    paris = scraper.get_locations_collection().find_one({"location": "Paris"})
+    assert paris["real_time_data"]["travel_info"]["status"] == "Information available"
@@ -0,0 +1,19 @@
+import pytest
+
+from sessions import pack_turns, unpack_turns
+
+
+@pytest.mark.parametrize("turns", [
+    [],
+    [""],
+    ["hello"],
+    ["plan 3 days in Paris", "", "and a cheaper version?"],
+    ["Tōkyō ラーメン 🍜", "naïve café", "x" * 100000],
+])
+def test_pack_unpack_round_trip(turns):
+    assert unpack_turns(pack_turns(turns)) == turns
+
+
+def test_packed_turns_are_compressed():
+    turns = ["What should I see in Paris on day one?"] * 40
+    assert len(pack_turns(turns)) < sum(len(turn) for turn in turns) // 4
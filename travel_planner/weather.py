@@ -0,0 +1,61 @@
+import os
+import http_client
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+# Coordinates sent per Open-Meteo request; larger batches are split
+WEATHER_BATCH_SIZE = int(os.getenv("WEATHER_BATCH_SIZE", 50))
+
+
+def build_batch_weather_url(coordinates, fields):
+    """Build one Open-Meteo current-weather URL for a list of (lat, lon) pairs"""
+    latitudes = ",".join(str(lat) for lat, _ in coordinates)
+    longitudes = ",".join(str(lon) for _, lon in coordinates)
+    return f"{OPEN_METEO_URL}?latitude={latitudes}&longitude={longitudes}&current={fields}"
+
+
+def split_batch_response(data, count):
+    """Split a multi-coordinate response into one result per requested coordinate.
+
+    Open-Meteo returns a list for several coordinates and a single object
+    for one; results come back in request order.
+    """
+    results = data if isinstance(data, list) else [data]
+    if len(results) != count:
+        raise ValueError(f"expected {count} results, got {len(results)}")
+    return results
+
+
+def fetch_weather_batch(coordinates, fields, deadline=None):
+    """Fetch current weather for many (lat, lon) pairs in as few requests as possible.
+
+    Returns a list aligned with coordinates holding each raw Open-Meteo
+    result, or None where that batch failed. deadline bounds all batches
+    together (see http_client.request_deadline()).
+    """
+    results = []
+    for start in range(0, len(coordinates), WEATHER_BATCH_SIZE):
+        batch = coordinates[start:start + WEATHER_BATCH_SIZE]
+        try:
+            response = http_client.get("open-meteo", build_batch_weather_url(batch, fields), deadline=deadline)
+            response.raise_for_status()
+            results.extend(split_batch_response(response.json(), len(batch)))
+        except Exception as e:
+            print(f"[-] Batch weather API error for {len(batch)} locations: {str(e)}")
+            results.extend([None] * len(batch))
+    return results
+
+
+async def fetch_weather_batch_async(client, coordinates, fields, deadline=None):
+    """Async variant of fetch_weather_batch over an httpx.AsyncClient"""
+    results = []
+    for start in range(0, len(coordinates), WEATHER_BATCH_SIZE):
+        batch = coordinates[start:start + WEATHER_BATCH_SIZE]
+        try:
+            url = build_batch_weather_url(batch, fields)
+            response = await http_client.get_async(client, "open-meteo", url, deadline=deadline)
+            response.raise_for_status()
+            results.extend(split_batch_response(response.json(), len(batch)))
+        except Exception as e:
+            print(f"[-] Batch weather API error for {len(batch)} locations: {str(e)}")
+            results.extend([None] * len(batch))
+    return results